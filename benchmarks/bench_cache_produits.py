@@ -0,0 +1,53 @@
+# benchmarks/bench_cache_produits.py - Validation de panier avec et sans cache produits
+#
+# Usage : python -m benchmarks.bench_cache_produits
+
+import random
+from benchmarks.commun import base_temporaire, chronometrer
+from controllers.gestion_stock import GestionStock
+from models.produit import Produit
+from utils.db_manager import transaction
+
+NB_PRODUITS = 20000
+NB_PRODUITS_COURANTS = 300  # Les ventes se concentrent sur une petite partie du catalogue
+TAILLES_PANIER = [1, 10, 50]
+NB_PANIERS = 500
+
+
+def valider_panier(panier):
+    """Ce que fait l'interface avant creer_vente : une vérification par ligne, puis le lot"""
+    for produit_id, quantite in panier:
+        GestionStock.verifier_disponibilite(produit_id, quantite)
+    produits = Produit.get_by_ids(produit_id for produit_id, _ in panier)
+    return all(produits[produit_id].quantite >= quantite for produit_id, quantite in panier)
+
+
+def mesurer(paniers, actif):
+    Produit.cache.configurer(actif=actif)
+    Produit.cache.reinitialiser_statistiques()
+    duree = chronometrer(lambda: [valider_panier(p) for p in paniers])
+    return duree / len(paniers), Produit.statistiques_cache()
+
+
+def main():
+    with base_temporaire():
+        with transaction() as cursor:
+            cursor.executemany(
+                'INSERT INTO produits (nom, categorie_id, prix_achat, prix_vente, quantite) VALUES (?, 1, 10, 15, 1000)',
+                [(f'Produit {i}',) for i in range(NB_PRODUITS)])
+        rng = random.Random(42)
+        courants = rng.sample(range(1, NB_PRODUITS + 1), NB_PRODUITS_COURANTS)
+
+        print(f"{'lignes':>6} | {'sans cache (µs)':>15} | {'avec cache (µs)':>15} | {'gain':>5} | {'taux succès':>11}")
+        for taille in TAILLES_PANIER:
+            paniers = [[(rng.choice(courants), 1) for _ in range(taille)] for _ in range(NB_PANIERS)]
+            sans, _ = mesurer(paniers, False)
+            avec, stats = mesurer(paniers, True)
+            print(f"{taille:>6} | {sans * 1e6:>15.1f} | {avec * 1e6:>15.1f} | "
+                  f"{sans / avec:>4.1f}x | {stats['taux_succes']:>10.1%}")
+
+        Produit.cache.configurer(actif=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/bench_creer_vente.py - Coût par ligne de GestionVente.creer_vente
+#
+# Usage : python -m benchmarks.bench_creer_vente
+
+import random
+import sqlite3
+from benchmarks.commun import base_temporaire, chronometrer
+from controllers.gestion_vente import GestionVente
+from models.client import Client
+from models.vente import Vente, DetailVente
+from utils.db_manager import get_db_path, transaction
+
+NB_PRODUITS = 5000
+TAILLES_PANIER = [1, 10, 50, 100]
+REPETITIONS = 50
+
+
+def _lire_une_ligne(requete, parametres):
+    """Ancien get_by_id : une connexion ouverte puis fermée par lecture"""
+    conn = sqlite3.connect(get_db_path())
+    row = conn.execute(requete, parametres).fetchone()
+    conn.close()
+    return row
+
+
+def creer_vente_ligne_par_ligne(client_id, produits_quantites):
+    """Ancien fonctionnement : une connexion et une requête par ligne, INSERT/UPDATE unitaires"""
+    _lire_une_ligne('SELECT * FROM clients WHERE id=?', (client_id,))
+    vente = Vente(client_id=client_id)
+    for produit_id, quantite in produits_quantites:
+        produit = _lire_une_ligne('SELECT * FROM produits WHERE id=?', (produit_id,))
+        vente.details.append(DetailVente(produit_id=produit_id, quantite=quantite,
+                                         prix_unitaire=produit[5]))
+    with transaction() as cursor:
+        cursor.execute('INSERT INTO ventes (client_id, date_vente, montant_total, notes) VALUES (?, ?, ?, ?)',
+                       (vente.client_id, vente.date_vente, 0, ''))
+        vente_id = cursor.lastrowid
+        for d in vente.details:
+            cursor.execute('INSERT INTO details_vente (vente_id, produit_id, quantite, prix_unitaire) VALUES (?, ?, ?, ?)',
+                           (vente_id, d.produit_id, d.quantite, d.prix_unitaire))
+            cursor.execute('UPDATE produits SET quantite = quantite - ? WHERE id = ?', (d.quantite, d.produit_id))
+
+
+def main():
+    with base_temporaire():
+        with transaction() as cursor:
+            cursor.executemany(
+                'INSERT INTO produits (nom, categorie_id, prix_achat, prix_vente, quantite) VALUES (?, 1, 10, 15, ?)',
+                [(f'Produit {i}', 10 ** 9) for i in range(NB_PRODUITS)])
+        client_id = Client(nom='Client benchmark').save()
+        rng = random.Random(42)
+
+        print(f"{'lignes':>6} | {'ligne/ligne (ms)':>16} | {'par lot (ms)':>12} | {'µs/ligne avant':>14} | {'µs/ligne après':>14}")
+        for taille in TAILLES_PANIER:
+            panier = [(rng.randint(1, NB_PRODUITS), 1) for _ in range(taille)]
+            avant = chronometrer(lambda: creer_vente_ligne_par_ligne(client_id, panier), REPETITIONS)
+            apres = chronometrer(lambda: GestionVente.creer_vente(client_id, panier), REPETITIONS)
+            print(f"{taille:>6} | {avant * 1000:>16.2f} | {apres * 1000:>12.2f} | "
+                  f"{avant / taille * 1e6:>14.1f} | {apres / taille * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
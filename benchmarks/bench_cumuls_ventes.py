@@ -0,0 +1,141 @@
+# benchmarks/bench_cumuls_ventes.py - Rapports mensuels et annuels : lignes de vente ou cumuls quotidiens
+#
+# Vérifie aussi que les cumuls tenus à jour par Vente.save / Vente.delete sont identiques
+# à un recalcul complet, même après des changements de prix d'achat.
+#
+# Usage : python -m benchmarks.bench_cumuls_ventes [--ventes 100000]
+
+import argparse
+import random
+from datetime import datetime, timedelta
+from benchmarks.commun import base_temporaire, chronometrer
+from models.cumul_vente import CumulVentes
+from models.vente import Vente, DetailVente
+from utils.dates import bornes_mois, bornes_periode, cle_date
+from utils.db_manager import get_connection, transaction
+
+NB_PRODUITS = 200
+NB_VENTES = 200000
+LIGNES_PAR_VENTE = 5
+NB_JOURS = 365
+REPETITIONS = 5
+
+# Requêtes d'avant les cumuls : jointure de toutes les lignes de vente de la période
+BENEFICE_LIGNES = '''
+SELECT SUM((dv.prix_unitaire - p.prix_achat) * dv.quantite)
+FROM ventes v
+JOIN details_vente dv ON dv.vente_id = v.id
+JOIN produits p ON dv.produit_id = p.id
+WHERE v.date_vente >= ? AND v.date_vente < ?
+'''
+SYNTHESE_MOIS_LIGNES = '''
+SELECT substr(v.date_vente, 1, 7), SUM(dv.quantite), SUM(dv.quantite * dv.prix_unitaire)
+FROM ventes v
+JOIN details_vente dv ON dv.vente_id = v.id
+WHERE v.date_vente >= ? AND v.date_vente < ?
+GROUP BY 1
+ORDER BY 1
+'''
+
+
+def remplir(nb_ventes, rng):
+    maintenant = datetime.now()
+    with transaction() as cursor:
+        cursor.executemany(
+            'INSERT INTO produits (nom, categorie_id, prix_achat, prix_vente, quantite) VALUES (?, ?, ?, ?, 1000000)',
+            [(f'Produit {i}', i % 7 + 1, 10 + i % 5, 15 + i % 9) for i in range(NB_PRODUITS)])
+        for _ in range(nb_ventes):
+            date = cle_date(maintenant - timedelta(minutes=rng.randint(0, NB_JOURS * 24 * 60)))
+            cursor.execute("INSERT INTO ventes (client_id, date_vente, montant_total, notes) VALUES (1, ?, 0, '')",
+                           (date,))
+            vente_id = cursor.lastrowid
+            cursor.executemany(
+                'INSERT INTO details_vente (vente_id, produit_id, quantite, prix_unitaire) VALUES (?, ?, ?, ?)',
+                [(vente_id, rng.randint(1, NB_PRODUITS), rng.randint(1, 4), 20.0) for _ in range(LIGNES_PAR_VENTE)])
+
+
+def cumuls():
+    return get_connection().execute('SELECT * FROM ventes_jour_produit ORDER BY jour, produit_id').fetchall()
+
+
+def changer_prix_achat(rng):
+    """Change le prix d'achat des produits vendus par verifier_maintenance (le passé ne doit pas bouger)"""
+    with transaction() as cursor:
+        cursor.executemany('UPDATE produits SET prix_achat = ? WHERE id = ?',
+                           [(round(rng.uniform(5, 30), 2), produit_id) for produit_id in range(1, 21)])
+
+
+def verifier_maintenance(rng):
+    """
+    Enregistre, déplace et supprime des ventes par le modèle, en changeant les prix d'achat
+    entre chaque étape, puis compare avec un recalcul
+    """
+    ids = []
+    for i in range(300):
+        if i % 100 == 0:
+            changer_prix_achat(rng)
+        vente = Vente(client_id=1, date_vente=datetime.now() - timedelta(days=rng.randint(0, 5)))
+        for _ in range(rng.randint(1, 4)):
+            vente.details.append(DetailVente(produit_id=rng.randint(1, 20), quantite=rng.randint(1, 3),
+                                             prix_unitaire=20.0))
+        ids.append(vente.save())
+    changer_prix_achat(rng)
+    for vente_id in rng.sample(ids, 100):
+        vente = Vente.get_by_id(vente_id)
+        vente.date_vente = cle_date(datetime.now() - timedelta(days=rng.randint(0, 5)))
+        vente.save()
+    changer_prix_achat(rng)
+    for vente_id in rng.sample(ids, 100):
+        Vente.get_by_id(vente_id).delete()
+    changer_prix_achat(rng)
+
+    incremental = cumuls()
+    CumulVentes.reconstruire()
+    recalcule = cumuls()
+    ecarts = [(a, b) for a, b in zip(incremental, recalcule)
+              if a[:3] != b[:3] or a[6] != b[6] or any(abs(x - y) > 1e-6 for x, y in zip(a[3:6], b[3:6]))]
+    if len(incremental) != len(recalcule) or ecarts:
+        raise SystemExit(f"Cumuls incrémentaux différents du recalcul : {ecarts[:3]}")
+    print(f"Maintenance incrémentale : {len(incremental)} lignes identiques au recalcul")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark des rapports de ventes sur les cumuls quotidiens")
+    parser.add_argument('--ventes', type=int, default=NB_VENTES, help="Nombre de ventes sur un an")
+    args = parser.parse_args(argv)
+    rng = random.Random(42)
+
+    with base_temporaire():
+        remplir(args.ventes, rng)
+        duree_reconstruction = chronometrer(CumulVentes.reconstruire)
+        conn = get_connection()
+        nb_cumuls = conn.execute('SELECT COUNT(*) FROM ventes_jour_produit').fetchone()[0]
+        print(f"{args.ventes * LIGNES_PAR_VENTE} lignes de vente -> {nb_cumuls} lignes de cumul "
+              f"(recalcul complet : {duree_reconstruction * 1000:.0f} ms)")
+
+        mois = bornes_mois()
+        aujourd_hui = datetime.now()
+        annee = bornes_periode(aujourd_hui - timedelta(days=365), aujourd_hui)
+        cas = [
+            ('bénéfice du mois',
+             lambda: conn.execute(BENEFICE_LIGNES, mois).fetchone()[0] or 0.0,
+             lambda: CumulVentes.get_benefice_periode(*mois)),
+            ('synthèse 12 mois',
+             lambda: conn.execute(SYNTHESE_MOIS_LIGNES, annee).fetchall(),
+             lambda: [row[:3] for row in CumulVentes.get_synthese(aujourd_hui - timedelta(days=365),
+                                                                  aujourd_hui, 'mois')]),
+        ]
+        print(f"{'rapport':<18} | {'lignes de vente (ms)':>20} | {'cumuls (ms)':>11} | {'gain':>6}")
+        for nom, avant, apres in cas:
+            if avant() != apres() and not (isinstance(avant(), float) and abs(avant() - apres()) < 1e-6):
+                raise SystemExit(f"Résultats différents pour {nom}")
+            duree_avant = chronometrer(avant, REPETITIONS)
+            duree_apres = chronometrer(apres, REPETITIONS)
+            print(f"{nom:<18} | {duree_avant * 1000:>20.1f} | {duree_apres * 1000:>11.1f} | "
+                  f"{duree_avant / duree_apres:>5.0f}x")
+
+        verifier_maintenance(rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# benchmarks/bench_gestion_async.py - Façade asyncio des contrôleurs : débit des lectures et vérifications
+#
+# Mesure le débit de lectures concurrentes selon la taille du pool de lecture, puis vérifie
+# le comportement concurrent de la façade (écritures une à une et dans l'ordre, lectures
+# parallèles, boucle jamais bloquée, erreurs propagées, file vidée à l'arrêt, pas de
+# survente quand plusieurs ventes se disputent le même stock).
+#
+# Usage : python -m benchmarks.bench_gestion_async [--requetes 400]
+
+import argparse
+import asyncio
+import threading
+import time
+from benchmarks.commun import base_temporaire
+from controllers.gestion_async import GestionAsync
+from controllers.gestion_stock import GestionStock
+from models.produit import Produit
+from utils.db_manager import transaction
+
+NB_PRODUITS = 50000
+NB_REQUETES = 400
+TAILLES_POOL = [1, 2, 4, 8]
+
+
+def remplir():
+    Produit.inserer_lot([(f'Produit {i}', f'Description {i}', i % 7 + 1, 10, 15, 100, 5)
+                         for i in range(NB_PRODUITS)])
+    with transaction() as cursor:
+        cursor.execute("INSERT INTO clients (nom) VALUES ('Client comptoir')")
+
+
+async def mesurer_lectures(nb_lecteurs, nb_requetes):
+    """Requêtes/s pour nb_requetes lectures lancées en même temps"""
+    async with GestionAsync(nb_lecteurs) as gestion:
+        debut = time.perf_counter()
+        await asyncio.gather(*[
+            gestion.stock.obtenir_tableau_de_bord() if i % 2 else
+            gestion.produit.compter_produits(terme=f'Produit {i % 90 + 10}')
+            for i in range(nb_requetes)])
+        return nb_requetes / (time.perf_counter() - debut)
+
+
+def verifier(condition, message):
+    if not condition:
+        raise SystemExit(f"ÉCHEC : {message}")
+    print(f"[OK] {message}")
+
+
+async def verifications():
+    async with GestionAsync(nb_lecteurs=4) as gestion:
+        executeur = gestion.executeur
+
+        # Écritures : jamais deux à la fois, dans l'ordre d'arrivée
+        en_cours, maximum, ordre = [0], [0], []
+        verrou = threading.Lock()
+
+        def ecriture(numero):
+            with verrou:
+                en_cours[0] += 1
+                maximum[0] = max(maximum[0], en_cours[0])
+            time.sleep(0.002)
+            ordre.append(numero)
+            with verrou:
+                en_cours[0] -= 1
+            return numero
+
+        resultats = await asyncio.gather(*[executeur.ecrire(lambda n=n: ecriture(n)) for n in range(50)])
+        verifier(maximum[0] == 1 and ordre == list(range(50)) and resultats == list(range(50)),
+                 "écritures exécutées une à une, dans l'ordre d'arrivée")
+
+        # Lectures : en parallèle dans le pool
+        debut = time.perf_counter()
+        await asyncio.gather(*[executeur.lire(lambda: time.sleep(0.05)) for _ in range(8)])
+        duree = time.perf_counter() - debut
+        verifier(duree < 0.15, f"8 lectures de 50 ms sur 4 threads en {duree * 1000:.0f} ms")
+
+        # La boucle continue de tourner pendant une lecture lourde
+        battements = 0
+
+        async def battement():
+            nonlocal battements
+            while True:
+                await asyncio.sleep(0.001)
+                battements += 1
+
+        tache = asyncio.get_running_loop().create_task(battement())
+        await gestion.produit.obtenir_tous_produits()
+        tache.cancel()
+        verifier(battements > 5, f"boucle non bloquée pendant obtenir_tous_produits ({battements} battements)")
+
+        # Une erreur d'écriture est propagée à l'appelant sans arrêter l'écrivain
+        def erreur():
+            raise ValueError("écriture refusée")
+        try:
+            await executeur.ecrire(erreur)
+            propagee = False
+        except ValueError:
+            propagee = True
+        verifier(propagee and await executeur.ecrire(lambda: 42) == 42,
+                 "erreur d'écriture propagée, écrivain toujours actif")
+
+        # Ventes concurrentes sur un stock de 10 : exactement 10 ventes d'une unité
+        produit_id = (await gestion.produit.ajouter_produit('Stock limité', '', 1, 10, 15, 10, 2))[1]
+        ventes = await asyncio.gather(*[gestion.vente.creer_vente(1, [(produit_id, 1)]) for _ in range(25)])
+        produit = await gestion.produit.obtenir_produit_par_id(produit_id)
+        verifier(sum(succes for succes, _, _ in ventes) == 10 and produit.quantite == 0,
+                 "25 ventes concurrentes sur un stock de 10 : 10 acceptées, stock à 0")
+        succes, ecarts = await gestion.stock.rapprocher_stock()
+        verifier(succes, "stock rapproché du registre sans écart")
+
+        # Écritures encore en file à l'arrêt : terminées avant la fermeture
+        fin = [executeur.ecrire(lambda n=n: ecriture(n)) for n in range(20)]
+        taches = [asyncio.ensure_future(f) for f in fin]
+        await asyncio.sleep(0)
+    verifier(all(t.done() for t in taches) and len(ordre) == 70, "file d'écritures vidée avant l'arrêt")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark et vérifications de la façade asyncio")
+    parser.add_argument('--requetes', type=int, default=NB_REQUETES, help="Lectures concurrentes par mesure")
+    args = parser.parse_args(argv)
+
+    with base_temporaire():
+        remplir()
+
+        debut = time.perf_counter()
+        for i in range(args.requetes):
+            if i % 2:
+                GestionStock.obtenir_tableau_de_bord()
+            else:
+                Produit.compter(terme=f'Produit {i % 90 + 10}')
+        sequentiel = args.requetes / (time.perf_counter() - debut)
+
+        print(f"{'lecteurs':>8} | {'requêtes/s':>10} | {'gain':>5}")
+        print(f"{'synchr.':>8} | {sequentiel:>10.0f} | {1:>4.1f}x")
+        for nb_lecteurs in TAILLES_POOL:
+            debit = asyncio.run(mesurer_lectures(nb_lecteurs, args.requetes))
+            print(f"{nb_lecteurs:>8} | {debit:>10.0f} | {debit / sequentiel:>4.1f}x")
+
+        asyncio.run(verifications())
+
+
+if __name__ == "__main__":
+    main()
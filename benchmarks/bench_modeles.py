@@ -0,0 +1,103 @@
+# benchmarks/bench_modeles.py - Mémoire et temps de chargement des objets modèles
+#
+# Compare les classes à __slots__ (construites par _depuis_ligne) avec des classes
+# équivalentes à __dict__, comme avant.
+#
+# Usage : python -m benchmarks.bench_modeles [--lignes 200000]
+
+import argparse
+import gc
+import time
+import tracemalloc
+from benchmarks.commun import base_temporaire
+from models.client import Client
+from models.produit import Produit
+from models.vente import DetailVente
+from utils.db_manager import get_connection, transaction
+
+NB_LIGNES = 200000
+
+
+def classe_a_dict(classe):
+    """Même constructeur que classe, mais instances à __dict__ (ancien fonctionnement)"""
+    return type(classe.__name__ + 'Dict', (), {'__init__': classe.__init__})
+
+
+def mesurer(charger):
+    """
+    Returns:
+        (durée en secondes, mémoire retenue par le résultat en octets, nombre d'objets)
+    """
+    gc.collect()
+    debut = time.perf_counter()
+    objets = charger()
+    duree = time.perf_counter() - debut
+    del objets
+
+    # Mémoire mesurée à part : tracemalloc ralentit fortement les allocations
+    gc.collect()
+    tracemalloc.start()
+    objets = charger()
+    memoire = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return duree, memoire, len(objets)
+
+
+def remplir(nb_lignes):
+    with transaction() as cursor:
+        cursor.executemany(
+            'INSERT INTO produits (nom, description, categorie_id, prix_achat, prix_vente, quantite) '
+            'VALUES (?, ?, 1, 10, 15, 100)',
+            [(f'Produit {i}', f'Description {i}') for i in range(nb_lignes)])
+        cursor.executemany(
+            'INSERT INTO clients (nom, adresse, telephone, email, notes) VALUES (?, ?, ?, ?, ?)',
+            [(f'Client {i}', f'{i} rue du Port', f'06{i:08d}', f'client{i}@exemple.fr', '')
+             for i in range(nb_lignes // 4)])
+        cursor.execute("INSERT INTO ventes (client_id, date_vente, montant_total, notes) "
+                       "VALUES (1, '2024-01-01 10:00:00', 0, '')")
+        cursor.executemany(
+            'INSERT INTO details_vente (vente_id, produit_id, quantite, prix_unitaire) VALUES (1, ?, 1, 15)',
+            [(i % nb_lignes + 1,) for i in range(nb_lignes)])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark mémoire/temps des objets modèles")
+    parser.add_argument('--lignes', type=int, default=NB_LIGNES, help="Nombre de produits et de lignes de vente")
+    args = parser.parse_args(argv)
+
+    with base_temporaire():
+        remplir(args.lignes)
+        conn = get_connection()
+
+        ProduitDict = classe_a_dict(Produit)
+        ClientDict = classe_a_dict(Client)
+        DetailVenteDict = classe_a_dict(DetailVente)
+
+        cas = [
+            ('Produit.get_all',
+             lambda: [ProduitDict(id=r[0], nom=r[1], description=r[2], categorie_id=r[3], prix_achat=r[4],
+                                  prix_vente=r[5], quantite=r[6], seuil_reapprovisionnement=r[7])
+                      for r in conn.execute('SELECT * FROM produits').fetchall()],
+             Produit.get_all),
+            ('Client.get_all',
+             lambda: [ClientDict(id=r[0], nom=r[1], adresse=r[2], telephone=r[3], email=r[4], notes=r[5])
+                      for r in conn.execute('SELECT * FROM clients').fetchall()],
+             Client.get_all),
+            ('details_vente',
+             lambda: [DetailVenteDict(id=r[0], vente_id=r[1], produit_id=r[2], quantite=r[3], prix_unitaire=r[4],
+                                      cout_unitaire=r[5])
+                      for r in conn.execute('SELECT * FROM details_vente').fetchall()],
+             lambda: [DetailVente._depuis_ligne(r) for r in conn.execute('SELECT * FROM details_vente').fetchall()]),
+        ]
+
+        print(f"{'chargement':<16} | {'objets':>7} | {'__dict__ (ms / Mo)':>19} | {'__slots__ (ms / Mo)':>20} | {'mémoire':>8}")
+        for nom, avant, apres in cas:
+            duree_avant, memoire_avant, nb = mesurer(avant)
+            duree_apres, memoire_apres, _ = mesurer(apres)
+            print(f"{nom:<16} | {nb:>7} | {duree_avant * 1000:>8.0f} / {memoire_avant / 1e6:>7.1f} | "
+                  f"{duree_apres * 1000:>9.0f} / {memoire_apres / 1e6:>7.1f} | "
+                  f"{memoire_apres / memoire_avant - 1:>+8.0%}")
+
+
+if __name__ == "__main__":
+    main()
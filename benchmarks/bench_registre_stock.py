@@ -0,0 +1,111 @@
+# benchmarks/bench_registre_stock.py - Stock à une date : rejeu du registre ou instantané + mouvements suivants
+#
+# Vérifie aussi que les écritures des modèles (ventes, achats, annulations, ajustements,
+# fiches produit) laissent le registre en accord avec produits.quantite.
+#
+# Usage : python -m benchmarks.bench_registre_stock [--mouvements 500000]
+
+import argparse
+import random
+import sqlite3
+from datetime import datetime, timedelta
+from benchmarks.commun import base_temporaire, chronometrer
+from controllers.gestion_achat import GestionAchat
+from controllers.gestion_stock import GestionStock
+from controllers.gestion_vente import GestionVente
+from models.mouvement_stock import MouvementStock, VENTE
+from models.produit import Produit
+from utils.dates import cle_date
+from utils.db_manager import get_connection, transaction
+
+NB_PRODUITS = 500
+NB_MOUVEMENTS = 500000
+NB_PERIODES = 12  # Un instantané par mois simulé
+NB_REQUETES = 200
+
+# Sans instantané : somme de tous les mouvements du produit jusqu'à la date
+REJEU = 'SELECT SUM(delta) FROM mouvements_stock WHERE produit_id = ? AND date_mouvement <= ?'
+
+
+def remplir(nb_mouvements, rng):
+    """Un an de mouvements à dates croissantes, un instantané à la fin de chaque période"""
+    Produit.inserer_lot([(f'Produit {i}', '', 1, 10, 15, 0, 5) for i in range(NB_PRODUITS)])
+    debut = datetime.now() - timedelta(days=365)
+    pas = timedelta(days=365) / nb_mouvements
+    par_periode = nb_mouvements // NB_PERIODES
+    for periode in range(NB_PERIODES):
+        with transaction() as cursor:
+            cursor.executemany(
+                'INSERT INTO mouvements_stock (produit_id, type_mouvement, reference, delta, date_mouvement) '
+                'VALUES (?, ?, 0, ?, ?)',
+                [(rng.randint(1, NB_PRODUITS), VENTE, rng.randint(-3, 5), cle_date(debut + pas * i))
+                 for i in range(periode * par_periode, (periode + 1) * par_periode)])
+        MouvementStock.creer_instantanes()
+    with transaction() as cursor:
+        cursor.execute('''
+        UPDATE produits SET quantite = (SELECT SUM(delta) FROM mouvements_stock m WHERE m.produit_id = produits.id)
+        ''')
+    Produit.invalider_cache()
+    return debut
+
+
+def verifier_ecritures(rng):
+    """Passe par les contrôleurs puis rapproche le stock du registre"""
+    client_id = get_connection().execute("INSERT INTO clients (nom) VALUES ('Client')").lastrowid
+    fournisseur_id = get_connection().execute("INSERT INTO fournisseurs (nom) VALUES ('Fournisseur')").lastrowid
+    ventes = []
+    for _ in range(100):
+        panier = [(rng.randint(1, 50), rng.randint(1, 3)) for _ in range(3)]
+        GestionAchat.creer_achat(fournisseur_id, [(p, q + 5, 10.0) for p, q in panier])
+        ok, vente_id, message = GestionVente.creer_vente(client_id, panier)
+        if ok:
+            ventes.append(vente_id)
+        GestionStock.ajuster_stock(rng.randint(1, 50), rng.randint(1, 4), "Inventaire")
+    for vente_id in ventes[::3]:
+        GestionVente.annuler_vente(vente_id)
+    produit = Produit.get_by_id(7)
+    produit.quantite += 11
+    produit.save()
+    Produit.get_by_id(8).delete()
+
+    ok, ecarts = GestionStock.rapprocher_stock()
+    if not ok:
+        raise SystemExit(f"Écarts entre le stock et le registre : {ecarts[:5]}")
+    try:
+        get_connection().execute('DELETE FROM mouvements_stock WHERE id = 1')
+        raise SystemExit("Le registre accepte les suppressions")
+    except sqlite3.IntegrityError:
+        pass
+    print(f"Rapprochement après {len(ventes)} ventes, achats, annulations et ajustements : aucun écart")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark du registre des mouvements de stock")
+    parser.add_argument('--mouvements', type=int, default=NB_MOUVEMENTS, help="Nombre de mouvements sur un an")
+    args = parser.parse_args(argv)
+    rng = random.Random(42)
+
+    with base_temporaire():
+        debut = remplir(args.mouvements, rng)
+        conn = get_connection()
+        requetes = [(rng.randint(1, NB_PRODUITS), cle_date(debut + timedelta(days=rng.uniform(0, 365))))
+                    for _ in range(NB_REQUETES)]
+
+        for produit_id, date in requetes:
+            if (conn.execute(REJEU, (produit_id, date)).fetchone()[0] or 0) != MouvementStock.stock_au(produit_id, date):
+                raise SystemExit(f"Stock différent pour le produit {produit_id} au {date}")
+
+        duree_rejeu = chronometrer(lambda: [conn.execute(REJEU, r).fetchone() for r in requetes]) / NB_REQUETES
+        duree_instantane = chronometrer(lambda: [MouvementStock.stock_au(*r) for r in requetes]) / NB_REQUETES
+        print(f"{args.mouvements} mouvements, {NB_PRODUITS} produits, {NB_PERIODES} instantanés par produit")
+        print(f"{'stock au (rejeu)':<30} | {duree_rejeu * 1e6:>8.0f} µs")
+        print(f"{'stock au (instantané + suite)':<30} | {duree_instantane * 1e6:>8.0f} µs | "
+              f"{duree_rejeu / duree_instantane:>4.0f}x")
+        duree_rapprochement = chronometrer(MouvementStock.rapprocher)
+        print(f"{'rapprochement complet':<30} | {duree_rapprochement * 1e6:>8.0f} µs")
+
+        verifier_ecritures(rng)
+
+
+if __name__ == "__main__":
+    main()
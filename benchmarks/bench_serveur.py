@@ -0,0 +1,113 @@
+# benchmarks/bench_serveur.py - Test de charge du serveur HTTP/JSON sur un seul poste
+#
+# Plusieurs caisses simulées (un thread et une connexion HTTP chacune) enchaînent des
+# lectures (recherche, fiche produit, tableau de bord) et des ventes. Le stock est
+# ensuite rapproché du registre des mouvements.
+#
+# Usage : python -m benchmarks.bench_serveur [--caisses 8] [--operations 300]
+
+import argparse
+import random
+import threading
+import time
+from benchmarks.commun import base_temporaire
+from serveur.application import ServeurMagasin
+from serveur.client import ClientMagasin
+from utils.db_manager import transaction
+
+NB_PRODUITS = 5000
+NB_CAISSES = 8
+NB_OPERATIONS = 300  # Par caisse
+PART_VENTES = 0.3
+
+
+def remplir():
+    with transaction() as cursor:
+        cursor.executemany(
+            'INSERT INTO produits (nom, categorie_id, prix_achat, prix_vente, quantite) VALUES (?, ?, 10, 15, 100000)',
+            [(f'Produit {i}', i % 7 + 1) for i in range(NB_PRODUITS)])
+        cursor.execute("INSERT INTO clients (nom) VALUES ('Client comptoir')")
+        cursor.execute("INSERT INTO mouvements_stock (produit_id, type_mouvement, reference, delta, date_mouvement) "
+                       "SELECT id, 'ouverture', id, quantite, datetime('now') FROM produits")
+
+
+def caisse(port, nb_operations, graine, latences, erreurs):
+    rng = random.Random(graine)
+    client = ClientMagasin('127.0.0.1', port)
+    try:
+        for _ in range(nb_operations):
+            tirage = rng.random()
+            debut = time.perf_counter()
+            try:
+                if tirage < PART_VENTES:
+                    panier = [[rng.randint(1, NB_PRODUITS), rng.randint(1, 3)] for _ in range(rng.randint(1, 5))]
+                    succes, _, message = client.appeler('GestionVente', 'creer_vente',
+                                                        client_id=1, produits_quantites=panier)
+                    if not succes:
+                        erreurs.append(message)
+                    type_operation = 'vente'
+                elif tirage < 0.95:
+                    if rng.random() < 0.5:
+                        client.appeler('GestionProduit', 'lister_produits_page',
+                                       terme=f'Produit {rng.randint(1, 99)}', taille=50)
+                    else:
+                        client.appeler('GestionProduit', 'obtenir_produit_par_id', id=rng.randint(1, NB_PRODUITS))
+                    type_operation = 'lecture'
+                else:
+                    client.appeler('GestionStock', 'obtenir_tableau_de_bord')
+                    type_operation = 'tableau de bord'
+            except Exception as e:
+                erreurs.append(str(e))
+                continue
+            latences.setdefault(type_operation, []).append(time.perf_counter() - debut)
+    finally:
+        client.fermer()
+
+
+def centile(valeurs, p):
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(p * len(valeurs)))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge du serveur HTTP/JSON")
+    parser.add_argument('--caisses', type=int, default=NB_CAISSES)
+    parser.add_argument('--operations', type=int, default=NB_OPERATIONS, help="Opérations par caisse")
+    args = parser.parse_args(argv)
+
+    with base_temporaire():
+        remplir()
+        serveur = ServeurMagasin(port=0)
+        port = serveur.demarrer_en_thread()
+        try:
+            latences_par_caisse = [{} for _ in range(args.caisses)]
+            erreurs = []
+            threads = [threading.Thread(target=caisse, args=(port, args.operations, i, latences_par_caisse[i], erreurs))
+                       for i in range(args.caisses)]
+            debut = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            duree = time.perf_counter() - debut
+
+            succes, ecarts = ClientMagasin('127.0.0.1', port).appeler('GestionStock', 'rapprocher_stock')
+        finally:
+            serveur.arreter_thread()
+
+        latences = {}
+        for par_caisse in latences_par_caisse:
+            for type_operation, valeurs in par_caisse.items():
+                latences.setdefault(type_operation, []).extend(valeurs)
+        total = sum(len(v) for v in latences.values())
+        print(f"{args.caisses} caisses, {total} requêtes en {duree:.2f} s : {total / duree:.0f} requêtes/s")
+        print(f"{'opération':<16} | {'nombre':>6} | {'p50 (ms)':>8} | {'p95 (ms)':>8} | {'max (ms)':>8}")
+        for type_operation, valeurs in sorted(latences.items()):
+            print(f"{type_operation:<16} | {len(valeurs):>6} | {centile(valeurs, 0.5) * 1000:>8.1f} | "
+                  f"{centile(valeurs, 0.95) * 1000:>8.1f} | {max(valeurs) * 1000:>8.1f}")
+        print(f"Erreurs : {len(erreurs)}{' (' + erreurs[0] + ')' if erreurs else ''}")
+        print(f"Rapprochement du stock : {'aucun écart' if succes else f'{len(ecarts)} écart(s)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_tableau_de_bord.py - Statistiques de l'accueil : objets chargés ou requête agrégée
+#
+# Compare les cinq appels faits auparavant par l'écran d'accueil (qui chargeaient tout
+# le catalogue en objets Produit) avec GestionStock.obtenir_tableau_de_bord.
+#
+# Usage : python -m benchmarks.bench_tableau_de_bord [--produits 50000]
+
+import argparse
+import random
+from datetime import datetime, timedelta
+from benchmarks.commun import base_temporaire, chronometrer
+from controllers.gestion_produit import GestionProduit
+from controllers.gestion_stock import GestionStock, TableauDeBord
+from controllers.gestion_vente import GestionVente
+from models.cumul_vente import CumulVentes
+from utils.dates import cle_date
+from utils.db_manager import transaction
+
+NB_PRODUITS = 50000
+NB_VENTES = 2000
+REPETITIONS = 5
+
+
+def remplir(nb_produits, nb_ventes):
+    rng = random.Random(42)
+    maintenant = datetime.now()
+    with transaction() as cursor:
+        cursor.executemany(
+            'INSERT INTO produits (nom, categorie_id, prix_achat, prix_vente, quantite, seuil_reapprovisionnement) '
+            'VALUES (?, 1, ?, ?, ?, 5)',
+            [(f'Produit {i}', 10 + i % 7, 15 + i % 11, rng.randint(0, 100)) for i in range(nb_produits)])
+        for i in range(nb_ventes):
+            # Ventes réparties sur les 40 derniers jours : une partie tombe dans le jour et le mois
+            date = cle_date(maintenant - timedelta(minutes=rng.randint(0, 40 * 24 * 60)))
+            cursor.execute("INSERT INTO ventes (client_id, date_vente, montant_total, notes) VALUES (1, ?, ?, '')",
+                           (date, 0))
+            vente_id = cursor.lastrowid
+            lignes = [(vente_id, rng.randint(1, nb_produits), rng.randint(1, 5), 20.0) for _ in range(3)]
+            cursor.executemany(
+                'INSERT INTO details_vente (vente_id, produit_id, quantite, prix_unitaire) VALUES (?, ?, ?, ?)', lignes)
+            cursor.execute('UPDATE ventes SET montant_total = ? WHERE id = ?',
+                           (sum(q * p for _, _, q, p in lignes), vente_id))
+
+
+def par_objets():
+    """Ce que faisait l'écran d'accueil : cinq appels, dont deux chargent tout le catalogue"""
+    valeur_achat, valeur_vente = GestionStock.get_valeur_totale_stock()
+    return TableauDeBord(
+        total_produits=GestionProduit.get_total_produits(),
+        valeur_achat=valeur_achat,
+        valeur_vente=valeur_vente,
+        produits_alerte=len(GestionStock.get_produits_en_alerte()),
+        ventes_jour=GestionVente.get_ventes_jour(),
+        benefice_mensuel=GestionVente.get_benefice_mensuel(),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark des statistiques de l'écran d'accueil")
+    parser.add_argument('--produits', type=int, default=NB_PRODUITS, help="Nombre de produits")
+    parser.add_argument('--ventes', type=int, default=NB_VENTES, help="Nombre de ventes")
+    args = parser.parse_args(argv)
+
+    with base_temporaire():
+        remplir(args.produits, args.ventes)
+        CumulVentes.reconstruire()
+
+        avant, apres = par_objets(), GestionStock.obtenir_tableau_de_bord()
+        for champ in TableauDeBord._fields:
+            if abs(getattr(avant, champ) - getattr(apres, champ)) > 1e-6:
+                raise SystemExit(f"Résultats différents pour {champ} : {getattr(avant, champ)} != {getattr(apres, champ)}")
+
+        duree_avant = chronometrer(par_objets, REPETITIONS)
+        duree_apres = chronometrer(GestionStock.obtenir_tableau_de_bord, REPETITIONS)
+        print(f"{args.produits} produits, {args.ventes} ventes : {apres}")
+        print(f"{'cinq appels (objets)':<22} | {duree_avant * 1000:>8.1f} ms")
+        print(f"{'requête agrégée':<22} | {duree_apres * 1000:>8.1f} ms | {duree_avant / duree_apres:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# benchmarks/bench_validation_groupee.py - Ventes/s : une transaction par vente ou validation groupée
+#
+# Des caisses simulées enregistrent des ventes en continu :
+#   - accès direct : chaque caisse appelle GestionVente.creer_vente (un COMMIT par vente,
+#     les caisses se disputent le verrou d'écriture) ;
+#   - écrivain unique sans groupe (taille_groupe=1) ;
+#   - écrivain unique avec validation groupée.
+# Mesuré avec synchronous=NORMAL (profil par défaut) et FULL (fsync à chaque COMMIT).
+# Une partie des ventes échoue volontairement (stock insuffisant, produit inconnu) pour
+# vérifier que chaque vente garde son propre résultat au sein d'un groupe.
+#
+# Usage : python -m benchmarks.bench_validation_groupee [--ventes 2000] [--caisses 16]
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from benchmarks.commun import base_temporaire
+from controllers.gestion_async import GestionAsync, TAILLE_GROUPE
+from controllers.gestion_client import GestionClient
+from controllers.gestion_stock import GestionStock
+from controllers.gestion_vente import GestionVente
+from models.produit import Produit
+from utils.db_manager import configurer, get_connection, get_db_path, transaction
+
+NB_PRODUITS = 2000
+NB_VENTES = 2000
+NB_CAISSES = 16
+PRODUIT_EPUISE = 1  # Stock nul : toute vente de ce produit échoue
+PRODUIT_INCONNU = 10 ** 9
+
+
+def remplir():
+    Produit.inserer_lot([(f'Produit {i}', '', 1, 10, 15, 0 if i == 0 else 10 ** 6, 5) for i in range(NB_PRODUITS)])
+    with transaction() as cursor:
+        cursor.execute("INSERT INTO clients (nom) VALUES ('Client comptoir')")
+
+
+def paniers(nb_ventes):
+    """Paniers de 1 à 5 lignes ; une vente sur 10 doit échouer"""
+    rng = random.Random(42)
+    resultat = []
+    for i in range(nb_ventes):
+        panier = [(rng.randint(2, NB_PRODUITS), rng.randint(1, 3)) for _ in range(rng.randint(1, 5))]
+        if i % 20 == 5:
+            panier.append((PRODUIT_EPUISE, 1))
+        elif i % 20 == 15:
+            panier.append((PRODUIT_INCONNU, 1))
+        resultat.append(panier)
+    return resultat
+
+
+def direct(liste, nb_caisses):
+    """Chaque caisse (thread, connexion propre) enregistre ses ventes elle-même"""
+    resultats = [None] * len(liste)
+
+    def caisse(indices):
+        for i in indices:
+            resultats[i] = GestionVente.creer_vente(1, liste[i])
+
+    threads = [threading.Thread(target=caisse, args=(range(c, len(liste), nb_caisses),)) for c in range(nb_caisses)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return resultats, None
+
+
+def par_ecrivain(liste, nb_caisses, taille_groupe):
+    """Chaque caisse (coroutine) attend sa vente avant d'envoyer la suivante"""
+    resultats = [None] * len(liste)
+
+    async def executer():
+        async with GestionAsync(taille_groupe=taille_groupe) as gestion:
+            async def caisse(indices):
+                for i in indices:
+                    resultats[i] = await gestion.vente.creer_vente(1, liste[i])
+            await asyncio.gather(*[caisse(range(c, len(liste), nb_caisses)) for c in range(nb_caisses)])
+            return gestion.executeur.nb_ecritures / gestion.executeur.nb_groupes
+
+    return resultats, asyncio.run(executer())
+
+
+def verifier(liste, resultats):
+    """Chaque vente a son propre résultat ; le stock, le registre et les ventes concordent"""
+    attendus_en_echec = {i for i, panier in enumerate(liste) if panier[-1][0] in (PRODUIT_EPUISE, PRODUIT_INCONNU)}
+    en_echec = {i for i, (succes, _, _) in enumerate(resultats) if not succes}
+    ids = [vente_id for succes, vente_id, _ in resultats if succes]
+    conn = get_connection()
+    nb_ventes = conn.execute('SELECT COUNT(*) FROM ventes').fetchone()[0]
+    succes, ecarts = GestionStock.rapprocher_stock()
+    if en_echec != attendus_en_echec or len(set(ids)) != len(ids) or nb_ventes != len(ids) or not succes:
+        raise SystemExit(f"Résultats incohérents : {len(en_echec ^ attendus_en_echec)} ventes au mauvais statut, "
+                         f"{len(ids)} ID pour {nb_ventes} ventes, {len(ecarts)} écarts de stock")
+
+
+def verifier_isolation():
+    """Une écriture qui lève une exception au milieu d'un groupe n'annule que ses propres modifications"""
+    def client_puis_erreur():
+        GestionClient.ajouter_client('Annulé')
+        raise ValueError("écriture refusée")
+
+    async def executer():
+        async with GestionAsync(fenetre_groupe=0.05) as gestion:
+            executeur = gestion.executeur
+            return await asyncio.gather(
+                executeur.ecrire(lambda: GestionClient.ajouter_client('Avant')),
+                executeur.ecrire(client_puis_erreur),
+                executeur.ecrire(lambda: GestionClient.ajouter_client('Après')),
+                return_exceptions=True), executeur.nb_groupes
+
+    with base_temporaire():
+        (avant, erreur, apres), nb_groupes = asyncio.run(executer())
+        noms = [row[0] for row in get_connection().execute('SELECT nom FROM clients ORDER BY id')]
+    if nb_groupes != 1 or not isinstance(erreur, ValueError) or not (avant[0] and apres[0]) or noms != ['Avant', 'Après']:
+        raise SystemExit(f"Isolation des écritures d'un groupe incorrecte : {noms}")
+    print("Écriture en échec au milieu d'un groupe : seules ses modifications sont annulées")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de la validation groupée des ventes")
+    parser.add_argument('--ventes', type=int, default=NB_VENTES)
+    parser.add_argument('--caisses', type=int, default=NB_CAISSES)
+    args = parser.parse_args(argv)
+    liste = paniers(args.ventes)
+
+    modes = [
+        ('accès direct', lambda: direct(liste, args.caisses)),
+        ('écrivain, groupe de 1', lambda: par_ecrivain(liste, args.caisses, 1)),
+        (f'écrivain, groupe de {TAILLE_GROUPE}', lambda: par_ecrivain(liste, args.caisses, TAILLE_GROUPE)),
+    ]
+    print(f"{args.ventes} ventes, {args.caisses} caisses, 10 % en échec volontaire")
+    print(f"{'synchronous':<11} | {'mode':<22} | {'ventes/s':>8} | {'ventes/COMMIT':>13}")
+    for synchronous in ('NORMAL', 'FULL'):
+        for nom, executer in modes:
+            with base_temporaire():
+                configurer(get_db_path(), {'synchronous': synchronous})
+                remplir()
+                debut = time.perf_counter()
+                resultats, par_commit = executer()
+                duree = time.perf_counter() - debut
+                verifier(liste, resultats)
+            print(f"{synchronous:<11} | {nom:<22} | {args.ventes / duree:>8.0f} | "
+                  f"{par_commit if par_commit else 1:>13.1f}")
+    verifier_isolation()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# benchmarks/commun.py - Outils partagés par les scripts de benchmark
+
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from utils.db_manager import configurer, fermer_connexions, get_db_path
+from utils.db_setup import setup_database
+
+
+@contextmanager
+def base_temporaire():
+    """
+    Crée une base de données vide dans un répertoire temporaire et y redirige les modèles
+
+    Yields:
+        Chemin du fichier de base de données
+    """
+    chemin_precedent = get_db_path()
+    repertoire = tempfile.mkdtemp(prefix='bench_magasin_')
+    db_path = os.path.join(repertoire, 'bench.db')
+    try:
+        setup_database(db_path)
+        yield db_path
+    finally:
+        fermer_connexions()
+        configurer(chemin_precedent)
+        shutil.rmtree(repertoire, ignore_errors=True)
+
+
+def chronometrer(fonction, repetitions=1):
+    """
+    Exécute une fonction plusieurs fois
+
+    Returns:
+        Durée moyenne d'un appel en secondes
+    """
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        fonction()
+    return (time.perf_counter() - debut) / repetitions
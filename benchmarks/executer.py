@@ -0,0 +1,329 @@
+# benchmarks/executer.py - Chronométrage des points d'entrée des contrôleurs sur une base générée
+#
+# Génère une base reproductible (voir benchmarks.generer_donnees), chronomètre chaque
+# méthode des contrôleurs et écrit les résultats en JSON. Deux fichiers de résultats
+# (par exemple avant et après un commit) se comparent avec --comparer ou --reference.
+#
+# Usage : python -m benchmarks.executer [--lignes 100000] [--sortie resultats.json]
+#         [--reference ancien.json] [--filtre GestionVente] [--db chemin.db]
+#         python -m benchmarks.executer --comparer ancien.json nouveau.json
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from benchmarks.commun import base_temporaire
+from benchmarks.generer_donnees import GenerateurDonnees, compter_lignes, NB_ANNEES, NB_LIGNES, GRAINE
+from controllers.gestion_achat import GestionAchat
+from controllers.gestion_client import GestionClient
+from controllers.gestion_fournisseur import GestionFournisseur
+from controllers.gestion_produit import GestionProduit
+from controllers.gestion_stock import GestionStock
+from controllers.gestion_vente import GestionVente
+from utils.dates import cle_date
+from utils.db_manager import get_connection
+
+FORMAT_RESULTATS = 1
+DUREE_MIN = 0.2  # Secondes de mesure par cas (au moins APPELS_MIN appels)
+APPELS_MIN = 5
+APPELS_MAX = 1000
+TOLERANCE = 0.25  # Ralentissement relatif au-delà duquel un cas est signalé comme régression
+
+# preparer (facultatif) est appelé avant chaque appel, hors chronométrage, et donne les arguments
+Cas = namedtuple('Cas', ['nom', 'fonction', 'preparer'], defaults=[None])
+
+
+def _commit():
+    """Commit courant (suffixé de '+modifié' si l'arbre de travail a des changements), ou None"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        modifie = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                                 text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('+modifié' if modifie else '')
+
+
+def _verifier(nom, resultat):
+    # Les contrôleurs signalent leurs échecs par (False, ..., message) ou par une chaîne "Erreur: ..."
+    if isinstance(resultat, tuple) and resultat and resultat[0] is False:
+        raise RuntimeError(f"{nom} a échoué : {resultat[-1]}")
+    if isinstance(resultat, str) and resultat.startswith('Erreur'):
+        raise RuntimeError(f"{nom} a échoué : {resultat}")
+
+
+def definir_cas(generateur):
+    """
+    Cas mesurés : chaque point d'entrée des contrôleurs, avec des arguments tirés de la base
+
+    Args:
+        generateur: GenerateurDonnees de la base (période de l'historique, graine du tirage des arguments)
+
+    Returns:
+        Liste de Cas, lectures puis écritures
+    """
+    rng = random.Random(generateur.graine)
+    conn = get_connection()
+
+    def ids(table, nombre=50):
+        # Identifiants existants tirés au hasard (un appel sur l'autre ne relit pas la même ligne)
+        tous = [row[0] for row in conn.execute(f'SELECT id FROM {table}')]
+        return [rng.choice(tous) for _ in range(nombre)]
+
+    def tour(valeurs):
+        position = [0]
+
+        def suivant():
+            position[0] = (position[0] + 1) % len(valeurs)
+            return valeurs[position[0]]
+        return suivant
+
+    produit, client, fournisseur = tour(ids('produits')), tour(ids('clients')), tour(ids('fournisseurs'))
+    vente, achat = tour(ids('ventes')), tour(ids('achats'))
+    categorie_id = conn.execute('SELECT categorie_id FROM produits GROUP BY categorie_id '
+                                'ORDER BY COUNT(*) DESC LIMIT 1').fetchone()[0]
+    milieu = conn.execute('SELECT date_vente, id FROM ventes ORDER BY date_vente, id LIMIT 1 OFFSET '
+                          '(SELECT COUNT(*) / 2 FROM ventes)').fetchone()
+    curseur_milieu = tuple(milieu) if milieu else None
+    dernier_jour = (generateur.fin - timedelta(days=1)).date()
+    debut_mois = (dernier_jour.replace(day=1) - timedelta(days=1)).replace(day=1)
+    fin_mois = dernier_jour.replace(day=1) - timedelta(days=1)
+    debut_annee = dernier_jour - timedelta(days=364)
+    date_milieu = cle_date(generateur.debut + (generateur.fin - generateur.debut) / 2)
+
+    # Produits utilisés par les écritures : stock relevé une fois pour que les ventes ne manquent jamais
+    panier = [produit() for _ in range(10)]
+    for produit_id in set(panier):
+        GestionStock.ajuster_stock(produit_id, 1000000, "Préparation du benchmark")
+    lignes_vente = tour([[(panier[i], 1), (panier[(i + 3) % 10], 2)] for i in range(10)])
+
+    def vente_a_annuler():
+        return (GestionVente.creer_vente(client(), lignes_vente())[1],)
+
+    def achat_a_annuler():
+        return (GestionAchat.creer_achat(fournisseur(), [(produit_id, 5, 1.0) for produit_id in panier[:3]])[1],)
+
+    return [
+        # Produits et catégories
+        Cas('GestionProduit.rechercher_produits', lambda: GestionProduit.rechercher_produits('ciment')),
+        Cas('GestionProduit.lister_produits_page', lambda: GestionProduit.lister_produits_page()),
+        Cas('GestionProduit.lister_produits_page (catégorie)',
+            lambda: GestionProduit.lister_produits_page(categorie_id=categorie_id)),
+        Cas('GestionProduit.lister_produits_page (recherche)',
+            lambda: GestionProduit.lister_produits_page(terme='brique')),
+        Cas('GestionProduit.compter_produits (recherche)', lambda: GestionProduit.compter_produits(terme='brique')),
+        Cas('GestionProduit.lister_produits', lambda: GestionProduit.lister_produits()),
+        Cas('GestionProduit.obtenir_tous_produits', GestionProduit.obtenir_tous_produits),
+        Cas('GestionProduit.obtenir_produit_par_id', lambda: GestionProduit.obtenir_produit_par_id(produit())),
+        Cas('GestionProduit.obtenir_produits_par_categorie',
+            lambda: GestionProduit.obtenir_produits_par_categorie(categorie_id)),
+        Cas('GestionProduit.obtenir_produits_faible_stock', GestionProduit.obtenir_produits_faible_stock),
+        Cas('GestionProduit.obtenir_toutes_categories', GestionProduit.obtenir_toutes_categories),
+        Cas('GestionProduit.get_total_produits', GestionProduit.get_total_produits),
+        # Stock
+        Cas('GestionStock.obtenir_tableau_de_bord', GestionStock.obtenir_tableau_de_bord),
+        Cas('GestionStock.get_valeur_totale_stock', GestionStock.get_valeur_totale_stock),
+        Cas('GestionStock.obtenir_etat_stock', GestionStock.obtenir_etat_stock),
+        Cas('GestionStock.get_produits_en_alerte', GestionStock.get_produits_en_alerte),
+        Cas('GestionStock.verifier_disponibilite', lambda: GestionStock.verifier_disponibilite(produit(), 1)),
+        Cas('GestionStock.obtenir_historique_stock', lambda: GestionStock.obtenir_historique_stock(produit())),
+        Cas('GestionStock.obtenir_stock_au', lambda: GestionStock.obtenir_stock_au(produit(), date_milieu)),
+        Cas('GestionStock.rapprocher_stock', GestionStock.rapprocher_stock),
+        # Ventes
+        Cas('GestionVente.obtenir_ventes_recentes', GestionVente.obtenir_ventes_recentes),
+        Cas('GestionVente.obtenir_ventes_periode (mois)',
+            lambda: GestionVente.obtenir_ventes_periode(debut_mois, fin_mois)),
+        Cas('GestionVente.obtenir_ventes_page', GestionVente.obtenir_ventes_page),
+        Cas('GestionVente.obtenir_ventes_page (milieu)', lambda: GestionVente.obtenir_ventes_page(curseur_milieu)),
+        Cas('GestionVente.compter_ventes (année)', lambda: GestionVente.compter_ventes(debut_annee, dernier_jour)),
+        Cas('GestionVente.obtenir_vente_details', lambda: GestionVente.obtenir_vente_details(vente())),
+        Cas('GestionVente.get_ventes_jour', GestionVente.get_ventes_jour),
+        Cas('GestionVente.get_benefice_mensuel', GestionVente.get_benefice_mensuel),
+        Cas('GestionVente.obtenir_synthese_ventes (année par mois)',
+            lambda: GestionVente.obtenir_synthese_ventes(debut_annee, dernier_jour, 'mois')),
+        Cas('GestionVente.obtenir_synthese_ventes (année par produit)',
+            lambda: GestionVente.obtenir_synthese_ventes(debut_annee, dernier_jour, 'produit')),
+        # Achats
+        Cas('GestionAchat.obtenir_achats_recents', GestionAchat.obtenir_achats_recents),
+        Cas('GestionAchat.obtenir_achats_periode (mois)',
+            lambda: GestionAchat.obtenir_achats_periode(debut_mois, fin_mois)),
+        Cas('GestionAchat.obtenir_achats_page', GestionAchat.obtenir_achats_page),
+        Cas('GestionAchat.obtenir_achat_details', lambda: GestionAchat.obtenir_achat_details(achat())),
+        # Clients et fournisseurs
+        Cas('GestionClient.rechercher_clients', lambda: GestionClient.rechercher_clients('alaoui')),
+        Cas('GestionClient.obtenir_tous_clients', GestionClient.obtenir_tous_clients),
+        Cas('GestionClient.obtenir_client_par_id', lambda: GestionClient.obtenir_client_par_id(client())),
+        Cas('GestionClient.obtenir_historique_achats', lambda: GestionClient.obtenir_historique_achats(client())),
+        Cas('GestionFournisseur.obtenir_tous_fournisseurs', GestionFournisseur.obtenir_tous_fournisseurs),
+        # Écritures
+        Cas('GestionVente.creer_vente', lambda: GestionVente.creer_vente(client(), lignes_vente())),
+        Cas('GestionVente.annuler_vente', GestionVente.annuler_vente, vente_a_annuler),
+        Cas('GestionAchat.creer_achat',
+            lambda: GestionAchat.creer_achat(fournisseur(), [(produit_id, 5, 1.0) for produit_id in panier[:3]])),
+        Cas('GestionAchat.annuler_achat', GestionAchat.annuler_achat, achat_a_annuler),
+        Cas('GestionStock.ajuster_stock', lambda: GestionStock.ajuster_stock(panier[0], 1, "Benchmark")),
+        Cas('GestionProduit.mettre_a_jour_stock', lambda: GestionProduit.mettre_a_jour_stock(panier[1], 1)),
+    ]
+
+
+def mesurer(cas, duree_min=DUREE_MIN):
+    """
+    Chronomètre un cas : un premier appel (vérifié, non compté), puis des appels répétés
+    pendant au moins duree_min secondes
+
+    Returns:
+        Dictionnaire mediane_ms, min_ms, moyenne_ms, appels
+
+    Raises:
+        RuntimeError: si le contrôleur signale un échec
+    """
+    arguments = cas.preparer() if cas.preparer else ()
+    _verifier(cas.nom, cas.fonction(*arguments))
+
+    durees = []
+    debut_mesure = time.perf_counter()
+    while len(durees) < APPELS_MAX and (len(durees) < APPELS_MIN or time.perf_counter() - debut_mesure < duree_min):
+        arguments = cas.preparer() if cas.preparer else ()
+        debut = time.perf_counter()
+        cas.fonction(*arguments)
+        durees.append(time.perf_counter() - debut)
+    return {
+        'mediane_ms': statistics.median(durees) * 1000,
+        'min_ms': min(durees) * 1000,
+        'moyenne_ms': statistics.fmean(durees) * 1000,
+        'appels': len(durees),
+    }
+
+
+def executer(generateur, filtre=None, duree_min=DUREE_MIN, afficher=print):
+    """
+    Remplit la base courante si elle est vide, puis chronomètre les cas
+
+    Args:
+        generateur: GenerateurDonnees (ses paramètres sont enregistrés avec les résultats)
+        filtre: Sous-chaîne du nom des cas à mesurer (tous par défaut)
+        duree_min: Secondes de mesure par cas
+
+    Returns:
+        Résultats au format JSON (dictionnaire)
+    """
+    duree_generation = None
+    if not get_connection().execute('SELECT 1 FROM produits LIMIT 1').fetchone():
+        debut = time.perf_counter()
+        generateur.generer()
+        duree_generation = time.perf_counter() - debut
+        afficher(f"Base générée en {duree_generation:.1f} s")
+    volumes = compter_lignes()
+
+    resultats = {}
+    for cas in definir_cas(generateur):
+        if filtre and filtre.lower() not in cas.nom.lower():
+            continue
+        resultats[cas.nom] = mesure = mesurer(cas, duree_min)
+        afficher(f"{cas.nom:<58} {mesure['mediane_ms']:>10.3f} ms  ({mesure['appels']} appels)")
+
+    return {
+        'format': FORMAT_RESULTATS,
+        'commit': _commit(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'plateforme': platform.platform(),
+        'parametres': generateur.parametres(),
+        'volumes': volumes,
+        'duree_generation_s': duree_generation,
+        'resultats': resultats,
+    }
+
+
+def comparer(ancien, nouveau, tolerance=TOLERANCE):
+    """
+    Compare deux résultats cas par cas (médianes)
+
+    Returns:
+        Liste de tuples (nom, médiane ancienne ms, médiane nouvelle ms, rapport nouveau/ancien,
+        régression) pour les cas présents dans les deux résultats
+    """
+    lignes = []
+    for nom, mesure in nouveau['resultats'].items():
+        if nom not in ancien['resultats']:
+            continue
+        avant, apres = ancien['resultats'][nom]['mediane_ms'], mesure['mediane_ms']
+        rapport = apres / avant if avant else float('inf')
+        lignes.append((nom, avant, apres, rapport, rapport > 1 + tolerance))
+    return lignes
+
+
+def afficher_comparaison(ancien, nouveau, tolerance=TOLERANCE):
+    """
+    Affiche la comparaison de deux résultats
+
+    Returns:
+        Nombre de régressions
+    """
+    if ancien['parametres'] != nouveau['parametres'] or ancien['volumes'] != nouveau['volumes']:
+        print("Attention : les deux résultats n'ont pas été mesurés sur la même base "
+              f"({ancien['parametres']} / {nouveau['parametres']})")
+    print(f"{'':<58} {ancien['commit'] or 'ancien':>12} {nouveau['commit'] or 'nouveau':>12}")
+    regressions = 0
+    for nom, avant, apres, rapport, regression in comparer(ancien, nouveau, tolerance):
+        marque = 'RÉGRESSION' if regression else ''
+        print(f"{nom:<58} {avant:>9.3f} ms {apres:>9.3f} ms  x{rapport:>6.2f} {marque}")
+        regressions += regression
+    return regressions
+
+
+def _lire(chemin):
+    with open(chemin, encoding='utf-8') as fichier:
+        return json.load(fichier)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chronométrage des contrôleurs sur une base générée")
+    parser.add_argument('--lignes', type=int, default=NB_LIGNES, help="Nombre approximatif de lignes de vente")
+    parser.add_argument('--annees', type=int, default=NB_ANNEES, help="Durée de l'historique en années")
+    parser.add_argument('--graine', type=int, default=GRAINE, help="Graine des données et des arguments")
+    parser.add_argument('--fin', help="Dernier jour de l'historique, YYYY-MM-DD (aujourd'hui par défaut)")
+    parser.add_argument('--db', help="Base à utiliser (générée si vide, sinon réutilisée ; elle est modifiée "
+                                     "par les cas d'écriture). Par défaut, une base temporaire.")
+    parser.add_argument('--filtre', help="Ne mesurer que les cas dont le nom contient ce texte")
+    parser.add_argument('--duree', type=float, default=DUREE_MIN, help="Secondes de mesure par cas")
+    parser.add_argument('--sortie', help="Fichier JSON où écrire les résultats")
+    parser.add_argument('--reference', help="Résultats JSON précédents à comparer aux nouveaux")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help="Ralentissement relatif toléré avant de signaler une régression")
+    parser.add_argument('--comparer', nargs=2, metavar=('ANCIEN', 'NOUVEAU'),
+                        help="Compare deux fichiers de résultats sans rien mesurer")
+    args = parser.parse_args(argv)
+
+    if args.comparer:
+        sys.exit(1 if afficher_comparaison(*map(_lire, args.comparer), args.tolerance) else 0)
+
+    generateur = GenerateurDonnees(args.lignes, args.annees, args.graine, args.fin)
+    if args.db:
+        from utils.db_setup import setup_database
+        setup_database(args.db)
+        resultats = executer(generateur, args.filtre, args.duree)
+    else:
+        with base_temporaire():
+            resultats = executer(generateur, args.filtre, args.duree)
+
+    if args.sortie:
+        with open(args.sortie, 'w', encoding='utf-8') as fichier:
+            json.dump(resultats, fichier, ensure_ascii=False, indent=2)
+        print(f"Résultats écrits dans {os.path.abspath(args.sortie)}")
+    if args.reference:
+        sys.exit(1 if afficher_comparaison(_lire(args.reference), resultats, args.tolerance) else 0)
+
+
+if __name__ == "__main__":
+    main()
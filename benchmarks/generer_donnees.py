@@ -0,0 +1,383 @@
+# benchmarks/generer_donnees.py - Génération reproductible d'une base de données de test
+#
+# Remplit une base vide : catégories, produits, clients, fournisseurs et plusieurs années
+# de ventes et d'achats, avec le registre des mouvements de stock (instantanés mensuels)
+# et les cumuls quotidiens des ventes. Le stock reste cohérent : chaque produit passé sous
+# son seuil est commandé puis reçu par un achat quelques jours plus tard, et le registre
+# concorde avec la table produits.
+#
+# La même graine, le même volume et la même date de fin donnent exactement la même base.
+#
+# Usage : python -m benchmarks.generer_donnees chemin.db [--lignes 100000] [--annees 3]
+#         [--graine 42] [--fin 2024-12-31]
+
+import argparse
+import random
+import sys
+import time
+from collections import deque
+from datetime import date, datetime, timedelta
+from models.categorie import Categorie
+from models.cumul_vente import CumulVentes
+from models.mouvement_stock import ACHAT, OUVERTURE, VENTE
+from models.produit import Produit
+from utils.dates import FORMAT_DATE, FORMAT_JOUR
+from utils.db_manager import get_connection, transaction
+
+NB_LIGNES = 100000  # Lignes de vente (details_vente) à générer
+NB_ANNEES = 3
+GRAINE = 42
+
+LIGNES_PAR_VENTE_MAX = 5  # Chaque vente a de 1 à 5 lignes (3 en moyenne)
+LIGNES_PAR_ACHAT = 8  # Produits à réapprovisionner regroupés dans un même achat
+DELAI_LIVRAISON = 3  # Jours entre la commande et la réception d'un achat
+
+# Tables comptées par compter_lignes, dans l'ordre d'affichage
+TABLES = ('categories', 'produits', 'clients', 'fournisseurs', 'ventes', 'details_vente',
+          'achats', 'details_achat', 'mouvements_stock', 'stocks_instantanes', 'ventes_jour_produit')
+
+CATEGORIES = [
+    ('Carrelage', 'Carreaux, faïence et plinthes'),
+    ('Isolation', 'Laines, panneaux et membranes'),
+    ('Menuiserie', 'Portes, fenêtres et volets'),
+    ('Outillage', 'Outils à main et électroportatifs'),
+    ('Quincaillerie', 'Visserie, fixations et serrurerie'),
+    ('Sanitaire', 'Lavabos, WC et robinetterie'),
+    ('Toiture', 'Tuiles, gouttières et écrans'),
+    ('Jardin', 'Dallage, bordures et clôtures'),
+]
+
+ARTICLES = ['Brique', 'Parpaing', 'Sac de ciment', 'Pot de peinture', 'Planche', 'Poutre', 'Tube', 'Vis',
+            'Cheville', 'Câble', 'Carreau', 'Panneau', 'Rouleau', 'Tuile', 'Robinet', 'Gaine', 'Dalle', 'Joint']
+QUALIFICATIFS = ['standard', 'renforcé', 'premium', 'léger', 'extérieur', 'intérieur', 'traité', 'galvanisé',
+                 'hydrofuge', 'blanc', 'gris', 'rouge']
+PRENOMS = ['Amine', 'Fatima', 'Youssef', 'Khadija', 'Mehdi', 'Salma', 'Omar', 'Nadia', 'Karim', 'Leila',
+           'Hamza', 'Sara', 'Rachid', 'Imane', 'Said', 'Meryem']
+NOMS = ['Alaoui', 'Benali', 'Chraibi', 'Idrissi', 'El Fassi', 'Tazi', 'Bennani', 'Berrada', 'Lahlou',
+        'Ouazzani', 'Sqalli', 'Kettani', 'Filali', 'Naciri', 'Zniber', 'Amrani']
+VILLES = ['Casablanca', 'Rabat', 'Fès', 'Marrakech', 'Tanger', 'Agadir', 'Meknès', 'Oujda']
+RUES = ['rue des Orangers', 'avenue Hassan II', 'boulevard Zerktouni', 'rue de la Liberté', 'avenue Mohammed V',
+        'rue Ibn Batouta', 'boulevard Anfa', 'rue du Port']
+FORMES_FOURNISSEUR = ['{} Matériaux', 'SARL {}', '{} Distribution', 'Négoce {}', '{} et Fils', 'Comptoir {}']
+
+
+def volumes(nb_lignes):
+    """
+    Nombre de lignes de chaque table de référence pour un volume de lignes de vente
+
+    Returns:
+        Dictionnaire produits, clients, fournisseurs, ventes
+    """
+    return {
+        'produits': max(50, nb_lignes // 100),
+        'clients': max(20, nb_lignes // 50),
+        'fournisseurs': max(5, nb_lignes // 20000),
+        'ventes': max(1, nb_lignes * 2 // (LIGNES_PAR_VENTE_MAX + 1)),
+    }
+
+
+def compter_lignes():
+    """Nombre de lignes de chaque table générée"""
+    conn = get_connection()
+    return {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] for table in TABLES}
+
+
+def _prochain_id(cursor, table):
+    # Premier ID attribué par AUTOINCREMENT (les ID sont fixés à l'avance pour insérer par lots)
+    row = cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = ?', (table,)).fetchone()
+    return (row[0] if row else 0) + 1
+
+
+class GenerateurDonnees:
+    """
+    Générateur de données déterministe
+
+    Les ventes sont produites dans l'ordre chronologique, à intervalles réguliers (avec une
+    variation aléatoire) entre le début et la fin de la période ; les produits populaires
+    sont bien plus vendus que les autres. Les lignes sont insérées mois par mois, chaque
+    mois dans sa propre transaction avec un instantané du registre de stock.
+    """
+
+    def __init__(self, nb_lignes=NB_LIGNES, nb_annees=NB_ANNEES, graine=GRAINE, fin=None):
+        """
+        Args:
+            nb_lignes: Nombre approximatif de lignes de vente
+            nb_annees: Durée de l'historique en années
+            graine: Graine du générateur aléatoire
+            fin: Dernier jour de l'historique (date ou 'YYYY-MM-DD', aujourd'hui par défaut)
+        """
+        self.nb_lignes = nb_lignes
+        self.nb_annees = nb_annees
+        self.graine = graine
+        if fin is None:
+            fin = date.today()
+        elif isinstance(fin, str):
+            fin = datetime.strptime(fin, FORMAT_JOUR).date()
+        self.fin = datetime.combine(fin, datetime.min.time()) + timedelta(days=1)
+        self.debut = self.fin - timedelta(days=365 * nb_annees)
+        self.rng = random.Random(graine)
+
+    def parametres(self):
+        """Paramètres qui déterminent entièrement la base générée"""
+        return {
+            'lignes': self.nb_lignes,
+            'annees': self.nb_annees,
+            'graine': self.graine,
+            'fin': (self.fin - timedelta(days=1)).strftime(FORMAT_JOUR),
+        }
+
+    def generer(self, afficher=None):
+        """
+        Remplit la base de données courante
+
+        Args:
+            afficher: Fonction appelée avec un message d'avancement (facultative)
+
+        Returns:
+            Nombre de lignes de chaque table (voir compter_lignes)
+
+        Raises:
+            ValueError: si la base contient déjà des produits, ventes ou achats
+        """
+        afficher = afficher or (lambda message: None)
+        conn = get_connection()
+        for table in ('produits', 'ventes', 'achats'):
+            if conn.execute(f'SELECT 1 FROM {table} LIMIT 1').fetchone():
+                raise ValueError(f"La base doit être vide (la table {table} contient des lignes).")
+
+        nb = volumes(self.nb_lignes)
+        with transaction() as cursor:
+            self._referentiel(cursor, nb)
+        afficher(f"{nb['produits']} produits, {nb['clients']} clients, {nb['fournisseurs']} fournisseurs")
+
+        for mois, nb_ventes in self._historique(nb['ventes']):
+            afficher(f"{mois} : {nb_ventes} ventes")
+
+        with transaction() as cursor:
+            cursor.executemany('UPDATE produits SET quantite = ? WHERE id = ?',
+                               [(stock, produit_id) for produit_id, stock in zip(self._produits, self._stocks)])
+        CumulVentes.reconstruire()
+        Produit.invalider_cache()
+        Categorie.invalider_cache()
+        return compter_lignes()
+
+    def _referentiel(self, cursor, nb):
+        rng = self.rng
+        date_ouverture = self.debut.strftime(FORMAT_DATE)
+
+        cursor.executemany('INSERT OR IGNORE INTO categories (nom, description) VALUES (?, ?)', CATEGORIES)
+        categories = [row[0] for row in cursor.execute('SELECT id FROM categories ORDER BY id')]
+
+        produits = []
+        for i in range(nb['produits']):
+            prix_achat = round(rng.uniform(0.5, 250), 2)
+            produits.append((
+                f"{rng.choice(ARTICLES)} {rng.choice(QUALIFICATIFS)} réf. {i + 1:06d}",
+                f"Lot de {rng.choice((1, 5, 10, 25, 50))}, {rng.randint(1, 300)} cm",
+                rng.choice(categories),
+                prix_achat,
+                round(prix_achat * rng.uniform(1.15, 1.6), 2),
+                rng.randint(20, 200),
+                rng.randint(5, 20),
+            ))
+        premier_produit = _prochain_id(cursor, 'produits')
+        cursor.executemany(
+            'INSERT INTO produits (id, nom, description, categorie_id, prix_achat, prix_vente, quantite, '
+            'seuil_reapprovisionnement) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            [(premier_produit + i,) + produit for i, produit in enumerate(produits)])
+        # Stock initial : ouverture du registre au début de l'historique
+        cursor.execute('''
+        INSERT INTO mouvements_stock (produit_id, type_mouvement, reference, delta, date_mouvement)
+        SELECT id, ?, id, quantite, ? FROM produits WHERE quantite != 0 ORDER BY id
+        ''', (OUVERTURE, date_ouverture))
+        # Dernier mouvement de chaque produit depuis l'instantané précédent : index -> (ID, date)
+        self._derniers_mouvements = {
+            produit_id - premier_produit: (mouvement_id, date_ouverture)
+            for mouvement_id, produit_id in cursor.execute(
+                'SELECT id, produit_id FROM mouvements_stock WHERE type_mouvement = ?', (OUVERTURE,))
+        }
+
+        self._produits = list(range(premier_produit, premier_produit + len(produits)))
+        self._prix_achat = [p[3] for p in produits]
+        self._prix_vente = [p[4] for p in produits]
+        self._stocks = [p[5] for p in produits]
+        self._seuils = [p[6] for p in produits]
+
+        personnes = []
+        for i in range(nb['clients']):
+            prenom, nom = rng.choice(PRENOMS), rng.choice(NOMS)
+            personnes.append((
+                f"{prenom} {nom}",
+                f"{rng.randint(1, 250)} {rng.choice(RUES)}, {rng.choice(VILLES)}",
+                f"06{rng.randint(0, 99999999):08d}",
+                f"{prenom.lower()}.{nom.lower().replace(' ', '')}{i + 1}@exemple.ma",
+                '',
+            ))
+        cursor.executemany('INSERT INTO clients (nom, adresse, telephone, email, notes) VALUES (?, ?, ?, ?, ?)',
+                           personnes)
+        self._clients = [row[0] for row in cursor.execute('SELECT id FROM clients ORDER BY id')]
+
+        fournisseurs = []
+        for i in range(nb['fournisseurs']):
+            nom = rng.choice(FORMES_FOURNISSEUR).format(rng.choice(NOMS))
+            fournisseurs.append((
+                f"{nom} {i + 1}",
+                f"Zone industrielle, lot {rng.randint(1, 500)}, {rng.choice(VILLES)}",
+                f"05{rng.randint(0, 99999999):08d}",
+                f"contact{i + 1}@fournisseur.ma",
+                '',
+            ))
+        cursor.executemany(
+            'INSERT INTO fournisseurs (nom, adresse, telephone, email, notes) VALUES (?, ?, ?, ?, ?)', fournisseurs)
+        self._fournisseurs = [row[0] for row in cursor.execute('SELECT id FROM fournisseurs ORDER BY id')]
+
+    def _historique(self, nb_ventes):
+        """
+        Génère les ventes et les achats de réapprovisionnement, mois par mois
+
+        Yields:
+            (mois 'YYYY-MM', nombre de ventes du mois) après l'insertion de chaque mois
+        """
+        rng = self.rng
+        nb_produits = len(self._produits)
+        stocks, seuils = self._stocks, self._seuils
+        pas = (self.fin - self.debut).total_seconds() / nb_ventes
+
+        with transaction() as cursor:
+            vente_id = _prochain_id(cursor, 'ventes')
+            detail_vente_id = _prochain_id(cursor, 'details_vente')
+            achat_id = _prochain_id(cursor, 'achats')
+            detail_achat_id = _prochain_id(cursor, 'details_achat')
+            mouvement_id = _prochain_id(cursor, 'mouvements_stock')
+
+        lot = {'ventes': [], 'details_vente': [], 'achats': [], 'details_achat': [], 'mouvements_stock': []}
+        derniers = self._derniers_mouvements
+        a_commander = []  # Index des produits passés sous leur seuil, pas encore commandés
+        en_commande = set()  # Index des produits à commander ou en cours de livraison
+        livraisons = deque()  # (index de la vente à partir de laquelle l'achat est reçu, index des produits)
+        delai = int(DELAI_LIVRAISON * 86400 / pas)
+        mois_courant = None
+
+        for i in range(nb_ventes):
+            moment = self.debut + timedelta(seconds=(i + rng.random()) * pas)
+            date_vente = moment.strftime(FORMAT_DATE)
+            if date_vente[:7] != mois_courant:
+                if mois_courant is not None:
+                    self._inserer(lot, self._instantanes())
+                    yield mois_courant, len(lot['ventes'])
+                    for lignes in lot.values():
+                        lignes.clear()
+                mois_courant = date_vente[:7]
+
+            # Réceptions des achats arrivées depuis la vente précédente
+            while livraisons and livraisons[0][0] <= i:
+                produits_recus = livraisons.popleft()[1]
+                montant = 0
+                for index in produits_recus:
+                    produit_id = self._produits[index]
+                    quantite = seuils[index] * 5 + rng.randint(0, 50)
+                    prix = self._prix_achat[index]
+                    stocks[index] += quantite
+                    montant += quantite * prix
+                    lot['details_achat'].append((detail_achat_id, achat_id, produit_id, quantite, prix))
+                    lot['mouvements_stock'].append((mouvement_id, produit_id, ACHAT, achat_id, quantite, date_vente))
+                    derniers[index] = (mouvement_id, date_vente)
+                    detail_achat_id += 1
+                    mouvement_id += 1
+                    en_commande.discard(index)
+                lot['achats'].append((achat_id, rng.choice(self._fournisseurs), date_vente, round(montant, 2),
+                                      'Réapprovisionnement'))
+                achat_id += 1
+
+            # Produits populaires beaucoup plus vendus : index concentrés vers le début du catalogue
+            nb_lignes = rng.randint(1, LIGNES_PAR_VENTE_MAX)
+            montant = 0
+            vus = set()
+            for _ in range(2 * nb_lignes):
+                if len(vus) == nb_lignes:
+                    break
+                index = int(nb_produits * rng.random() ** 3)
+                quantite = min(rng.randint(1, 5), stocks[index])
+                if index in vus or quantite == 0:
+                    continue
+                vus.add(index)
+                produit_id = self._produits[index]
+                prix = self._prix_vente[index]
+                stocks[index] -= quantite
+                montant += quantite * prix
+                lot['details_vente'].append((detail_vente_id, vente_id, produit_id, quantite, prix))
+                lot['mouvements_stock'].append((mouvement_id, produit_id, VENTE, vente_id, -quantite, date_vente))
+                derniers[index] = (mouvement_id, date_vente)
+                detail_vente_id += 1
+                mouvement_id += 1
+                if stocks[index] <= seuils[index] and index not in en_commande:
+                    en_commande.add(index)
+                    a_commander.append(index)
+            if vus:
+                lot['ventes'].append((vente_id, rng.choice(self._clients), date_vente, round(montant, 2), ''))
+                vente_id += 1
+
+            # Commande dès que assez de produits sont sous leur seuil, reçue quelques jours plus tard
+            if len(a_commander) >= LIGNES_PAR_ACHAT:
+                livraisons.append((i + delai, a_commander))
+                a_commander = []
+
+        if mois_courant is not None:
+            self._inserer(lot, self._instantanes())
+            yield mois_courant, len(lot['ventes'])
+
+    def _instantanes(self):
+        # Même résultat que MouvementStock.creer_instantanes, calculé depuis les stocks tenus en mémoire
+        instantanes = [(self._produits[index], mouvement_id, date_mouvement, self._stocks[index])
+                       for index, (mouvement_id, date_mouvement) in self._derniers_mouvements.items()]
+        self._derniers_mouvements.clear()
+        return instantanes
+
+    def _inserer(self, lot, instantanes):
+        with transaction() as cursor:
+            cursor.executemany(
+                'INSERT INTO ventes (id, client_id, date_vente, montant_total, notes) VALUES (?, ?, ?, ?, ?)',
+                lot['ventes'])
+            cursor.executemany(
+                'INSERT INTO details_vente (id, vente_id, produit_id, quantite, prix_unitaire) VALUES (?, ?, ?, ?, ?)',
+                lot['details_vente'])
+            cursor.executemany(
+                'INSERT INTO achats (id, fournisseur_id, date_achat, montant_total, notes) VALUES (?, ?, ?, ?, ?)',
+                lot['achats'])
+            cursor.executemany(
+                'INSERT INTO details_achat (id, achat_id, produit_id, quantite, prix_unitaire) VALUES (?, ?, ?, ?, ?)',
+                lot['details_achat'])
+            cursor.executemany(
+                'INSERT INTO mouvements_stock (id, produit_id, type_mouvement, reference, delta, date_mouvement) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                lot['mouvements_stock'])
+            cursor.executemany(
+                'INSERT INTO stocks_instantanes (produit_id, mouvement_id, date_instantane, quantite) VALUES (?, ?, ?, ?)',
+                instantanes)
+
+
+def main(argv=None):
+    from utils.db_setup import setup_database
+
+    parser = argparse.ArgumentParser(description="Génère une base de données de test reproductible")
+    parser.add_argument('db', help="Chemin de la base à remplir (créée si elle n'existe pas, doit être vide)")
+    parser.add_argument('--lignes', type=int, default=NB_LIGNES, help="Nombre approximatif de lignes de vente")
+    parser.add_argument('--annees', type=int, default=NB_ANNEES, help="Durée de l'historique en années")
+    parser.add_argument('--graine', type=int, default=GRAINE, help="Graine du générateur aléatoire")
+    parser.add_argument('--fin', help="Dernier jour de l'historique, YYYY-MM-DD (aujourd'hui par défaut)")
+    args = parser.parse_args(argv)
+
+    setup_database(args.db)
+    generateur = GenerateurDonnees(args.lignes, args.annees, args.graine, args.fin)
+    debut = time.perf_counter()
+    try:
+        comptes = generateur.generer(afficher=print)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"Base générée en {time.perf_counter() - debut:.1f} s ({generateur.parametres()})")
+    for table, nombre in comptes.items():
+        print(f"{table:<20} {nombre:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# benchmarks/verifier_requetes.py - Budgets de requêtes des appels de contrôleurs et des actions de l'interface
+#
+# Chaque cas est exécuté sur une petite base générée (voir benchmarks.generer_donnees) dans
+# un CompteurRequetes : le nombre de requêtes ne doit pas dépasser le budget, et aucune
+# instruction ne doit être répétée (une répétition signale une lecture ligne par ligne).
+# Les paniers ont plusieurs lignes : une requête par ligne dépasserait le budget. Les actions
+# des vues sont les vraies méthodes, appelées sans fenêtre (widgets remplacés par des doublures)
+# avec le budget de leur décorateur @surveiller.
+#
+# Usage : python -m benchmarks.verifier_requetes [--details]
+
+import argparse
+import sys
+import warnings
+from benchmarks.commun import base_temporaire
+from benchmarks.generer_donnees import GenerateurDonnees
+from controllers.gestion_achat import GestionAchat
+from controllers.gestion_client import GestionClient
+from controllers.gestion_produit import GestionProduit
+from controllers.gestion_stock import GestionStock
+from controllers.gestion_vente import GestionVente
+from utils.compteur_requetes import BudgetRequetesDepasse, CompteurRequetes, RequetesRepetees
+from utils.db_manager import get_connection, recherche_plein_texte_disponible
+from views.grille_virtuelle import GrilleVirtuelle
+from views.produits_view import ProduitsView
+from views.ventes_view import VentesView
+
+NB_LIGNES = 5000
+LIGNES_PANIER = 10
+
+
+class _Variable:
+    """Remplace un tk.StringVar (les vues sont utilisées sans fenêtre)"""
+
+    def __init__(self, valeur=''):
+        self.valeur = valeur
+
+    def get(self):
+        return self.valeur
+
+
+class _Etiquette:
+    """Remplace un ttk.Label"""
+
+    def config(self, **options):
+        pass
+
+
+class _GrilleSansFenetre:
+    """Remplace une GrilleVirtuelle : charger() lit ce qu'elle lirait à l'ouverture (total et première page)"""
+
+    def charger(self, charger_page=None, compter=None, positionner=None):
+        total = compter() if compter else None
+        lignes, _ = charger_page(None, GrilleVirtuelle.TAILLE_PAGE)
+        return total if total is not None else len(lignes)
+
+
+def _vue_produits(recherche=''):
+    # Vue construite sans __init__ (qui crée les widgets) : seuls les attributs lus par les actions
+    vue = object.__new__(ProduitsView)
+    vue.gestion_produit = GestionProduit()
+    vue.grille = _GrilleSansFenetre()
+    vue.count_label = vue.status_label = _Etiquette()
+    vue.search_var = _Variable(recherche)
+    return vue
+
+
+def _vue_ventes(jour):
+    vue = object.__new__(VentesView)
+    vue.gestion_vente = GestionVente()
+    vue.grille_ventes = _GrilleSansFenetre()
+    vue.date_debut_var = vue.date_fin_var = _Variable(jour)
+    return vue
+
+
+def definir_budgets():
+    """
+    Returns:
+        Liste de tuples (nom, fonction sans argument, nombre maximal de requêtes)
+    """
+    conn = get_connection()
+    produits = [row[0] for row in conn.execute('SELECT id FROM produits ORDER BY id LIMIT ?', (LIGNES_PANIER,))]
+    for produit_id in produits:
+        GestionStock.ajuster_stock(produit_id, 1000, "Préparation de la vérification")
+    client_id = conn.execute('SELECT MIN(id) FROM clients').fetchone()[0]
+    fournisseur_id = conn.execute('SELECT MIN(id) FROM fournisseurs').fetchone()[0]
+    vente_id = conn.execute('SELECT MAX(id) FROM ventes').fetchone()[0]
+    achat_id = conn.execute('SELECT MAX(id) FROM achats').fetchone()[0]
+    jour = conn.execute('SELECT MAX(date_vente) FROM ventes').fetchone()[0][:10]
+    panier_vente = [(produit_id, 1) for produit_id in produits]
+    panier_achat = [(produit_id, 2, 1.0) for produit_id in produits]
+    # Caches chauds, comme dans l'application : la lecture du schéma n'est faite qu'une fois
+    recherche_plein_texte_disponible('produits_fts')
+
+    def creer_puis(creer, annuler):
+        # Annulation d'une opération créée pour l'occasion : seule l'annulation est comptée
+        identifiant = creer()[1]
+        return lambda: annuler(identifiant)
+
+    vue_produits = _vue_produits()
+    vue_recherche = _vue_produits('ciment')
+    vue_ventes = _vue_ventes(jour)
+
+    return [
+        # Actions de l'interface, avec le budget de leur décorateur @surveiller
+        ('ProduitsView.load_products', vue_produits.load_products, ProduitsView.load_products.max_requetes),
+        ('ProduitsView.search_products', vue_recherche.search_products, ProduitsView.search_products.max_requetes),
+        ('VentesView.load_ventes', vue_ventes.load_ventes, VentesView.load_ventes.max_requetes),
+        ('AccueilView (tableau de bord)', GestionStock.obtenir_tableau_de_bord, 1),
+        # Écritures : le nombre de requêtes ne dépend pas du nombre de lignes
+        (f'GestionVente.creer_vente ({LIGNES_PANIER} lignes)',
+         lambda: GestionVente.creer_vente(client_id, panier_vente), 7),
+        ('GestionVente.annuler_vente',
+         creer_puis(lambda: GestionVente.creer_vente(client_id, panier_vente), GestionVente.annuler_vente), 9),
+        (f'GestionAchat.creer_achat ({LIGNES_PANIER} lignes)',
+         lambda: GestionAchat.creer_achat(fournisseur_id, panier_achat), 6),
+        ('GestionAchat.annuler_achat',
+         creer_puis(lambda: GestionAchat.creer_achat(fournisseur_id, panier_achat), GestionAchat.annuler_achat), 6),
+        ('GestionStock.ajuster_stock', lambda: GestionStock.ajuster_stock(produits[0], 1), 3),
+        # Lectures
+        ('GestionVente.obtenir_vente_details', lambda: GestionVente.obtenir_vente_details(vente_id), 2),
+        ('GestionAchat.obtenir_achat_details', lambda: GestionAchat.obtenir_achat_details(achat_id), 2),
+        ('GestionClient.obtenir_historique_achats', lambda: GestionClient.obtenir_historique_achats(client_id), 2),
+        ('GestionVente.get_benefice_mensuel', GestionVente.get_benefice_mensuel, 1),
+        ('GestionVente.obtenir_synthese_ventes', lambda: GestionVente.obtenir_synthese_ventes(jour, jour, 'mois'), 1),
+        ('GestionStock.obtenir_stock_au', lambda: GestionStock.obtenir_stock_au(produits[0], jour), 3),
+        ('GestionStock.get_produits_en_alerte', GestionStock.get_produits_en_alerte, 1),
+    ]
+
+
+def verifier_budgets():
+    """
+    Exécute chaque cas et vérifie son budget (à appeler sur une base remplie)
+
+    Returns:
+        Liste de tuples (nom, ok, compteur, message d'erreur ou None)
+    """
+    resultats = []
+    for nom, fonction, max_requetes in definir_budgets():
+        compteur = CompteurRequetes(nom, max_requetes=max_requetes, max_repetitions=1)
+        try:
+            with compteur, warnings.catch_warnings():
+                # Le compteur des actions décorées par @surveiller double celui-ci : seul ce dernier est rapporté
+                warnings.simplefilter('ignore', RequetesRepetees)
+                fonction()
+            resultats.append((nom, True, compteur, None))
+        except BudgetRequetesDepasse as e:
+            resultats.append((nom, False, compteur, str(e)))
+    return resultats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vérifie les budgets de requêtes des contrôleurs")
+    parser.add_argument('--details', action='store_true', help="Afficher les requêtes de chaque cas")
+    args = parser.parse_args(argv)
+
+    echecs = 0
+    with base_temporaire():
+        GenerateurDonnees(NB_LIGNES).generer()
+        for nom, ok, compteur, erreur in verifier_budgets():
+            print(f"[{'OK' if ok else 'ÉCHEC'}] {nom} : {compteur.nb_requetes}/{compteur.max_requetes} requêtes")
+            if erreur:
+                print(f"    {erreur}")
+            if args.details:
+                for forme, site in compteur.requetes:
+                    print(f"    {site} : {forme[:100]}")
+            echecs += not ok
+    sys.exit(1 if echecs else 0)
+
+
+if __name__ == "__main__":
+    main()
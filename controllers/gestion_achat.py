@@ -4,6 +4,7 @@ from datetime import datetime
 from models.achat import Achat, DetailAchat
 from models.fournisseur import Fournisseur
 from models.produit import Produit
+from utils.pagination import TAILLE_PAGE
 
 class GestionAchat:
     @staticmethod
@@ -30,8 +31,9 @@ class GestionAchat:
             
             # Ajouter les détails d'achat
             montant_total = 0
+            produits = Produit.get_by_ids(produit_id for produit_id, _, _ in produits_quantites_prix)
             for produit_id, quantite, prix_unitaire in produits_quantites_prix:
-                produit = Produit.get_by_id(produit_id)
+                produit = produits.get(produit_id)
                 if not produit:
                     return False, None, f"Produit ID {produit_id} non trouvé."
                 
@@ -65,7 +67,8 @@ class GestionAchat:
             (success, message)
         """
         try:
-            achat = Achat.get_by_id(achat_id)
+            # Les lignes sont relues par delete(), dans la transaction d'annulation
+            achat = Achat.get_by_id(achat_id, avec_details=False)
             if not achat:
                 return False, "Achat non trouvé."
             
@@ -90,6 +93,36 @@ class GestionAchat:
         """
         return Achat.get_all(limit)
     
+    @staticmethod
+    def obtenir_achats_periode(date_debut, date_fin):
+        """
+        Récupère les achats sur une période donnée
+        
+        Args:
+            date_debut: Date de début (format YYYY-MM-DD)
+            date_fin: Date de fin incluse (format YYYY-MM-DD)
+            
+        Returns:
+            Liste d'achats
+        """
+        return Achat.get_achats_periode(date_debut, date_fin)
+    
+    @staticmethod
+    def obtenir_achats_page(curseur=None, taille=TAILLE_PAGE, date_debut=None, date_fin=None):
+        """
+        Récupère une page d'achats (les plus récents d'abord), éventuellement sur une période
+        
+        Args:
+            curseur: Curseur renvoyé avec la page précédente (None pour la première page)
+            taille: Nombre d'achats par page
+            date_debut: Date de début (format YYYY-MM-DD), avec date_fin
+            date_fin: Date de fin incluse (format YYYY-MM-DD), avec date_debut
+            
+        Returns:
+            (liste d'achats, curseur de la page suivante ou None)
+        """
+        return Achat.get_page(curseur, taille, date_debut, date_fin)
+    
     @staticmethod
     def obtenir_achat_details(achat_id):
         """
@@ -0,0 +1,304 @@
+# controllers/gestion_async.py - Façade asyncio des contrôleurs
+#
+# Les contrôleurs font des accès SQLite bloquants. Cette façade les expose en coroutines :
+# les lectures s'exécutent dans un pool de threads borné (une connexion par thread, WAL),
+# les écritures passent une à une par une file traitée par une tâche d'écriture unique,
+# dans un thread dédié. Une boucle asyncio (serveur, interface) n'est jamais bloquée.
+#
+# Validation groupée : l'écrivain réunit les écritures arrivées dans une courte fenêtre
+# en une seule transaction SQLite (un seul COMMIT). Chaque écriture y est un SAVEPOINT :
+# si elle échoue, seules ses propres modifications sont annulées, et chaque appelant
+# reçoit son propre résultat (ou son exception) une fois le groupe validé.
+#
+# Utilisation :
+#     async with GestionAsync() as gestion:
+#         produits = await gestion.produit.lister_produits(terme="ciment")
+#         succes, vente_id, message = await gestion.vente.creer_vente(1, [(3, 2)])
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from utils.db_manager import get_connection, transaction
+from controllers.gestion_achat import GestionAchat
+from controllers.gestion_client import GestionClient
+from controllers.gestion_fournisseur import GestionFournisseur
+from controllers.gestion_produit import GestionProduit
+from controllers.gestion_stock import GestionStock
+from controllers.gestion_vente import GestionVente
+
+# Threads de lecture par défaut
+NB_LECTEURS = 4
+
+# Écritures en attente au-delà desquelles ecrire() attend qu'une place se libère
+TAILLE_FILE_ECRITURES = 1000
+
+# Écritures validées ensemble au plus (1 : une transaction par écriture)
+TAILLE_GROUPE = 64
+
+# Attente maximale d'autres écritures après la première d'un groupe, en secondes
+FENETRE_GROUPE = 0.001
+
+LECTURE = 'lecture'
+ECRITURE = 'ecriture'
+
+# Contrôleur -> {méthode: LECTURE ou ECRITURE}
+METHODES = {
+    GestionAchat: {
+        'creer_achat': ECRITURE,
+        'annuler_achat': ECRITURE,
+        'obtenir_achats_recents': LECTURE,
+        'obtenir_achats_periode': LECTURE,
+        'obtenir_achats_page': LECTURE,
+        'obtenir_achat_details': LECTURE,
+    },
+    GestionClient: {
+        'ajouter_client': ECRITURE,
+        'modifier_client': ECRITURE,
+        'supprimer_client': ECRITURE,
+        'rechercher_clients': LECTURE,
+        'obtenir_tous_clients': LECTURE,
+        'obtenir_client_par_id': LECTURE,
+        'obtenir_historique_achats': LECTURE,
+    },
+    GestionFournisseur: {
+        'ajouter_fournisseur': ECRITURE,
+        'modifier_fournisseur': ECRITURE,
+        'supprimer_fournisseur': ECRITURE,
+        'obtenir_tous_fournisseurs': LECTURE,
+        'obtenir_fournisseur_par_id': LECTURE,
+    },
+    GestionProduit: {
+        'ajouter_produit': ECRITURE,
+        'modifier_produit': ECRITURE,
+        'supprimer_produit': ECRITURE,
+        'mettre_a_jour_stock': ECRITURE,
+        'ajouter_categorie': ECRITURE,
+        'importer_produits': ECRITURE,
+        'rechercher_produits': LECTURE,
+        'lister_produits': LECTURE,
+        'lister_produits_page': LECTURE,
+        'compter_produits': LECTURE,
+        'curseur_produits_au_rang': LECTURE,
+        'obtenir_tous_produits': LECTURE,
+        'obtenir_produit_par_id': LECTURE,
+        'obtenir_produits_par_categorie': LECTURE,
+        'obtenir_produits_faible_stock': LECTURE,
+        'obtenir_toutes_categories': LECTURE,
+        'obtenir_id_categorie': LECTURE,
+        'obtenir_nom_categorie': LECTURE,
+        'get_total_produits': LECTURE,
+    },
+    GestionStock: {
+        'ajuster_stock': ECRITURE,
+        'obtenir_etat_stock': LECTURE,
+        'obtenir_produits_faible_stock': LECTURE,
+        'obtenir_historique_stock': LECTURE,
+        'obtenir_stock_au': LECTURE,
+        'rapprocher_stock': LECTURE,
+        'verifier_disponibilite': LECTURE,
+        'get_valeur_totale_stock': LECTURE,
+        'get_produits_en_alerte': LECTURE,
+        'obtenir_tableau_de_bord': LECTURE,
+    },
+    GestionVente: {
+        'creer_vente': ECRITURE,
+        'annuler_vente': ECRITURE,
+        'obtenir_ventes_recentes': LECTURE,
+        'obtenir_ventes_periode': LECTURE,
+        'obtenir_ventes_page': LECTURE,
+        'compter_ventes': LECTURE,
+        'curseur_ventes_au_rang': LECTURE,
+        'obtenir_vente_details': LECTURE,
+        'get_ventes_jour': LECTURE,
+        'get_benefice_mensuel': LECTURE,
+        'obtenir_synthese_ventes': LECTURE,
+    },
+}
+
+class ExecuteurControleurs:
+    """
+    Exécute des appels bloquants : lectures en parallèle, écritures une à une dans l'ordre d'arrivée
+    
+    Les écritures sont validées par groupes (taille_groupe, fenetre_groupe) ; nb_groupes et
+    nb_ecritures comptent les transactions et les écritures traitées.
+    À démarrer et arrêter depuis la boucle asyncio qui l'utilise.
+    """
+    
+    def __init__(self, nb_lecteurs=NB_LECTEURS, taille_file=TAILLE_FILE_ECRITURES,
+                 taille_groupe=TAILLE_GROUPE, fenetre_groupe=FENETRE_GROUPE):
+        self.nb_lecteurs = nb_lecteurs
+        self.taille_file = taille_file
+        self.taille_groupe = taille_groupe
+        self.fenetre_groupe = fenetre_groupe
+        self.nb_groupes = 0
+        self.nb_ecritures = 0
+        self.lecteurs = None
+        self.ecrivain = None
+        self.file_ecritures = None
+        self._tache_ecrivain = None
+    
+    async def demarrer(self):
+        self.lecteurs = ThreadPoolExecutor(self.nb_lecteurs, thread_name_prefix='lecteur')
+        self.ecrivain = ThreadPoolExecutor(1, thread_name_prefix='ecrivain')
+        self.file_ecritures = asyncio.Queue(self.taille_file)
+        self._tache_ecrivain = asyncio.get_running_loop().create_task(self._ecrire())
+    
+    async def arreter(self):
+        """Termine les écritures en file puis arrête les threads"""
+        if self._tache_ecrivain is not None:
+            await self.file_ecritures.join()
+            self._tache_ecrivain.cancel()
+            self._tache_ecrivain = None
+        for pool in (self.lecteurs, self.ecrivain):
+            if pool is not None:
+                pool.shutdown(wait=True)
+        self.lecteurs = self.ecrivain = None
+    
+    async def lire(self, fonction):
+        """Exécute fonction (sans argument) dans le pool de lecture"""
+        return await asyncio.get_running_loop().run_in_executor(self.lecteurs, fonction)
+    
+    async def ecrire(self, fonction):
+        """Place fonction (sans argument) dans la file de l'écrivain et attend son résultat (groupe validé)"""
+        resultat = asyncio.get_running_loop().create_future()
+        await self.file_ecritures.put((fonction, resultat))
+        return await resultat
+    
+    async def executer(self, fonction, mode):
+        """Exécute fonction selon son mode (LECTURE ou ECRITURE)"""
+        if mode == ECRITURE:
+            return await self.ecrire(fonction)
+        return await self.lire(fonction)
+    
+    async def _ecrire(self):
+        """Tâche d'écriture unique : traite la file par groupes, dans l'ordre d'arrivée"""
+        loop = asyncio.get_running_loop()
+        while True:
+            groupe = await self._former_groupe(loop)
+            try:
+                resultats = await loop.run_in_executor(self.ecrivain, _executer_groupe, [f for f, _ in groupe])
+            except Exception as e:
+                # Échec de la validation elle-même : aucune écriture du groupe n'a été enregistrée
+                resultats = [(False, e)] * len(groupe)
+            self.nb_groupes += 1
+            self.nb_ecritures += len(groupe)
+            for (_, futur), (succes, valeur) in zip(groupe, resultats):
+                if not futur.done():
+                    if succes:
+                        futur.set_result(valeur)
+                    else:
+                        futur.set_exception(valeur)
+                self.file_ecritures.task_done()
+    
+    async def _former_groupe(self, loop):
+        """Attend une écriture puis prend celles qui arrivent pendant fenetre_groupe (au plus taille_groupe)"""
+        groupe = [await self.file_ecritures.get()]
+        echeance = loop.time() + self.fenetre_groupe
+        while len(groupe) < self.taille_groupe:
+            try:
+                groupe.append(self.file_ecritures.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            attente = echeance - loop.time()
+            if attente <= 0:
+                break
+            try:
+                groupe.append(await asyncio.wait_for(self.file_ecritures.get(), attente))
+            except asyncio.TimeoutError:
+                break
+        return groupe
+
+
+class _TransactionPerdue(Exception):
+    """Levée quand une écriture du groupe a entraîné l'annulation de toute la transaction"""
+
+
+def _executer_groupe(fonctions):
+    """
+    Exécute des écritures dans une seule transaction, chacune dans son SAVEPOINT
+    
+    Si une écriture fait annuler la transaction entière par SQLite (disque plein, erreur
+    d'E/S, ON CONFLICT ROLLBACK), les écritures précédentes du groupe sont perdues avec
+    elle et les suivantes ne doivent pas s'exécuter hors transaction : le groupe est
+    rejoué sans elle dans une nouvelle transaction. Elle reçoit son propre résultat.
+    
+    Returns:
+        Liste de (succes, résultat ou exception), dans l'ordre des fonctions
+    """
+    conn = get_connection()
+    resultats = []
+    try:
+        with transaction():
+            for fonction in fonctions:
+                try:
+                    with transaction():
+                        resultats.append((True, fonction()))
+                except Exception as e:
+                    resultats.append((False, e))
+                # Vérifié aussi après un succès : les contrôleurs interceptent les erreurs SQLite
+                if not conn.in_transaction:
+                    raise _TransactionPerdue
+    except _TransactionPerdue:
+        perdue = len(resultats) - 1
+        rejoues = iter(_executer_groupe(fonctions[:perdue] + fonctions[perdue + 1:]))
+        return [resultats[perdue] if i == perdue else next(rejoues) for i in range(len(fonctions))]
+    return resultats
+
+
+def _methode_async(fonction, mode):
+    """Coroutine de même nom et de même signature que la méthode statique fonction"""
+    @functools.wraps(fonction)
+    async def methode(self, *args, **kwargs):
+        return await self._executeur.executer(functools.partial(fonction, *args, **kwargs), mode)
+    return methode
+
+
+def _facade(classe):
+    """Construit la classe asynchrone miroir d'un contrôleur (ex: GestionVenteAsync)"""
+    attributs = {
+        '__doc__': f"Version asynchrone de {classe.__name__} (mêmes méthodes, à attendre avec await)",
+        '__init__': lambda self, executeur: setattr(self, '_executeur', executeur),
+    }
+    for nom, mode in METHODES[classe].items():
+        attributs[nom] = _methode_async(getattr(classe, nom), mode)
+    return type(f'{classe.__name__}Async', (), attributs)
+
+
+GestionAchatAsync = _facade(GestionAchat)
+GestionClientAsync = _facade(GestionClient)
+GestionFournisseurAsync = _facade(GestionFournisseur)
+GestionProduitAsync = _facade(GestionProduit)
+GestionStockAsync = _facade(GestionStock)
+GestionVenteAsync = _facade(GestionVente)
+
+
+class GestionAsync:
+    """
+    Point d'entrée de la façade : un exécuteur partagé par les six contrôleurs
+    
+    Attributs : achat, client, fournisseur, produit, stock, vente.
+    """
+    
+    def __init__(self, nb_lecteurs=NB_LECTEURS, taille_file=TAILLE_FILE_ECRITURES,
+                 taille_groupe=TAILLE_GROUPE, fenetre_groupe=FENETRE_GROUPE):
+        self.executeur = ExecuteurControleurs(nb_lecteurs, taille_file, taille_groupe, fenetre_groupe)
+        self.achat = GestionAchatAsync(self.executeur)
+        self.client = GestionClientAsync(self.executeur)
+        self.fournisseur = GestionFournisseurAsync(self.executeur)
+        self.produit = GestionProduitAsync(self.executeur)
+        self.stock = GestionStockAsync(self.executeur)
+        self.vente = GestionVenteAsync(self.executeur)
+    
+    async def demarrer(self):
+        await self.executeur.demarrer()
+        return self
+    
+    async def arreter(self):
+        await self.executeur.arreter()
+    
+    async def __aenter__(self):
+        return await self.demarrer()
+    
+    async def __aexit__(self, *exc):
+        await self.arreter()
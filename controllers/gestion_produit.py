@@ -2,6 +2,8 @@
 import sqlite3
 from models.produit import Produit
 from models.categorie import Categorie
+from utils.import_produits import importer_produits_csv
+from utils.pagination import TAILLE_PAGE
 
 class GestionProduit:
     @staticmethod
@@ -55,10 +57,63 @@ class GestionProduit:
         except sqlite3.Error as e:
             return False, f"Erreur lors de la suppression du produit: {str(e)}"
     
+    @staticmethod
+    def importer_produits(chemin_csv, creer_categories=False):
+        """
+        Importe un catalogue de produits depuis un fichier CSV (insertion par lots)
+        
+        Returns:
+            (success, nb_importes, erreurs) où erreurs est une liste de (numéro de ligne, message)
+        """
+        try:
+            nb_importes, erreurs = importer_produits_csv(chemin_csv, creer_categories=creer_categories)
+            return not erreurs, nb_importes, erreurs
+        except (OSError, UnicodeDecodeError, sqlite3.Error) as e:
+            return False, 0, [(0, f"Erreur lors de l'import: {str(e)}")]
+    
     @staticmethod
     def rechercher_produits(terme):
         return Produit.search(terme)
     
+    @staticmethod
+    def lister_produits(terme=None, categorie_id=None, faible_stock=False):
+        """
+        Liste des produits pour l'affichage, avec le nom de catégorie déjà joint
+        
+        Returns:
+            Liste de Produit (attribut categorie_nom renseigné)
+        """
+        return Produit.lister(terme, categorie_id, faible_stock)
+    
+    @staticmethod
+    def lister_produits_page(curseur=None, taille=TAILLE_PAGE, terme=None, categorie_id=None, faible_stock=False):
+        """
+        Page de produits pour l'affichage (triés par id), avec le nom de catégorie
+        
+        Args:
+            curseur: Curseur renvoyé avec la page précédente (None pour la première page)
+            taille: Nombre de produits par page
+            
+        Returns:
+            (liste de Produit, curseur de la page suivante ou None)
+        """
+        return Produit.lister_page(curseur, taille, terme, categorie_id, faible_stock)
+    
+    @staticmethod
+    def curseur_produits_au_rang(rang, terme=None, categorie_id=None, faible_stock=False):
+        """
+        Curseur de lister_produits_page désignant le produit de rang donné (saut direct dans la liste)
+        
+        Returns:
+            Curseur, ou None si la liste compte moins de rang + 1 produits
+        """
+        return Produit.cle_au_rang(rang, terme, categorie_id, faible_stock)
+    
+    @staticmethod
+    def compter_produits(terme=None, categorie_id=None, faible_stock=False):
+        """Nombre de produits correspondant aux filtres de lister_produits"""
+        return Produit.compter(terme, categorie_id, faible_stock)
+    
     @staticmethod
     def obtenir_tous_produits():
         return Produit.get_all()
@@ -90,6 +145,16 @@ class GestionProduit:
     def obtenir_toutes_categories():
         return Categorie.get_all()
     
+    @staticmethod
+    def obtenir_id_categorie(nom):
+        """Id de la catégorie portant ce nom (lecture en cache), ou None"""
+        return Categorie.get_id_par_nom(nom)
+    
+    @staticmethod
+    def obtenir_nom_categorie(categorie_id):
+        """Nom de la catégorie (lecture en cache), ou 'Inconnue'"""
+        return Categorie.get_nom_par_id(categorie_id)
+    
     @staticmethod
     def ajouter_categorie(nom, description):
         try:
@@ -1,7 +1,20 @@
 # controllers/gestion_stock.py
+from models.mouvement_stock import MouvementStock
 from models.produit import Produit
 import sqlite3
+from collections import namedtuple
 from datetime import datetime
+from utils.dates import bornes_jour, bornes_mois
+
+# Chiffres de l'écran d'accueil, calculés en une seule requête
+TableauDeBord = namedtuple('TableauDeBord', [
+    'total_produits',
+    'valeur_achat',  # Valeur du stock au prix d'achat
+    'valeur_vente',  # Valeur du stock au prix de vente
+    'produits_alerte',  # Produits au niveau ou sous le seuil de réapprovisionnement
+    'ventes_jour',
+    'benefice_mensuel',
+])
 
 class GestionStock:
     @staticmethod
@@ -46,7 +59,7 @@ class GestionStock:
             if produit.quantite + quantite_ajout < 0:
                 return False, "L'ajustement donnerait un stock négatif."
             
-            if Produit.mettre_a_jour_stock(produit_id, quantite_ajout):
+            if Produit.mettre_a_jour_stock(produit_id, quantite_ajout, raison):
                 return True, "Stock ajusté avec succès."
             else:
                 return False, "Erreur lors de l'ajustement du stock."
@@ -54,6 +67,41 @@ class GestionStock:
         except Exception as e:
             return False, f"Erreur lors de l'ajustement du stock: {str(e)}"
     
+    @staticmethod
+    def obtenir_historique_stock(produit_id, limite=100):
+        """
+        Récupère les derniers mouvements de stock d'un produit
+        
+        Returns:
+            Liste de MouvementStock, du plus récent au plus ancien
+        """
+        return MouvementStock.get_historique(produit_id, limite)
+    
+    @staticmethod
+    def obtenir_stock_au(produit_id, date):
+        """
+        Calcule le stock d'un produit à une date passée
+        
+        Args:
+            produit_id: ID du produit
+            date: Instant (datetime, date ou 'YYYY-MM-DD HH:MM:SS')
+            
+        Returns:
+            Quantité en stock à cet instant
+        """
+        return MouvementStock.stock_au(produit_id, date)
+    
+    @staticmethod
+    def rapprocher_stock():
+        """
+        Vérifie que le stock des produits correspond au registre des mouvements
+        
+        Returns:
+            (success, ecarts) où ecarts est une liste de (produit_id, quantite, quantite_registre)
+        """
+        ecarts = MouvementStock.rapprocher()
+        return not ecarts, ecarts
+    
     @staticmethod
     def verifier_disponibilite(produit_id, quantite_demandee):
         """
@@ -98,4 +146,38 @@ class GestionStock:
         Returns:
             Liste de produits en alerte
         """
-        return Produit.get_produits_faible_stock()
\ No newline at end of file
+        return Produit.get_produits_faible_stock()
+    
+    @staticmethod
+    def obtenir_tableau_de_bord():
+        """
+        Calcule les chiffres du tableau de bord en une seule requête SQL
+        
+        Les agrégats sont faits par SQLite : aucun produit n'est chargé en mémoire.
+        
+        Returns:
+            TableauDeBord
+            
+        Raises:
+            sqlite3.Error en cas d'erreur de base de données
+        """
+        debut_jour, fin_jour = bornes_jour()
+        debut_mois, fin_mois = bornes_mois()
+        conn = Produit.get_db_connection()
+        
+        row = conn.execute('''
+        SELECT s.total_produits, s.valeur_achat, s.valeur_vente, s.produits_alerte,
+            (SELECT COALESCE(SUM(montant_total), 0) FROM ventes
+             WHERE date_vente >= ? AND date_vente < ?),
+            (SELECT COALESCE(SUM(chiffre_affaires - cout), 0) FROM ventes_jour_produit
+             WHERE jour >= ? AND jour < ?)
+        FROM (
+            SELECT COUNT(*) AS total_produits,
+                COALESCE(SUM(prix_achat * quantite), 0) AS valeur_achat,
+                COALESCE(SUM(prix_vente * quantite), 0) AS valeur_vente,
+                COALESCE(SUM(quantite <= seuil_reapprovisionnement), 0) AS produits_alerte
+            FROM produits
+        ) s
+        ''', (debut_jour, fin_jour, debut_mois, fin_mois)).fetchone()
+        
+        return TableauDeBord(*row)
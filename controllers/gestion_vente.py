@@ -1,10 +1,12 @@
 
 # controllers/gestion_vente.py
 import sqlite3
-from models.vente import Vente, DetailVente
+from models.vente import Vente, DetailVente, StockInsuffisant
 from models.client import Client
+from models.cumul_vente import CumulVentes
 from models.produit import Produit
-from datetime import date
+from utils.dates import bornes_jour, bornes_mois
+from utils.pagination import TAILLE_PAGE
 
 class GestionVente:
     
@@ -30,16 +32,24 @@ class GestionVente:
             # Créer la vente
             vente = Vente(client_id=client_id, notes=notes)
             
+            # Charger tout le panier en une seule requête
+            produits = Produit.get_by_ids(produit_id for produit_id, _ in produits_quantites)
+            
+            # Quantité totale demandée par produit (un produit peut apparaître sur plusieurs lignes)
+            quantites_demandees = {}
+            for produit_id, quantite in produits_quantites:
+                quantites_demandees[produit_id] = quantites_demandees.get(produit_id, 0) + quantite
+            
             # Ajouter les détails de vente
             montant_total = 0
             for produit_id, quantite in produits_quantites:
-                produit = Produit.get_by_id(produit_id)
+                produit = produits.get(produit_id)
                 if not produit:
                     return False, None, f"Produit ID {produit_id} non trouvé."
                 
-                # Vérifier si le stock est suffisant
-                if produit.quantite < quantite:
-                    return False, None, f"Stock insuffisant pour {produit.nom} (Disponible: {produit.quantite}, Demandé: {quantite})."
+                # Vérification préalable (la réservation atomique est faite par Vente.save)
+                if produit.quantite < quantites_demandees[produit_id]:
+                    return False, None, f"Stock insuffisant pour {produit.nom} (Disponible: {produit.quantite}, Demandé: {quantites_demandees[produit_id]})."
                 
                 # Créer le détail de vente
                 detail = DetailVente(
@@ -56,6 +66,14 @@ class GestionVente:
             
             return True, vente_id, "Vente enregistrée avec succès."
             
+        except StockInsuffisant as e:
+            # Une autre caisse a vendu le stock entre la vérification et l'enregistrement
+            produits = Produit.get_by_ids(e.demandes)
+            for produit_id, quantite in e.demandes.items():
+                produit = produits.get(produit_id)
+                if produit and produit.quantite < quantite:
+                    return False, None, f"Stock insuffisant pour {produit.nom} (Disponible: {produit.quantite}, Demandé: {quantite})."
+            return False, None, "Stock insuffisant."
         except Exception as e:
             return False, None, f"Erreur lors de la création de la vente: {str(e)}"
     
@@ -71,7 +89,8 @@ class GestionVente:
             (success, message)
         """
         try:
-            vente = Vente.get_by_id(vente_id)
+            # Les lignes sont relues par delete(), dans la transaction d'annulation
+            vente = Vente.get_by_id(vente_id, avec_details=False)
             if not vente:
                 return False, "Vente non trouvée."
             
@@ -103,13 +122,44 @@ class GestionVente:
         
         Args:
             date_debut: Date de début (format YYYY-MM-DD)
-            date_fin: Date de fin (format YYYY-MM-DD)
+            date_fin: Date de fin incluse (format YYYY-MM-DD)
             
         Returns:
             Liste de ventes
         """
         return Vente.get_ventes_periode(date_debut, date_fin)
     
+    @staticmethod
+    def obtenir_ventes_page(curseur=None, taille=TAILLE_PAGE, date_debut=None, date_fin=None):
+        """
+        Récupère une page de ventes (les plus récentes d'abord), éventuellement sur une période
+        
+        Args:
+            curseur: Curseur renvoyé avec la page précédente (None pour la première page)
+            taille: Nombre de ventes par page
+            date_debut: Date de début (format YYYY-MM-DD), avec date_fin
+            date_fin: Date de fin incluse (format YYYY-MM-DD), avec date_debut
+            
+        Returns:
+            (liste de ventes, curseur de la page suivante ou None)
+        """
+        return Vente.get_page(curseur, taille, date_debut, date_fin)
+    
+    @staticmethod
+    def curseur_ventes_au_rang(rang, date_debut=None, date_fin=None):
+        """
+        Curseur de obtenir_ventes_page désignant la vente de rang donné (saut direct dans la liste)
+        
+        Returns:
+            Curseur, ou None si la liste compte moins de rang + 1 ventes
+        """
+        return Vente.cle_au_rang(rang, date_debut, date_fin)
+    
+    @staticmethod
+    def compter_ventes(date_debut=None, date_fin=None):
+        """Nombre de ventes sur la période (dates incluses, format YYYY-MM-DD) ou au total"""
+        return Vente.compter(date_debut, date_fin)
+    
     @staticmethod
     def obtenir_vente_details(vente_id):
         """
@@ -126,10 +176,8 @@ class GestionVente:
     @staticmethod
     def get_ventes_jour():
         try:
-            today = date.today().strftime("%Y-%m-%d")
-            ventes = Vente.get_ventes_jour()
-            total = sum(v.prix_total for v in ventes)
-            return total
+            debut, fin = bornes_jour()
+            return Vente.get_total_periode(debut, fin)
         except sqlite3.Error as e:
             return f"Erreur: {str(e)}"
         
@@ -138,24 +186,28 @@ class GestionVente:
         """
         Calcule le bénéfice mensuel
         
+        Lu dans les cumuls quotidiens (une ligne par jour et par produit vendu).
+        
         Returns:
             Bénéfice mensuel
         """
         try:
-            conn = Vente.get_db_connection()
-            cursor = conn.cursor()
-            
-            # Calculer le bénéfice pour le mois en cours
-            cursor.execute('''
-            SELECT SUM((dv.prix_unitaire - p.prix_achat) * dv.quantite) AS benefice
-            FROM details_vente dv
-            JOIN produits p ON dv.produit_id = p.id
-            JOIN ventes v ON dv.vente_id = v.id
-            WHERE strftime('%Y-%m', v.date_vente) = strftime('%Y-%m', 'now')
-            ''')
-            
-            benefice = cursor.fetchone()[0] or 0.0
-            conn.close()
-            return benefice
+            debut, fin = bornes_mois()
+            return CumulVentes.get_benefice_periode(debut, fin)
         except sqlite3.Error as e:
-            return f"Erreur: {str(e)}"
\ No newline at end of file
+            return f"Erreur: {str(e)}"
+    
+    @staticmethod
+    def obtenir_synthese_ventes(date_debut, date_fin, regroupement='jour'):
+        """
+        Synthèse des ventes d'une période (rapports mensuels, annuels, par produit...)
+        
+        Args:
+            date_debut: Premier jour
+            date_fin: Dernier jour inclus
+            regroupement: 'jour', 'mois', 'annee', 'produit' ou 'categorie'
+            
+        Returns:
+            Liste de tuples (clé, quantite, chiffre_affaires, cout, benefice, nb_tickets)
+        """
+        return CumulVentes.get_synthese(date_debut, date_fin, regroupement)
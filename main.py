@@ -38,8 +38,16 @@ class Application(tk.Tk):
 if __name__ == "__main__":
     from utils.db_setup import setup_database
     
+    from models.mouvement_stock import MouvementStock
+    from utils.compteur_requetes import surveillance_demandee, surveiller_controleurs
+    
     # Initialiser la base de données
     setup_database()
+    MouvementStock.creer_instantanes_si_necessaire()
+    
+    # Mode débogage : requêtes comptées par appel de contrôleur, répétitions signalées
+    if surveillance_demandee():
+        surveiller_controleurs()
     
     # Lancer l'application
     app = Application()
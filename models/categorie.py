@@ -1,53 +1,120 @@
+# models/categorie.py
 import sqlite3
+import threading
+from utils.db_manager import (get_connection, transaction, en_transaction, apres_transaction,
+                              enregistrer_invalidation)
 
 class Categorie:
-    def __init__(self, id=None, name=None, description=None):
+    # Cache partagé par tout le processus : ({id: ligne SQL (tuple)}, {nom: id}).
+    # Chargé au premier accès, invalidé par save() et delete(). Chaque lecture construit
+    # des Categorie neuves, que l'appelant peut modifier sans altérer le cache.
+    _cache = None
+    _verrou = threading.Lock()
+
+    __slots__ = ('id', 'nom', 'description')
+
+    def __init__(self, id=None, nom="", description=""):
         self.id = id
-        self.name = name
+        self.nom = nom
         self.description = description
 
+    @staticmethod
+    def get_db_connection():
+        return get_connection()
+
+    @classmethod
+    def _charger_cache(cls):
+        cache = cls._cache
+        if cache is None:
+            if en_transaction():
+                # Lecture pouvant inclure des écritures non validées : pas de mise en cache
+                return cls._lire_categories()
+            with cls._verrou:
+                if cls._cache is None:
+                    cls._cache = cls._lire_categories()
+                cache = cls._cache
+        return cache
+
+    @classmethod
+    def _lire_categories(cls):
+        cursor = cls.get_db_connection().execute('SELECT * FROM categories ORDER BY nom')
+        par_id = {row[0]: tuple(row) for row in cursor.fetchall()}
+        return par_id, {row[1]: row[0] for row in par_id.values()}
+
+    @classmethod
+    def invalider_cache(cls):
+        """Force le rechargement des catégories au prochain accès"""
+        with cls._verrou:
+            cls._cache = None
+
     def save(self):
-        """Insère ou met à jour une catégorie en base de données"""
-        connection = sqlite3.connect("magasin.db")
-        cursor = connection.cursor()
-        if self.id:  # Mise à jour si ID existe
-            cursor.execute("UPDATE categories SET name = ?, description = ? WHERE id = ?", 
-                           (self.name, self.description, self.id))
-        else:  # Insertion sinon
-            cursor.execute("INSERT INTO categories (name, description) VALUES (?, ?)", 
-                           (self.name, self.description))
-            self.id = cursor.lastrowid  # Récupérer l'ID généré
-        connection.commit()
-        connection.close()
+        try:
+            with transaction() as cursor:
+                if self.id is None:
+                    # Nouvelle catégorie
+                    cursor.execute('''
+                    INSERT INTO categories (nom, description)
+                    VALUES (?, ?)
+                    ''', (self.nom, self.description))
+                    self.id = cursor.lastrowid
+                else:
+                    # Mise à jour d'une catégorie existante
+                    cursor.execute('''
+                    UPDATE categories
+                    SET nom=?, description=?
+                    WHERE id=?
+                    ''', (self.nom, self.description, self.id))
+        finally:
+            # Après la validation, y compris quand save/delete s'exécute dans une transaction englobante
+            apres_transaction(self.invalider_cache)
+
         return self.id
 
+    @classmethod
+    def get_all(cls):
+        # Les catégories sont chargées triées par nom
+        return [cls(*row) for row in cls._charger_cache()[0].values()]
+
+    @classmethod
+    def get_by_id(cls, id):
+        row = cls._charger_cache()[0].get(id)
+        return cls(*row) if row else None
+
+    @classmethod
+    def get_id_par_nom(cls, nom):
+        """Retourne l'id de la catégorie portant ce nom, ou None"""
+        return cls._charger_cache()[1].get(nom)
+
+    @classmethod
+    def get_nom_par_id(cls, id, defaut="Inconnue"):
+        """Retourne le nom de la catégorie, ou defaut si elle n'existe pas"""
+        row = cls._charger_cache()[0].get(id)
+        return row[1] if row else defaut
+
     def delete(self):
-        """Supprime la catégorie de la base de données"""
-        if self.id:
-            connection = sqlite3.connect("magasin.db")
-            cursor = connection.cursor()
-            cursor.execute("DELETE FROM categories WHERE id = ?", (self.id,))
-            connection.commit()
-            connection.close()
-            return True
-        return False
+        if self.id is None:
+            return False
 
-    @staticmethod
-    def get_all():
-        """Retourne toutes les catégories"""
-        connection = sqlite3.connect("magasin.db")
-        cursor = connection.cursor()
-        cursor.execute("SELECT id, name, description FROM categories")
-        categories = [Categorie(*row) for row in cursor.fetchall()]
-        connection.close()
-        return categories
+        try:
+            with transaction() as cursor:
+                # Vérifier si des produits utilisent cette catégorie
+                cursor.execute('SELECT COUNT(*) FROM produits WHERE categorie_id=?', (self.id,))
+                count = cursor.fetchone()[0]
 
-    @staticmethod
-    def get_by_id(id):
-        """Retourne une catégorie spécifique par son ID"""
-        connection = sqlite3.connect("magasin.db")
-        cursor = connection.cursor()
-        cursor.execute("SELECT id, name, description FROM categories WHERE id = ?", (id,))
-        row = cursor.fetchone()
-        connection.close()
-        return Categorie(*row) if row else None
+                if count > 0:
+                    # Il existe des produits utilisant cette catégorie
+                    return False
+
+                cursor.execute('DELETE FROM categories WHERE id=?', (self.id,))
+                result = cursor.rowcount > 0
+
+        except sqlite3.Error:
+            result = False
+        finally:
+            apres_transaction(self.invalider_cache)
+
+        return result
+
+
+# Un changement de base (configurer) rend le cache caduc
+enregistrer_invalidation(Categorie.invalider_cache)
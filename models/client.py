@@ -1,10 +1,13 @@
 
 # models/client.py
 import sqlite3
-import os
 from datetime import datetime
+from utils.db_manager import get_connection, transaction, recherche_plein_texte_disponible
+from utils.recherche import expression_fts
 
 class Client:
+    __slots__ = ('id', 'nom', 'adresse', 'telephone', 'email', 'notes')
+    
     def __init__(self, id=None, nom="", adresse="", telephone="", email="", notes=""):
         self.id = id
         self.nom = nom
@@ -13,30 +16,30 @@ class Client:
         self.email = email
         self.notes = notes
     
+    @classmethod
+    def _depuis_ligne(cls, row):
+        """Construit l'objet depuis une ligne SELECT * FROM clients (colonnes dans l'ordre de __init__)"""
+        return cls(*row)
+    
     @staticmethod
     def get_db_connection():
-        db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'db', 'database.db')
-        return sqlite3.connect(db_path)
+        return get_connection()
     
     def save(self):
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
+        with transaction() as cursor:
+            if self.id is None:
+                cursor.execute('''
+                INSERT INTO clients (nom, adresse, telephone, email, notes) 
+                VALUES (?, ?, ?, ?, ?)
+                ''', (self.nom, self.adresse, self.telephone, self.email, self.notes))
+                self.id = cursor.lastrowid
+            else:
+                cursor.execute('''
+                UPDATE clients 
+                SET nom=?, adresse=?, telephone=?, email=?, notes=?
+                WHERE id=?
+                ''', (self.nom, self.adresse, self.telephone, self.email, self.notes, self.id))
         
-        if self.id is None:
-            cursor.execute('''
-            INSERT INTO clients (nom, adresse, telephone, email, notes) 
-            VALUES (?, ?, ?, ?, ?)
-            ''', (self.nom, self.adresse, self.telephone, self.email, self.notes))
-            self.id = cursor.lastrowid
-        else:
-            cursor.execute('''
-            UPDATE clients 
-            SET nom=?, adresse=?, telephone=?, email=?, notes=?
-            WHERE id=?
-            ''', (self.nom, self.adresse, self.telephone, self.email, self.notes, self.id))
-        
-        conn.commit()
-        conn.close()
         return self.id
     
     @classmethod
@@ -47,16 +50,7 @@ class Client:
         cursor.execute('SELECT * FROM clients')
         clients_data = cursor.fetchall()
         
-        conn.close()
-        
-        return [cls(
-            id=row[0],
-            nom=row[1],
-            adresse=row[2],
-            telephone=row[3],
-            email=row[4],
-            notes=row[5]
-        ) for row in clients_data]
+        return [cls._depuis_ligne(row) for row in clients_data]
     
     @classmethod
     def get_by_id(cls, id):
@@ -66,17 +60,8 @@ class Client:
         cursor.execute('SELECT * FROM clients WHERE id=?', (id,))
         client_data = cursor.fetchone()
         
-        conn.close()
-        
         if client_data:
-            return cls(
-                id=client_data[0],
-                nom=client_data[1],
-                adresse=client_data[2],
-                telephone=client_data[3],
-                email=client_data[4],
-                notes=client_data[5]
-            )
+            return cls._depuis_ligne(client_data)
         return None
     
     @classmethod
@@ -84,39 +69,35 @@ class Client:
         conn = cls.get_db_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-        SELECT * FROM clients 
-        WHERE nom LIKE ? OR adresse LIKE ? OR telephone LIKE ? OR email LIKE ?
-        ''', (f'%{term}%', f'%{term}%', f'%{term}%', f'%{term}%'))
+        expression = expression_fts(term)
+        if expression and recherche_plein_texte_disponible('clients_fts'):
+            # Index plein texte : préfixes, sans accents, classé par pertinence (bm25)
+            cursor.execute('''
+            SELECT c.* FROM clients_fts 
+            JOIN clients c ON c.id = clients_fts.rowid
+            WHERE clients_fts MATCH ?
+            ORDER BY clients_fts.rank
+            ''', (expression,))
+        else:
+            cursor.execute('''
+            SELECT * FROM clients 
+            WHERE nom LIKE ? OR adresse LIKE ? OR telephone LIKE ? OR email LIKE ?
+            ''', (f'%{term}%', f'%{term}%', f'%{term}%', f'%{term}%'))
         
         clients_data = cursor.fetchall()
         
-        conn.close()
-        
-        return [cls(
-            id=row[0],
-            nom=row[1],
-            adresse=row[2],
-            telephone=row[3],
-            email=row[4],
-            notes=row[5]
-        ) for row in clients_data]
+        return [cls._depuis_ligne(row) for row in clients_data]
     
     def delete(self):
         if self.id is None:
             return False
         
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('DELETE FROM clients WHERE id=?', (self.id,))
-            conn.commit()
-            result = cursor.rowcount > 0
+            with transaction() as cursor:
+                cursor.execute('DELETE FROM clients WHERE id=?', (self.id,))
+                result = cursor.rowcount > 0
         except sqlite3.Error:
             result = False
-        finally:
-            conn.close()
         
         return result
     
@@ -134,12 +115,4 @@ class Client:
         
         ventes_data = cursor.fetchall()
         
-        conn.close()
-        
-        return [Vente(
-            id=row[0],
-            client_id=row[1],
-            date_vente=row[2],
-            montant_total=row[3],
-            notes=row[4]
-        ) for row in ventes_data]
+        return [Vente._depuis_ligne(row) for row in ventes_data]
@@ -0,0 +1,174 @@
+# models/cumul_vente.py
+from utils.db_manager import get_connection, transaction
+from utils.dates import bornes_periode
+
+class CumulVentes:
+    """
+    Cumuls quotidiens des ventes par produit (table ventes_jour_produit)
+    
+    Une ligne par jour et par produit : quantité, chiffre d'affaires, coût d'achat et
+    nombre de tickets. Vente.save et Vente.delete les tiennent à jour dans leur propre
+    transaction ; un rapport sur un mois ou une année lit quelques centaines de lignes
+    au lieu de toutes les lignes de vente de la période.
+    """
+    
+    # Regroupements de get_synthese : clé -> expression SQL
+    REGROUPEMENTS = {
+        'jour': 'jour',
+        'mois': 'substr(jour, 1, 7)',
+        'annee': 'substr(jour, 1, 4)',
+        'produit': 'produit_id',
+        'categorie': 'categorie_id',
+    }
+    
+    @staticmethod
+    def get_db_connection():
+        return get_connection()
+    
+    @staticmethod
+    def ajouter_vente(cursor, vente_id):
+        """
+        Ajoute une vente enregistrée (vente et détails déjà insérés) aux cumuls de son jour
+        
+        Le coût est celui de chaque ligne (cout_unitaire, prix d'achat au moment de la vente).
+        
+        Args:
+            cursor: Curseur de la transaction en cours
+            vente_id: ID de la vente
+        """
+        cursor.execute('''
+        INSERT INTO ventes_jour_produit (jour, produit_id, categorie_id, quantite, chiffre_affaires, cout, nb_tickets)
+        SELECT substr(v.date_vente, 1, 10), dv.produit_id, p.categorie_id,
+            SUM(dv.quantite), SUM(dv.quantite * dv.prix_unitaire),
+            SUM(dv.quantite * dv.cout_unitaire), 1
+        FROM ventes v
+        JOIN details_vente dv ON dv.vente_id = v.id
+        LEFT JOIN produits p ON p.id = dv.produit_id
+        WHERE v.id = ?
+        GROUP BY dv.produit_id
+        ON CONFLICT (jour, produit_id) DO UPDATE SET
+            categorie_id = excluded.categorie_id,
+            quantite = quantite + excluded.quantite,
+            chiffre_affaires = chiffre_affaires + excluded.chiffre_affaires,
+            cout = cout + excluded.cout,
+            nb_tickets = nb_tickets + 1
+        ''', (vente_id,))
+    
+    @staticmethod
+    def retirer_vente(cursor, vente_id):
+        """
+        Retire une vente (encore présente en base) des cumuls de son jour
+        
+        Le coût retiré est celui que ajouter_vente a compté (cout_unitaire des lignes).
+        
+        Args:
+            cursor: Curseur de la transaction en cours
+            vente_id: ID de la vente
+        """
+        row = cursor.execute('SELECT substr(date_vente, 1, 10) FROM ventes WHERE id=?', (vente_id,)).fetchone()
+        if not row:
+            return
+        jour = row[0]
+        
+        cursor.execute('''
+        UPDATE ventes_jour_produit AS c
+        SET cout = c.cout - r.cout,
+            quantite = c.quantite - r.quantite,
+            chiffre_affaires = c.chiffre_affaires - r.chiffre_affaires,
+            nb_tickets = c.nb_tickets - 1
+        FROM (
+            SELECT produit_id, SUM(quantite) AS quantite, SUM(quantite * prix_unitaire) AS chiffre_affaires,
+                SUM(quantite * cout_unitaire) AS cout
+            FROM details_vente
+            WHERE vente_id = ?
+            GROUP BY produit_id
+        ) r
+        WHERE c.jour = ? AND c.produit_id = r.produit_id
+        ''', (vente_id, jour))
+        cursor.execute('DELETE FROM ventes_jour_produit WHERE jour = ? AND nb_tickets <= 0', (jour,))
+    
+    @staticmethod
+    def recalculer(cursor):
+        """
+        Recalcule entièrement les cumuls depuis les ventes
+        
+        Le coût vient du cout_unitaire des lignes, comme pour ajouter_vente : le résultat est
+        identique aux cumuls tenus à jour, quels que soient les prix d'achat actuels.
+        
+        Args:
+            cursor: Curseur de la transaction en cours
+        """
+        cursor.execute('DELETE FROM ventes_jour_produit')
+        cursor.execute('''
+        INSERT INTO ventes_jour_produit (jour, produit_id, categorie_id, quantite, chiffre_affaires, cout, nb_tickets)
+        SELECT substr(v.date_vente, 1, 10), dv.produit_id, p.categorie_id,
+            SUM(dv.quantite), SUM(dv.quantite * dv.prix_unitaire),
+            SUM(dv.quantite * dv.cout_unitaire), COUNT(DISTINCT v.id)
+        FROM ventes v
+        JOIN details_vente dv ON dv.vente_id = v.id
+        LEFT JOIN produits p ON p.id = dv.produit_id
+        GROUP BY 1, dv.produit_id
+        ''')
+    
+    @classmethod
+    def reconstruire(cls):
+        """
+        Recalcule tous les cumuls depuis les ventes (après un import ou une correction manuelle)
+        
+        Returns:
+            Nombre de lignes de cumul
+        """
+        with transaction() as cursor:
+            cls.recalculer(cursor)
+            return cursor.execute('SELECT COUNT(*) FROM ventes_jour_produit').fetchone()[0]
+    
+    @classmethod
+    def get_benefice_periode(cls, debut, fin):
+        """
+        Bénéfice (chiffre d'affaires - coût d'achat) dans l'intervalle [debut, fin)
+        
+        Args:
+            debut: Premier jour inclus ('YYYY-MM-DD')
+            fin: Jour exclu
+            
+        Returns:
+            Bénéfice
+        """
+        conn = cls.get_db_connection()
+        
+        benefice = conn.execute('''
+        SELECT SUM(chiffre_affaires - cout) FROM ventes_jour_produit WHERE jour >= ? AND jour < ?
+        ''', (debut, fin)).fetchone()[0]
+        
+        return benefice or 0.0
+    
+    @classmethod
+    def get_synthese(cls, date_debut, date_fin, regroupement='jour'):
+        """
+        Synthèse des ventes d'une période, regroupée par jour, mois, année, produit ou catégorie
+        
+        Args:
+            date_debut: Premier jour (date, datetime ou 'YYYY-MM-DD')
+            date_fin: Dernier jour inclus
+            regroupement: Clé de REGROUPEMENTS
+            
+        Returns:
+            Liste de tuples (clé, quantite, chiffre_affaires, cout, benefice, nb_tickets)
+            triée par clé ; nb_tickets additionne les tickets de chaque produit
+            
+        Raises:
+            ValueError si le regroupement est inconnu
+        """
+        if regroupement not in cls.REGROUPEMENTS:
+            raise ValueError(f"Regroupement inconnu: {regroupement}")
+        cle = cls.REGROUPEMENTS[regroupement]
+        conn = cls.get_db_connection()
+        
+        return conn.execute(f'''
+        SELECT {cle}, SUM(quantite), SUM(chiffre_affaires), SUM(cout),
+            SUM(chiffre_affaires - cout), SUM(nb_tickets)
+        FROM ventes_jour_produit
+        WHERE jour >= ? AND jour < ?
+        GROUP BY 1
+        ORDER BY 1
+        ''', bornes_periode(date_debut, date_fin)).fetchall()
@@ -0,0 +1,227 @@
+# models/mouvement_stock.py
+from utils.db_manager import get_connection, transaction
+from utils.dates import cle_date
+
+# Types de mouvement (colonne type_mouvement)
+OUVERTURE = 'ouverture'  # Stock des produits existants à la création du registre
+CREATION = 'creation'
+MODIFICATION = 'modification'  # Quantité saisie dans la fiche produit
+SUPPRESSION = 'suppression'
+AJUSTEMENT = 'ajustement'
+VENTE = 'vente'
+ANNULATION_VENTE = 'annulation_vente'
+ACHAT = 'achat'
+ANNULATION_ACHAT = 'annulation_achat'
+
+# Borne supérieure des ID de mouvement (entier SQLite maximal)
+MOUVEMENT_MAX = 2 ** 63 - 1
+
+# Nombre de mouvements depuis le dernier instantané au-delà duquel creer_instantanes_si_necessaire agit
+SEUIL_INSTANTANES = 1000
+
+class MouvementStock:
+    """
+    Registre des mouvements de stock (table mouvements_stock, en ajout seul)
+    
+    Chaque modification de produits.quantite y ajoute une ligne (type, référence, produit,
+    variation, date) dans la même transaction. Les instantanés (table stocks_instantanes)
+    donnent le stock de chaque produit après un mouvement donné : le stock à une date se
+    calcule à partir de l'instantané le plus proche et des quelques mouvements qui suivent.
+    """
+    __slots__ = ('id', 'produit_id', 'type_mouvement', 'reference', 'delta', 'date_mouvement', 'motif')
+    
+    def __init__(self, id=None, produit_id=None, type_mouvement=None, reference=None, delta=0,
+                 date_mouvement=None, motif=None):
+        self.id = id
+        self.produit_id = produit_id
+        self.type_mouvement = type_mouvement
+        self.reference = reference  # ID de la vente, de l'achat ou du produit à l'origine du mouvement
+        self.delta = delta
+        self.date_mouvement = date_mouvement
+        self.motif = motif
+    
+    @classmethod
+    def _depuis_ligne(cls, row):
+        """Construit l'objet depuis une ligne SELECT * FROM mouvements_stock (colonnes dans l'ordre de __init__)"""
+        return cls(*row)
+    
+    @staticmethod
+    def get_db_connection():
+        return get_connection()
+    
+    @staticmethod
+    def enregistrer(cursor, type_mouvement, reference, deltas, motif=None):
+        """
+        Ajoute des mouvements au registre (variations nulles ignorées)
+        
+        Args:
+            cursor: Curseur de la transaction qui modifie le stock
+            type_mouvement: Type de mouvement (constantes du module)
+            reference: ID de la vente, de l'achat ou du produit concerné
+            deltas: Itérable de (produit_id, variation de quantité)
+            motif: Texte libre (raison d'un ajustement)
+        """
+        date = cle_date()
+        cursor.executemany('''
+        INSERT INTO mouvements_stock (produit_id, type_mouvement, reference, delta, date_mouvement, motif)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', [(produit_id, type_mouvement, reference, delta, date, motif)
+              for produit_id, delta in deltas if delta])
+    
+    @staticmethod
+    def enregistrer_ecart(cursor, type_mouvement, produit_id, nouvelle_quantite):
+        """
+        Enregistre l'écart entre le stock actuel d'un produit et la quantité qui va le remplacer
+        
+        À appeler avant l'UPDATE (ou le DELETE) de la ligne produits.
+        
+        Args:
+            cursor: Curseur de la transaction qui modifie le stock
+            type_mouvement: MODIFICATION ou SUPPRESSION
+            produit_id: ID du produit
+            nouvelle_quantite: Quantité après la modification (0 pour une suppression)
+        """
+        cursor.execute('''
+        INSERT INTO mouvements_stock (produit_id, type_mouvement, reference, delta, date_mouvement)
+        SELECT id, ?, id, ? - COALESCE(quantite, 0), ?
+        FROM produits
+        WHERE id = ? AND COALESCE(quantite, 0) != ?
+        ''', (type_mouvement, nouvelle_quantite, cle_date(), produit_id, nouvelle_quantite))
+    
+    @staticmethod
+    def enregistrer_stocks_initiaux(cursor, type_mouvement, apres_id=0):
+        """
+        Enregistre le stock des produits d'identifiant supérieur à apres_id (insertion en lot, ouverture du registre)
+        
+        Args:
+            cursor: Curseur de la transaction qui a inséré les produits
+            type_mouvement: CREATION ou OUVERTURE
+            apres_id: Plus grand ID de produit existant avant l'insertion
+        """
+        cursor.execute('''
+        INSERT INTO mouvements_stock (produit_id, type_mouvement, reference, delta, date_mouvement)
+        SELECT id, ?, id, quantite, ?
+        FROM produits
+        WHERE id > ? AND quantite != 0
+        ''', (type_mouvement, cle_date(), apres_id))
+    
+    @classmethod
+    def get_historique(cls, produit_id, limite=100):
+        """Derniers mouvements d'un produit, du plus récent au plus ancien"""
+        conn = cls.get_db_connection()
+        
+        rows = conn.execute('''
+        SELECT * FROM mouvements_stock WHERE produit_id = ? ORDER BY id DESC LIMIT ?
+        ''', (produit_id, limite)).fetchall()
+        
+        return [cls._depuis_ligne(row) for row in rows]
+    
+    @classmethod
+    def stock_au(cls, produit_id, date=None):
+        """
+        Stock d'un produit à une date, d'après le registre
+        
+        Args:
+            produit_id: ID du produit
+            date: Instant (datetime, date ou clé de date ; maintenant si None), inclus
+            
+        Returns:
+            Quantité en stock
+        """
+        date = cle_date(date)
+        conn = cls.get_db_connection()
+        
+        # Dernier instantané à la date, et premier instantané postérieur : les mouvements
+        # à lire sont entre les deux (les dates des mouvements suivent l'ordre des ID)
+        instantane = conn.execute('''
+        SELECT mouvement_id, quantite FROM stocks_instantanes
+        WHERE produit_id = ? AND date_instantane <= ?
+        ORDER BY mouvement_id DESC
+        LIMIT 1
+        ''', (produit_id, date)).fetchone()
+        mouvement_id, quantite = instantane or (0, 0)
+        
+        suivant = conn.execute('''
+        SELECT mouvement_id FROM stocks_instantanes
+        WHERE produit_id = ? AND mouvement_id > ?
+        ORDER BY mouvement_id
+        LIMIT 1
+        ''', (produit_id, mouvement_id)).fetchone()
+        borne = suivant[0] if suivant else MOUVEMENT_MAX
+        
+        suite = conn.execute('''
+        SELECT SUM(delta) FROM mouvements_stock
+        WHERE produit_id = ? AND id > ? AND id <= ? AND date_mouvement <= ?
+        ''', (produit_id, mouvement_id, borne, date)).fetchone()[0]
+        
+        return quantite + (suite or 0)
+    
+    @classmethod
+    def rapprocher(cls):
+        """
+        Compare le stock de la table produits avec celui du registre
+        
+        Returns:
+            Liste de tuples (produit_id, quantite en table, quantite selon le registre)
+            pour les produits en écart (vide si tout concorde)
+        """
+        conn = cls.get_db_connection()
+        
+        # Dernier instantané de chaque produit : avec MAX(), SQLite renvoie la quantité de la même ligne
+        return conn.execute('''
+        SELECT id, quantite, registre FROM (
+            SELECT p.id, COALESCE(p.quantite, 0) AS quantite,
+                COALESCE(i.quantite, 0) + COALESCE((
+                    SELECT SUM(m.delta) FROM mouvements_stock m
+                    WHERE m.produit_id = p.id AND m.id > COALESCE(i.mouvement_id, 0)
+                ), 0) AS registre
+            FROM produits p
+            LEFT JOIN (
+                SELECT produit_id, MAX(mouvement_id) AS mouvement_id, quantite
+                FROM stocks_instantanes
+                GROUP BY produit_id
+            ) i ON i.produit_id = p.id
+        )
+        WHERE quantite != registre
+        ORDER BY id
+        ''').fetchall()
+    
+    @classmethod
+    def creer_instantanes(cls):
+        """
+        Enregistre un instantané pour chaque produit ayant eu des mouvements depuis son dernier instantané
+        
+        Returns:
+            Nombre d'instantanés créés
+        """
+        with transaction() as cursor:
+            cursor.execute('''
+            INSERT INTO stocks_instantanes (produit_id, mouvement_id, date_instantane, quantite)
+            SELECT m.produit_id, MAX(m.id), MAX(m.date_mouvement), COALESCE(i.quantite, 0) + SUM(m.delta)
+            FROM mouvements_stock m
+            LEFT JOIN (
+                SELECT produit_id, MAX(mouvement_id) AS mouvement_id, quantite
+                FROM stocks_instantanes
+                GROUP BY produit_id
+            ) i ON i.produit_id = m.produit_id
+            WHERE m.id > COALESCE(i.mouvement_id, 0)
+            GROUP BY m.produit_id
+            ''')
+            return cursor.rowcount
+    
+    @classmethod
+    def creer_instantanes_si_necessaire(cls, seuil=SEUIL_INSTANTANES):
+        """
+        Crée les instantanés si au moins seuil mouvements ont été enregistrés depuis les derniers
+        
+        Returns:
+            Nombre d'instantanés créés
+        """
+        conn = cls.get_db_connection()
+        
+        nouveaux = conn.execute('''
+        SELECT COUNT(*) FROM mouvements_stock
+        WHERE id > (SELECT COALESCE(MAX(mouvement_id), 0) FROM stocks_instantanes)
+        ''').fetchone()[0]
+        
+        return cls.creer_instantanes() if nouveaux >= seuil else 0
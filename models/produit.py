@@ -1,10 +1,33 @@
 # models/produit.py
 import sqlite3
-import os
+from models.mouvement_stock import MouvementStock, CREATION, MODIFICATION, SUPPRESSION, AJUSTEMENT
+from utils.cache import CacheLRU
+from utils.db_manager import (get_connection, transaction, recherche_plein_texte_disponible,
+                              apres_transaction, en_transaction, enregistrer_invalidation,
+                              donnees_modifiees_ailleurs)
+from utils.pagination import TAILLE_PAGE, decouper_page
+from utils.recherche import expression_fts
+
+# Nombre maximum d'identifiants par clause IN
+TAILLE_LOT_IN = 500
+
+# Nombre de lignes produits gardées en mémoire par get_by_id/get_by_ids
+TAILLE_CACHE_PRODUITS = 2048
 
 class Produit:
+    # Attributs fixes : pas de __dict__ par instance (listes de plusieurs milliers de produits)
+    __slots__ = ('id', 'nom', 'description', 'categorie_id', 'prix_achat', 'prix_vente',
+                 'quantite', 'seuil_reapprovisionnement', 'categorie_nom', '_quantite_lue')
+    
+    # Cache id -> ligne SQL (tuple) : chaque lecture reconstruit un Produit neuf,
+    # que l'appelant peut modifier sans altérer le cache. Vidé dès qu'une autre connexion
+    # (autre processus compris) a validé une écriture, voir _valider_cache().
+    # Désactivable avec Produit.cache.configurer(actif=False).
+    cache = CacheLRU(TAILLE_CACHE_PRODUITS)
+    
     def __init__(self, id=None, nom="", description="", categorie_id=None, 
-                 prix_achat=0.0, prix_vente=0.0, quantite=0, seuil_reapprovisionnement=5):
+                 prix_achat=0.0, prix_vente=0.0, quantite=0, seuil_reapprovisionnement=5,
+                 categorie_nom=None):
         self.id = id
         self.nom = nom
         self.description = description
@@ -13,61 +36,163 @@ class Produit:
         self.prix_vente = prix_vente
         self.quantite = quantite
         self.seuil_reapprovisionnement = seuil_reapprovisionnement
+        self.categorie_nom = categorie_nom  # Renseigné par lister() (jointure sur categories)
+        self._quantite_lue = None  # Quantité lue en base : save() ne la réécrit que si elle a changé
     
     @staticmethod
     def get_db_connection():
-        db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'db', 'database.db')
-        return sqlite3.connect(db_path)
+        return get_connection()
+    
+    @classmethod
+    def invalider_cache(cls, ids=None):
+        """
+        Retire des produits du cache, une fois la transaction en cours terminée
+        
+        À appeler par tout code qui modifie la table produits.
+        
+        Args:
+            ids: Identifiants modifiés (None pour vider tout le cache)
+        """
+        if ids is not None:
+            ids = list(ids)
+        apres_transaction(lambda: cls.cache.invalider(ids))
+    
+    @classmethod
+    def statistiques_cache(cls):
+        """Retourne les compteurs du cache (succes, echecs, taux_succes, taille...)"""
+        return cls.cache.statistiques()
+    
+    @classmethod
+    def _valider_cache(cls):
+        """Vide le cache si une autre connexion a validé une écriture depuis la dernière lecture"""
+        if cls.cache.actif and donnees_modifiees_ailleurs():
+            cls.cache.invalider()
+    
+    @classmethod
+    def _depuis_ligne(cls, row):
+        """Construit l'objet depuis une ligne SELECT * FROM produits (colonnes dans l'ordre de __init__)"""
+        produit = cls(*row)
+        produit._quantite_lue = produit.quantite
+        return produit
     
     def save(self):
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
+        with transaction() as cursor:
+            if self.id is None:
+                # Nouveau produit
+                cursor.execute('''
+                INSERT INTO produits 
+                (nom, description, categorie_id, prix_achat, prix_vente, quantite, seuil_reapprovisionnement) 
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (self.nom, self.description, self.categorie_id, self.prix_achat, 
+                     self.prix_vente, self.quantite, self.seuil_reapprovisionnement))
+                self.id = cursor.lastrowid
+                MouvementStock.enregistrer(cursor, CREATION, self.id, [(self.id, self.quantite)])
+            elif self.quantite == self._quantite_lue:
+                # Quantité non modifiée : la valeur lue (peut-être en cache, ou dépassée par une
+                # vente validée depuis) n'est pas réécrite
+                cursor.execute('''
+                UPDATE produits 
+                SET nom=?, description=?, categorie_id=?, prix_achat=?, prix_vente=?, 
+                    seuil_reapprovisionnement=?
+                WHERE id=?
+                ''', (self.nom, self.description, self.categorie_id, self.prix_achat, 
+                     self.prix_vente, self.seuil_reapprovisionnement, self.id))
+                self.invalider_cache([self.id])
+            else:
+                # Mise à jour d'un produit existant (écart de stock enregistré avant l'UPDATE)
+                MouvementStock.enregistrer_ecart(cursor, MODIFICATION, self.id, self.quantite)
+                cursor.execute('''
+                UPDATE produits 
+                SET nom=?, description=?, categorie_id=?, prix_achat=?, prix_vente=?, 
+                    quantite=?, seuil_reapprovisionnement=?
+                WHERE id=?
+                ''', (self.nom, self.description, self.categorie_id, self.prix_achat, 
+                     self.prix_vente, self.quantite, self.seuil_reapprovisionnement, self.id))
+                self.invalider_cache([self.id])
+        self._quantite_lue = self.quantite
         
-        if self.id is None:
-            # Nouveau produit
-            cursor.execute('''
+        return self.id
+    
+    @classmethod
+    def inserer_lot(cls, valeurs):
+        """
+        Insère plusieurs produits en une seule transaction
+        
+        Args:
+            valeurs: Liste de tuples (nom, description, categorie_id, prix_achat,
+                     prix_vente, quantite, seuil_reapprovisionnement)
+            
+        Returns:
+            Nombre de produits insérés
+        """
+        with transaction() as cursor:
+            dernier_id = cursor.execute('SELECT COALESCE(MAX(id), 0) FROM produits').fetchone()[0]
+            cursor.executemany('''
             INSERT INTO produits 
             (nom, description, categorie_id, prix_achat, prix_vente, quantite, seuil_reapprovisionnement) 
             VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (self.nom, self.description, self.categorie_id, self.prix_achat, 
-                 self.prix_vente, self.quantite, self.seuil_reapprovisionnement))
-            self.id = cursor.lastrowid
-        else:
-            # Mise à jour d'un produit existant
-            cursor.execute('''
-            UPDATE produits 
-            SET nom=?, description=?, categorie_id=?, prix_achat=?, prix_vente=?, 
-                quantite=?, seuil_reapprovisionnement=?
-            WHERE id=?
-            ''', (self.nom, self.description, self.categorie_id, self.prix_achat, 
-                 self.prix_vente, self.quantite, self.seuil_reapprovisionnement, self.id))
-        
-        conn.commit()
-        conn.close()
-        return self.id
+            ''', valeurs)
+            MouvementStock.enregistrer_stocks_initiaux(cursor, CREATION, dernier_id)
+        
+        return len(valeurs)
     
     @classmethod
     def get_by_id(cls, id):
-        conn = cls.get_db_connection()
-        cursor = conn.cursor()
+        cls._valider_cache()
+        produit_data = cls.cache.obtenir(id)
+        if produit_data is None:
+            version = cls.cache.version()
+            conn = cls.get_db_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT * FROM produits WHERE id=?', (id,))
+            produit_data = cursor.fetchone()
+            if produit_data is None:
+                return None
+            if not en_transaction():
+                cls.cache.placer(id, produit_data, version)
+        
+        return cls._depuis_ligne(produit_data)
+    
+    @classmethod
+    def get_by_ids(cls, ids):
+        """
+        Charge plusieurs produits en une seule requête WHERE id IN (...)
         
-        cursor.execute('SELECT * FROM produits WHERE id=?', (id,))
-        produit_data = cursor.fetchone()
+        Args:
+            ids: Itérable d'identifiants (les doublons sont ignorés)
+            
+        Returns:
+            Dictionnaire {id: Produit} (les identifiants inconnus sont absents)
+        """
+        cls._valider_cache()
+        produits = {}
+        manquants = []
+        for id in dict.fromkeys(ids):
+            row = cls.cache.obtenir(id)
+            if row is None:
+                manquants.append(id)
+            else:
+                produits[id] = cls._depuis_ligne(row)
+        if not manquants:
+            return produits
         
-        conn.close()
+        version = cls.cache.version()
+        conn = cls.get_db_connection()
+        # Dans une transaction ouverte, les lignes lues peuvent refléter des écritures non validées
+        mettre_en_cache = not en_transaction()
+        
+        # Découper pour rester sous la limite de paramètres de SQLite
+        for i in range(0, len(manquants), TAILLE_LOT_IN):
+            lot = manquants[i:i + TAILLE_LOT_IN]
+            marqueurs = ','.join('?' * len(lot))
+            cursor = conn.execute(f'SELECT * FROM produits WHERE id IN ({marqueurs})', lot)
+            for row in cursor.fetchall():
+                if mettre_en_cache:
+                    cls.cache.placer(row[0], row, version)
+                produits[row[0]] = cls._depuis_ligne(row)
         
-        if produit_data:
-            return cls(
-                id=produit_data[0],
-                nom=produit_data[1],
-                description=produit_data[2],
-                categorie_id=produit_data[3],
-                prix_achat=produit_data[4],
-                prix_vente=produit_data[5],
-                quantite=produit_data[6],
-                seuil_reapprovisionnement=produit_data[7]
-            )
-        return None
+        return produits
     
     @classmethod
     def get_all(cls):
@@ -77,18 +202,7 @@ class Produit:
         cursor.execute('SELECT * FROM produits')
         produits_data = cursor.fetchall()
         
-        conn.close()
-        
-        return [cls(
-            id=row[0],
-            nom=row[1],
-            description=row[2],
-            categorie_id=row[3],
-            prix_achat=row[4],
-            prix_vente=row[5],
-            quantite=row[6],
-            seuil_reapprovisionnement=row[7]
-        ) for row in produits_data]
+        return [cls._depuis_ligne(row) for row in produits_data]
     
     @classmethod
     def get_by_category(cls, categorie_id):
@@ -98,59 +212,200 @@ class Produit:
         cursor.execute('SELECT * FROM produits WHERE categorie_id=?', (categorie_id,))
         produits_data = cursor.fetchall()
         
-        conn.close()
-        
-        return [cls(
-            id=row[0],
-            nom=row[1],
-            description=row[2],
-            categorie_id=row[3],
-            prix_achat=row[4],
-            prix_vente=row[5],
-            quantite=row[6],
-            seuil_reapprovisionnement=row[7]
-        ) for row in produits_data]
+        return [cls._depuis_ligne(row) for row in produits_data]
     
     @classmethod
     def search(cls, term):
         conn = cls.get_db_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-        SELECT * FROM produits 
-        WHERE nom LIKE ? OR description LIKE ?
-        ''', (f'%{term}%', f'%{term}%'))
+        expression = expression_fts(term)
+        if expression and recherche_plein_texte_disponible('produits_fts'):
+            # Index plein texte : préfixes, sans accents, classé par pertinence (bm25)
+            cursor.execute('''
+            SELECT p.* FROM produits_fts 
+            JOIN produits p ON p.id = produits_fts.rowid
+            WHERE produits_fts MATCH ?
+            ORDER BY produits_fts.rank
+            ''', (expression,))
+        else:
+            cursor.execute('''
+            SELECT * FROM produits 
+            WHERE nom LIKE ? OR description LIKE ?
+            ''', (f'%{term}%', f'%{term}%'))
         
         produits_data = cursor.fetchall()
         
-        conn.close()
+        return [cls._depuis_ligne(row) for row in produits_data]
+    
+    @staticmethod
+    def _filtres_liste(terme, categorie_id, faible_stock):
+        """Retourne (jointure plein texte, conditions, paramètres) communs à lister et compter"""
+        jointures = ''
+        conditions = []
+        parametres = []
+        
+        if terme:
+            expression = expression_fts(terme)
+            if expression and recherche_plein_texte_disponible('produits_fts'):
+                jointures = 'JOIN produits_fts ON produits_fts.rowid = p.id'
+                conditions.append('produits_fts MATCH ?')
+                parametres.append(expression)
+            else:
+                conditions.append('(p.nom LIKE ? OR p.description LIKE ?)')
+                parametres.extend([f'%{terme}%', f'%{terme}%'])
+        if categorie_id is not None:
+            conditions.append('p.categorie_id = ?')
+            parametres.append(categorie_id)
+        if faible_stock:
+            conditions.append('p.quantite <= p.seuil_reapprovisionnement')
+        
+        return jointures, conditions, parametres
+    
+    @classmethod
+    def lister(cls, terme=None, categorie_id=None, faible_stock=False, apres_id=None, limite=None):
+        """
+        Liste les produits avec le nom de leur catégorie, en une seule requête
+        
+        Args:
+            terme: Texte recherché dans le nom/la description (plein texte si disponible)
+            categorie_id: Restreindre à une catégorie
+            faible_stock: Restreindre aux produits sous le seuil de réapprovisionnement
+            apres_id: Ne retourner que les produits d'id supérieur (pagination)
+            limite: Nombre maximum de produits retournés
+            
+        Returns:
+            Liste de Produit dont categorie_nom est renseigné (triés par pertinence
+            pour une recherche plein texte non paginée, par id sinon)
+        """
+        jointures, conditions, parametres = cls._filtres_liste(terme, categorie_id, faible_stock)
+        cle = ordre = 'p.id'
+        if jointures:
+            # La table FTS sait parcourir ses rowid dans l'ordre : pas de tri de la page
+            cle = 'produits_fts.rowid'
+            pagine = apres_id is not None or limite is not None
+            ordre = cle if pagine else 'produits_fts.rank'
+        if apres_id is not None:
+            conditions.append(f'{cle} > ?')
+            parametres.append(apres_id)
+        limit = ''
+        if limite is not None:
+            limit = 'LIMIT ?'
+            parametres.append(limite)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        conn = cls.get_db_connection()
+        produits_data = conn.execute(f'''
+        SELECT p.*, COALESCE(c.nom, 'Inconnue')
+        FROM produits p
+        {jointures}
+        LEFT JOIN categories c ON c.id = p.categorie_id
+        {where}
+        ORDER BY {ordre}
+        {limit}
+        ''', parametres).fetchall()
+        
+        produits = []
+        for row in produits_data:
+            produit = cls._depuis_ligne(row[:8])
+            produit.categorie_nom = row[8]
+            produits.append(produit)
+        return produits
+    
+    @classmethod
+    def lister_page(cls, curseur=None, taille=TAILLE_PAGE, terme=None, categorie_id=None, faible_stock=False):
+        """
+        Lit une page de produits triés par id (mêmes filtres que lister)
+        
+        Pagination par clé : chaque page part de l'id du dernier produit de la page
+        précédente (recherche dans la clé primaire ou idx_produits_categorie).
+        
+        Args:
+            curseur: Curseur renvoyé par la page précédente (None pour la première page)
+            taille: Nombre de produits par page
+            
+        Returns:
+            (liste de Produit, curseur de la page suivante ou None)
+        """
+        produits = cls.lister(terme, categorie_id, faible_stock, apres_id=curseur, limite=taille + 1)
+        return decouper_page(produits, taille, lambda produit: produit.id)
+    
+    @classmethod
+    def cle_au_rang(cls, rang, terme=None, categorie_id=None, faible_stock=False):
+        """
+        Curseur de lister_page désignant le produit de rang donné (mêmes filtres et même ordre)
+        
+        Permet de sauter à une position de la liste sans lire les pages précédentes :
+        l'index est parcouru jusqu'au rang, sans lire les lignes de la table.
+        
+        Args:
+            rang: Position du produit (0 pour le premier)
+            
+        Returns:
+            Curseur (id du produit), ou None si la liste compte moins de rang + 1 produits
+        """
+        jointures, conditions, parametres = cls._filtres_liste(terme, categorie_id, faible_stock)
+        cle = 'produits_fts.rowid' if jointures else 'p.id'
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        row = cls.get_db_connection().execute(f'''
+        SELECT {cle} FROM produits p {jointures} {where} ORDER BY {cle} LIMIT 1 OFFSET ?
+        ''', parametres + [rang]).fetchone()
+        return row[0] if row else None
+    
+    @classmethod
+    def compter(cls, terme=None, categorie_id=None, faible_stock=False):
+        """Nombre de produits correspondant aux filtres de lister"""
+        jointures, conditions, parametres = cls._filtres_liste(terme, categorie_id, faible_stock)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return cls.get_db_connection().execute(f'''
+        SELECT COUNT(*) FROM produits p {jointures} {where}
+        ''', parametres).fetchone()[0]
+    
+    @classmethod
+    def count(cls):
+        conn = cls.get_db_connection()
+        return conn.execute('SELECT COUNT(*) FROM produits').fetchone()[0]
+    
+    @classmethod
+    def iter_export(cls, taille_lot=1000):
+        """
+        Parcourt les produits par lots, avec le nom de catégorie joint en SQL
         
-        return [cls(
-            id=row[0],
-            nom=row[1],
-            description=row[2],
-            categorie_id=row[3],
-            prix_achat=row[4],
-            prix_vente=row[5],
-            quantite=row[6],
-            seuil_reapprovisionnement=row[7]
-        ) for row in produits_data]
+        Args:
+            taille_lot: Nombre de lignes lues à chaque fetchmany
+            
+        Yields:
+            Listes de tuples (id, nom, categorie, prix_achat, prix_vente, quantite, seuil_reapprovisionnement)
+        """
+        conn = cls.get_db_connection()
+        cursor = conn.execute('''
+        SELECT p.id, p.nom, COALESCE(c.nom, 'Inconnue'), p.prix_achat, p.prix_vente, 
+               p.quantite, p.seuil_reapprovisionnement
+        FROM produits p
+        LEFT JOIN categories c ON c.id = p.categorie_id
+        ORDER BY p.id
+        ''')
+        try:
+            while True:
+                lignes = cursor.fetchmany(taille_lot)
+                if not lignes:
+                    break
+                yield lignes
+        finally:
+            cursor.close()
     
     def delete(self):
         if self.id is None:
             return False
         
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('DELETE FROM produits WHERE id=?', (self.id,))
-            conn.commit()
-            result = cursor.rowcount > 0
+            with transaction() as cursor:
+                MouvementStock.enregistrer_ecart(cursor, SUPPRESSION, self.id, 0)
+                cursor.execute('DELETE FROM produits WHERE id=?', (self.id,))
+                result = cursor.rowcount > 0
+                self.invalider_cache([self.id])
         except sqlite3.Error:
             result = False
-        finally:
-            conn.close()
         
         return result
     
@@ -166,30 +421,22 @@ class Produit:
         
         produits_data = cursor.fetchall()
         
-        conn.close()
-        
-        return [cls(
-            id=row[0],
-            nom=row[1],
-            description=row[2],
-            categorie_id=row[3],
-            prix_achat=row[4],
-            prix_vente=row[5],
-            quantite=row[6],
-            seuil_reapprovisionnement=row[7]
-        ) for row in produits_data]
+        return [cls._depuis_ligne(row) for row in produits_data]
     
     @classmethod
-    def mettre_a_jour_stock(cls, produit_id, quantite_ajout):
-        conn = cls.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        UPDATE produits 
-        SET quantite = quantite + ? 
-        WHERE id = ?
-        ''', (quantite_ajout, produit_id))
+    def mettre_a_jour_stock(cls, produit_id, quantite_ajout, motif=None):
+        with transaction() as cursor:
+            cursor.execute('''
+            UPDATE produits 
+            SET quantite = quantite + ? 
+            WHERE id = ?
+            ''', (quantite_ajout, produit_id))
+            if cursor.rowcount > 0:
+                MouvementStock.enregistrer(cursor, AJUSTEMENT, produit_id, [(produit_id, quantite_ajout)], motif)
+            cls.invalider_cache([produit_id])
         
-        conn.commit()
-        conn.close()
         return cursor.rowcount > 0
+
+
+# Un changement de base (configurer) rend tout le cache caduc
+enregistrer_invalidation(Produit.cache.invalider)
@@ -1,26 +1,39 @@
 import sqlite3
-import os
-from datetime import datetime
+from models.cumul_vente import CumulVentes
+from models.mouvement_stock import MouvementStock, VENTE, ANNULATION_VENTE
+from models.produit import Produit
+from utils.db_manager import get_connection, transaction
+from utils.dates import cle_date, bornes_jour, bornes_periode
+from utils.pagination import TAILLE_PAGE, decouper_page
+
+class StockInsuffisant(Exception):
+    """Levée par Vente.save quand le stock d'au moins un produit ne couvre plus la demande"""
+    def __init__(self, demandes):
+        super().__init__("Stock insuffisant")
+        self.demandes = demandes  # {produit_id: quantité demandée}
 
 class Vente:
+    __slots__ = ('id', 'client_id', 'date_vente', 'montant_total', 'notes', 'details')
+    
     def __init__(self, id=None, client_id=None, date_vente=None, montant_total=0.0, notes=""):
         self.id = id
         self.client_id = client_id
-        self.date_vente = date_vente if date_vente else datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.date_vente = cle_date(date_vente)
         self.montant_total = montant_total
         self.notes = notes
         self.details = []  # Liste des DetailVente
     
+    @classmethod
+    def _depuis_ligne(cls, row):
+        """Construit l'objet depuis une ligne SELECT * FROM ventes (colonnes dans l'ordre de __init__)"""
+        return cls(*row)
+    
     @staticmethod
     def get_db_connection():
-        db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'db', 'database.db')
-        return sqlite3.connect(db_path)
+        return get_connection()
     
     def save(self):
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
-        try:
+        with transaction() as cursor:
             if self.id is None:
                 # Nouvelle vente
                 cursor.execute('''
@@ -29,40 +42,59 @@ class Vente:
                 ''', (self.client_id, self.date_vente, self.montant_total, self.notes))
                 self.id = cursor.lastrowid
                 
-                # Ajouter les détails de vente
+                # Ajouter les détails de vente en une seule instruction
                 for detail in self.details:
                     detail.vente_id = self.id
-                    cursor.execute('''
-                    INSERT INTO details_vente (vente_id, produit_id, quantite, prix_unitaire) 
-                    VALUES (?, ?, ?, ?)
-                    ''', (detail.vente_id, detail.produit_id, detail.quantite, detail.prix_unitaire))
-                    
-                    # Mettre à jour le stock du produit
-                    cursor.execute('''
-                    UPDATE produits 
-                    SET quantite = quantite - ? 
-                    WHERE id = ?
-                    ''', (detail.quantite, detail.produit_id))
+                # Le coût d'achat de chaque ligne est fixé maintenant, pour les cumuls de bénéfice
+                cursor.executemany('''
+                INSERT INTO details_vente (vente_id, produit_id, quantite, prix_unitaire, cout_unitaire) 
+                VALUES (?, ?, ?, ?, COALESCE((SELECT prix_achat FROM produits WHERE id = ?), 0))
+                ''', [(d.vente_id, d.produit_id, d.quantite, d.prix_unitaire, d.produit_id) for d in self.details])
+                
+                # Réserver le stock : décrément conditionnel, dans la même transaction que la vente.
+                # Si une ligne n'a pas assez de stock, la vente entière est annulée.
+                demandes = {}
+                for d in self.details:
+                    demandes[d.produit_id] = demandes.get(d.produit_id, 0) + d.quantite
+                cursor.executemany('''
+                UPDATE produits 
+                SET quantite = quantite - ? 
+                WHERE id = ? AND quantite >= ?
+                ''', [(quantite, produit_id, quantite) for produit_id, quantite in demandes.items()])
+                Produit.invalider_cache(demandes)
+                if cursor.rowcount != len(demandes):
+                    self.id = None
+                    raise StockInsuffisant(demandes)
+                
+                MouvementStock.enregistrer(cursor, VENTE, self.id,
+                                           [(produit_id, -quantite) for produit_id, quantite in demandes.items()])
+                CumulVentes.ajouter_vente(cursor, self.id)
                 
             else:
                 # Mise à jour d'une vente existante (généralement juste les notes)
+                ancienne = cursor.execute('SELECT date_vente FROM ventes WHERE id=?', (self.id,)).fetchone()
+                change_de_jour = ancienne is not None and (ancienne[0] or '')[:10] != self.date_vente[:10]
+                if change_de_jour:
+                    CumulVentes.retirer_vente(cursor, self.id)
+                
                 cursor.execute('''
                 UPDATE ventes 
                 SET client_id=?, date_vente=?, montant_total=?, notes=?
                 WHERE id=?
                 ''', (self.client_id, self.date_vente, self.montant_total, self.notes, self.id))
-            
-            conn.commit()
-            return self.id
-            
-        except sqlite3.Error as e:
-            conn.rollback()
-            raise e
-        finally:
-            conn.close()
+                
+                if change_de_jour:
+                    CumulVentes.ajouter_vente(cursor, self.id)
+        
+        return self.id
     
     @classmethod
-    def get_by_id(cls, id):
+    def get_by_id(cls, id, avec_details=True):
+        """
+        Args:
+            id: ID de la vente
+            avec_details: Charger aussi les lignes (inutile avant une annulation, qui les relit)
+        """
         conn = cls.get_db_connection()
         cursor = conn.cursor()
         
@@ -70,31 +102,18 @@ class Vente:
         vente_data = cursor.fetchone()
         
         if not vente_data:
-            conn.close()
             return None
         
-        vente = cls(
-            id=vente_data[0],
-            client_id=vente_data[1],
-            date_vente=vente_data[2],
-            montant_total=vente_data[3],
-            notes=vente_data[4]
-        )
+        vente = cls._depuis_ligne(vente_data)
+        if not avec_details:
+            return vente
         
         # Récupérer les détails de vente
         cursor.execute('SELECT * FROM details_vente WHERE vente_id=?', (id,))
         details_data = cursor.fetchall()
         
-        conn.close()
-        
         for detail_data in details_data:
-            detail = DetailVente(
-                id=detail_data[0],
-                vente_id=detail_data[1],
-                produit_id=detail_data[2],
-                quantite=detail_data[3],
-                prix_unitaire=detail_data[4]
-            )
+            detail = DetailVente._depuis_ligne(detail_data)
             vente.details.append(detail)
         
         return vente
@@ -114,8 +133,6 @@ class Vente:
         
         ventes_data = cursor.fetchall()
         
-        conn.close()
-        
         return [(
             row[0],  # id
             row[1],  # client_id
@@ -126,6 +143,7 @@ class Vente:
     
     @classmethod
     def get_ventes_periode(cls, date_debut, date_fin):
+        debut, fin = bornes_periode(date_debut, date_fin)
         conn = cls.get_db_connection()
         cursor = conn.cursor()
         
@@ -133,14 +151,12 @@ class Vente:
         SELECT v.*, c.nom 
         FROM ventes v
         LEFT JOIN clients c ON v.client_id = c.id
-        WHERE v.date_vente BETWEEN ? AND ?
+        WHERE v.date_vente >= ? AND v.date_vente < ?
         ORDER BY v.date_vente DESC
-        ''', (date_debut, date_fin))
+        ''', (debut, fin))
         
         ventes_data = cursor.fetchall()
         
-        conn.close()
-        
         return [(
             row[0],  # id
             row[1],  # client_id
@@ -149,66 +165,165 @@ class Vente:
             row[5]   # nom_client
         ) for row in ventes_data]
     
+    @classmethod
+    def get_page(cls, curseur=None, taille=TAILLE_PAGE, date_debut=None, date_fin=None):
+        """
+        Lit une page de ventes, de la plus récente à la plus ancienne
+        
+        Pagination par clé sur (date_vente, id) : chaque page est une recherche dans
+        l'index idx_ventes_date, la 1000e page coûte autant que la première.
+        
+        Args:
+            curseur: Curseur renvoyé par la page précédente (None pour la première page)
+            taille: Nombre de ventes par page
+            date_debut, date_fin: Période à parcourir (les deux ou aucune)
+            
+        Returns:
+            ([(id, client_id, date_vente, montant_total, nom_client), ...], curseur de la page suivante ou None)
+        """
+        conditions = []
+        parametres = []
+        if date_debut is not None and date_fin is not None:
+            conditions.append('v.date_vente >= ? AND v.date_vente < ?')
+            parametres.extend(bornes_periode(date_debut, date_fin))
+        if curseur is not None:
+            conditions.append('(v.date_vente, v.id) < (?, ?)')
+            parametres.extend(curseur)
+        parametres.append(taille + 1)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        conn = cls.get_db_connection()
+        ventes_data = conn.execute(f'''
+        SELECT v.id, v.client_id, v.date_vente, v.montant_total, c.nom 
+        FROM ventes v
+        LEFT JOIN clients c ON v.client_id = c.id
+        {where}
+        ORDER BY v.date_vente DESC, v.id DESC
+        LIMIT ?
+        ''', parametres).fetchall()
+        
+        return decouper_page(ventes_data, taille, lambda row: (row[2], row[0]))
+    
     @classmethod
     def get_ventes_jour(cls):
-        today = datetime.now().strftime('%Y-%m-%d')
+        debut, fin = bornes_jour()
         conn = cls.get_db_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
-        SELECT * FROM ventes WHERE date_vente LIKE ?
-        ''', (f'{today}%',))
+        SELECT * FROM ventes WHERE date_vente >= ? AND date_vente < ?
+        ''', (debut, fin))
         
         ventes_data = cursor.fetchall()
-        conn.close()
-        
-        return [cls(
-            id=row[0],
-            client_id=row[1],
-            date_vente=row[2],
-            montant_total=row[3],
-            notes=row[4]
-        ) for row in ventes_data]
+        
+        return [cls._depuis_ligne(row) for row in ventes_data]
+    
+    @classmethod
+    def get_total_periode(cls, debut, fin):
+        """
+        Somme des montants des ventes dans l'intervalle [debut, fin)
+        
+        Args:
+            debut: Borne incluse (clé de date, voir utils.dates)
+            fin: Borne exclue
+            
+        Returns:
+            Montant total
+        """
+        conn = cls.get_db_connection()
+        
+        total = conn.execute('''
+        SELECT SUM(montant_total) FROM ventes WHERE date_vente >= ? AND date_vente < ?
+        ''', (debut, fin)).fetchone()[0]
+        
+        return total or 0.0
+    
+    @classmethod
+    def cle_au_rang(cls, rang, date_debut=None, date_fin=None):
+        """
+        Curseur de get_page désignant la vente de rang donné (dans l'ordre de get_page)
+        
+        Permet de sauter à une position de la liste sans lire les pages précédentes :
+        idx_ventes_date est parcouru jusqu'au rang, sans lire les lignes de la table.
+        
+        Args:
+            rang: Position de la vente (0 pour la plus récente)
+            date_debut, date_fin: Période (les deux ou aucune), comme pour get_page
+            
+        Returns:
+            (date_vente, id), ou None si la liste compte moins de rang + 1 ventes
+        """
+        where = ''
+        parametres = []
+        if date_debut is not None and date_fin is not None:
+            where = 'WHERE date_vente >= ? AND date_vente < ?'
+            parametres.extend(bornes_periode(date_debut, date_fin))
+        parametres.append(rang)
+        
+        conn = cls.get_db_connection()
+        row = conn.execute(f'''
+        SELECT date_vente, id FROM ventes
+        {where}
+        ORDER BY date_vente DESC, id DESC
+        LIMIT 1 OFFSET ?
+        ''', parametres).fetchone()
+        return tuple(row) if row else None
+    
+    @classmethod
+    def compter(cls, date_debut=None, date_fin=None):
+        """Nombre de ventes, sur la période donnée (dates incluses) ou au total"""
+        conn = cls.get_db_connection()
+        if date_debut is not None and date_fin is not None:
+            return conn.execute('''
+            SELECT COUNT(*) FROM ventes WHERE date_vente >= ? AND date_vente < ?
+            ''', bornes_periode(date_debut, date_fin)).fetchone()[0]
+        return conn.execute('SELECT COUNT(*) FROM ventes').fetchone()[0]
     
     def delete(self):
         if self.id is None:
             return False
         
-        conn = self.get_db_connection()
-        cursor = conn.cursor()
-        
         try:
-            # Obtenir les détails de la vente pour rétablir le stock
-            cursor.execute('SELECT produit_id, quantite FROM details_vente WHERE vente_id=?', (self.id,))
-            details = cursor.fetchall()
-            
-            # Rétablir le stock pour chaque produit
-            for produit_id, quantite in details:
-                cursor.execute('''
+            with transaction() as cursor:
+                # Obtenir les détails de la vente pour rétablir le stock
+                cursor.execute('SELECT produit_id, quantite FROM details_vente WHERE vente_id=?', (self.id,))
+                details = cursor.fetchall()
+                
+                # Rétablir le stock pour chaque produit
+                cursor.executemany('''
                 UPDATE produits 
                 SET quantite = quantite + ? 
                 WHERE id = ?
-                ''', (quantite, produit_id))
-            
-            # Supprimer les détails de vente
-            cursor.execute('DELETE FROM details_vente WHERE vente_id=?', (self.id,))
-            
-            # Supprimer la vente
-            cursor.execute('DELETE FROM ventes WHERE id=?', (self.id,))
+                ''', [(quantite, produit_id) for produit_id, quantite in details])
+                MouvementStock.enregistrer(cursor, ANNULATION_VENTE, self.id, details)
+                Produit.invalider_cache(produit_id for produit_id, _ in details)
+                
+                # Retirer la vente des cumuls quotidiens (avant de supprimer ses détails)
+                CumulVentes.retirer_vente(cursor, self.id)
+                
+                # Supprimer les détails de vente
+                cursor.execute('DELETE FROM details_vente WHERE vente_id=?', (self.id,))
+                
+                # Supprimer la vente
+                cursor.execute('DELETE FROM ventes WHERE id=?', (self.id,))
             
-            conn.commit()
             return True
             
         except sqlite3.Error:
-            conn.rollback()
             return False
-        finally:
-            conn.close()
 
 class DetailVente:
-    def __init__(self, id=None, vente_id=None, produit_id=None, quantite=0, prix_unitaire=0.0):
+    __slots__ = ('id', 'vente_id', 'produit_id', 'quantite', 'prix_unitaire', 'cout_unitaire')
+    
+    def __init__(self, id=None, vente_id=None, produit_id=None, quantite=0, prix_unitaire=0.0, cout_unitaire=None):
         self.id = id
         self.vente_id = vente_id
         self.produit_id = produit_id
         self.quantite = quantite
-        self.prix_unitaire = prix_unitaire
\ No newline at end of file
+        self.prix_unitaire = prix_unitaire
+        self.cout_unitaire = cout_unitaire  # Prix d'achat au moment de la vente (fixé par Vente.save)
+    
+    @classmethod
+    def _depuis_ligne(cls, row):
+        """Construit l'objet depuis une ligne SELECT * FROM details_vente (colonnes dans l'ordre de __init__)"""
+        return cls(*row)
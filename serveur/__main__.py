@@ -0,0 +1,32 @@
+# serveur/__main__.py - Lancement du serveur HTTP/JSON
+#
+# Usage : python -m serveur [--hote 127.0.0.1] [--port 8765] [--lecteurs 4] [--db chemin]
+
+import argparse
+import asyncio
+from models.mouvement_stock import MouvementStock
+from serveur.application import NB_LECTEURS, ServeurMagasin
+from utils.db_setup import setup_database
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serveur HTTP/JSON de la gestion du magasin")
+    parser.add_argument('--hote', default='127.0.0.1', help="Adresse d'écoute (0.0.0.0 pour le réseau local)")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--lecteurs', type=int, default=NB_LECTEURS, help="Threads de lecture")
+    parser.add_argument('--db', help="Chemin de la base de données")
+    args = parser.parse_args(argv)
+
+    setup_database(args.db)
+    MouvementStock.creer_instantanes_si_necessaire()
+
+    serveur = ServeurMagasin(args.hote, args.port, args.lecteurs)
+    print(f"Serveur à l'écoute sur http://{args.hote}:{args.port}/api")
+    try:
+        asyncio.run(serveur.servir())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
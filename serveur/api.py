@@ -0,0 +1,117 @@
+# serveur/api.py - Méthodes des contrôleurs exposées par le serveur HTTP/JSON
+#
+# Seules les méthodes listées ici sont accessibles. Les lectures peuvent s'exécuter en
+# parallèle ; les écritures passent une à une par la file de l'écrivain unique
+# (voir controllers.gestion_async).
+
+import inspect
+import json
+from datetime import date, datetime
+from controllers.gestion_async import ECRITURE, METHODES as METHODES_CONTROLEURS
+from utils.dates import FORMAT_DATE
+
+# Méthodes des contrôleurs accessibles à distance (même classement que la façade asynchrone).
+# importer_produits n'est pas exposée : elle lit un fichier du poste serveur.
+METHODES = {
+    classe: {nom: mode for nom, mode in methodes.items() if nom != 'importer_produits'}
+    for classe, methodes in METHODES_CONTROLEURS.items()
+}
+
+CONTROLEURS = {classe.__name__: classe for classe in METHODES}
+
+# Paramètres texte : leur valeur dans une query string n'est pas lue en JSON (?terme=123 cherche "123")
+PARAMETRES_TEXTE = frozenset({
+    'adresse', 'date', 'date_debut', 'date_fin', 'description', 'email', 'nom', 'notes', 'raison',
+    'regroupement', 'telephone', 'terme',
+})
+
+
+class RequeteInvalide(Exception):
+    """Méthode inconnue ou arguments ne correspondant pas à sa signature"""
+    def __init__(self, message, statut=400):
+        super().__init__(message)
+        self.statut = statut
+
+
+def preparer_appel(controleur, methode, arguments, ecriture_autorisee=True):
+    """
+    Résout une méthode exposée et vérifie ses arguments
+
+    Args:
+        controleur: Nom de la classe (ex: 'GestionVente')
+        methode: Nom de la méthode
+        arguments: Dictionnaire d'arguments nommés
+        ecriture_autorisee: False pour une requête GET
+
+    Returns:
+        (fonction sans argument exécutant l'appel, LECTURE ou ECRITURE)
+
+    Raises:
+        RequeteInvalide si la méthode n'est pas exposée (404), est une écriture non autorisée (405)
+        ou si les arguments sont invalides (400)
+    """
+    classe = CONTROLEURS.get(controleur)
+    mode = METHODES[classe].get(methode) if classe else None
+    if mode is None:
+        raise RequeteInvalide(f"Méthode inconnue: {controleur}.{methode}", 404)
+    if mode == ECRITURE and not ecriture_autorisee:
+        raise RequeteInvalide("Les écritures se font en POST", 405)
+    if not isinstance(arguments, dict):
+        raise RequeteInvalide("Les arguments doivent être un objet JSON")
+
+    fonction = getattr(classe, methode)
+    try:
+        inspect.signature(fonction).bind(**arguments)
+    except TypeError as e:
+        raise RequeteInvalide(f"Arguments invalides pour {controleur}.{methode}: {e}")
+    return lambda: fonction(**arguments), mode
+
+
+def arguments_query(paires):
+    """
+    Arguments nommés d'une requête GET
+
+    Les valeurs sont lues en JSON ('5' -> 5, 'true' -> True, '[1, 2]' -> [1, 2]), sauf celles
+    des paramètres texte ; les textes qui ne sont pas du JSON restent des chaînes.
+
+    Args:
+        paires: Liste de (nom, valeur) de la query string
+    """
+    arguments = {}
+    for nom, texte in paires:
+        if nom in PARAMETRES_TEXTE:
+            arguments[nom] = texte
+            continue
+        try:
+            arguments[nom] = json.loads(texte)
+        except ValueError:
+            arguments[nom] = texte
+    return arguments
+
+
+def lister_methodes():
+    """Retourne {contrôleur: {méthode: mode}} pour la description de l'API"""
+    return {classe.__name__: dict(methodes) for classe, methodes in METHODES.items()}
+
+
+def en_json(valeur):
+    """
+    Convertit un résultat de contrôleur en valeurs sérialisables par json
+
+    Les namedtuple deviennent des objets, les tuples des listes et les objets modèles
+    (à __slots__) des objets avec un champ par attribut.
+    """
+    if valeur is None or isinstance(valeur, (str, int, float, bool)):
+        return valeur
+    if hasattr(valeur, '_asdict'):
+        return {cle: en_json(v) for cle, v in valeur._asdict().items()}
+    if isinstance(valeur, dict):
+        return {str(cle): en_json(v) for cle, v in valeur.items()}
+    if isinstance(valeur, (list, tuple, set)):
+        return [en_json(v) for v in valeur]
+    if isinstance(valeur, (date, datetime)):
+        return valeur.strftime(FORMAT_DATE)
+    attributs = getattr(type(valeur), '__slots__', None)
+    if attributs is not None:
+        return {nom: en_json(getattr(valeur, nom, None)) for nom in attributs}
+    return en_json(vars(valeur))
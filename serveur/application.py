@@ -0,0 +1,192 @@
+# serveur/application.py - Serveur HTTP/JSON asyncio partagé par les caisses
+#
+# Un seul processus ouvre la base, à travers la façade asynchrone des contrôleurs
+# (controllers.gestion_async) : lectures en parallèle dans un pool de threads, écritures
+# une à une par une file unique. Les postes clients ne se disputent donc plus les
+# verrous du fichier.
+#
+# Requêtes :
+#   GET  /api                               -> méthodes exposées
+#   GET  /api/<Controleur>/<methode>?a=1    -> lecture (valeurs de la query string lues en JSON si possible,
+#                                              sauf pour les paramètres texte)
+#   POST /api/<Controleur>/<methode>        -> lecture ou écriture, arguments nommés en objet JSON
+# Réponse : {"resultat": ...} ou {"erreur": "..."}
+
+import asyncio
+import json
+import threading
+from urllib.parse import parse_qsl, unquote, urlsplit
+from controllers.gestion_async import NB_LECTEURS, GestionAsync
+from serveur.api import RequeteInvalide, arguments_query, en_json, lister_methodes, preparer_appel
+
+TAILLE_MAX_CORPS = 1024 * 1024  # octets
+
+STATUTS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+
+class ServeurMagasin:
+    """
+    Serveur HTTP/1.1 (connexions persistantes) exposant les contrôleurs en JSON
+
+    Utilisation :
+        serveur = ServeurMagasin(port=8765)
+        asyncio.run(serveur.servir())
+    """
+
+    def __init__(self, hote='127.0.0.1', port=8765, nb_lecteurs=NB_LECTEURS):
+        self.hote = hote
+        self.port = port
+        self.gestion = GestionAsync(nb_lecteurs)
+        self.serveur = None
+        self._boucle = None
+        self._thread = None
+
+    async def demarrer(self):
+        """Démarre la façade et ouvre le port d'écoute ; retourne le port effectif (utile avec port=0)"""
+        await self.gestion.demarrer()
+        self.serveur = await asyncio.start_server(self._connexion, self.hote, self.port)
+        self.port = self.serveur.sockets[0].getsockname()[1]
+        return self.port
+
+    async def arreter(self):
+        """Ferme le port, termine les écritures en file puis arrête les threads"""
+        if self.serveur is not None:
+            self.serveur.close()
+            await self.serveur.wait_closed()
+        await self.gestion.arreter()
+
+    async def servir(self):
+        """Démarre le serveur et répond jusqu'à l'annulation de la tâche (Ctrl+C)"""
+        await self.demarrer()
+        try:
+            await self.serveur.serve_forever()
+        finally:
+            await self.arreter()
+
+    def demarrer_en_thread(self):
+        """
+        Lance le serveur dans un thread avec sa propre boucle asyncio (tests de charge, intégration)
+
+        Returns:
+            Port effectif
+        """
+        self._boucle = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._boucle.run_forever, name='serveur', daemon=True)
+        self._thread.start()
+        return asyncio.run_coroutine_threadsafe(self.demarrer(), self._boucle).result()
+
+    def arreter_thread(self):
+        """Arrête un serveur lancé par demarrer_en_thread"""
+        asyncio.run_coroutine_threadsafe(self.arreter(), self._boucle).result()
+        self._boucle.call_soon_threadsafe(self._boucle.stop)
+        self._thread.join()
+        self._boucle.close()
+
+    async def _connexion(self, reader, writer):
+        try:
+            while True:
+                try:
+                    requete = await self._lire_requete(reader)
+                except RequeteInvalide as e:
+                    # En-têtes inutilisables : la suite du flux ne peut pas être découpée en requêtes
+                    self._envoyer(writer, e.statut, {'erreur': str(e)}, False)
+                    await writer.drain()
+                    break
+                if requete is None:
+                    break
+                methode_http, chemin, corps, garder = requete
+                statut, reponse = await self._traiter(methode_http, chemin, corps)
+                self._envoyer(writer, statut, reponse, garder)
+                await writer.drain()
+                if not garder:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _lire_requete(self, reader):
+        """
+        Returns:
+            (méthode, chemin, corps, garder la connexion) ou None en fin de connexion
+
+        Raises:
+            RequeteInvalide si Content-Length est invalide (400) ou trop grand (413)
+        """
+        ligne = await reader.readline()
+        if not ligne:
+            return None
+        try:
+            methode_http, chemin, version = ligne.decode('latin-1').split()
+        except ValueError:
+            return None
+
+        entetes = {}
+        while True:
+            ligne = await reader.readline()
+            if ligne in (b'\r\n', b'\n', b''):
+                break
+            nom, _, valeur = ligne.decode('latin-1').partition(':')
+            entetes[nom.strip().lower()] = valeur.strip()
+
+        try:
+            longueur = int(entetes.get('content-length') or 0)
+        except ValueError:
+            longueur = -1
+        if longueur < 0:
+            raise RequeteInvalide(f"Content-Length invalide: {entetes['content-length']}")
+        if longueur > TAILLE_MAX_CORPS:
+            raise RequeteInvalide("Corps de requête trop volumineux", 413)
+        corps = await reader.readexactly(longueur) if longueur else b''
+
+        connexion = entetes.get('connection', '').lower()
+        garder = connexion != 'close' if version == 'HTTP/1.1' else connexion == 'keep-alive'
+        return methode_http, chemin, corps, garder
+
+    async def _traiter(self, methode_http, chemin, corps):
+        """
+        Returns:
+            (statut HTTP, objet JSON de la réponse)
+        """
+        adresse = urlsplit(chemin)
+        parties = [unquote(p) for p in adresse.path.strip('/').split('/')]
+        if parties == ['api'] and methode_http == 'GET':
+            return 200, {'resultat': lister_methodes()}
+        if len(parties) != 3 or parties[0] != 'api':
+            return 404, {'erreur': f"Chemin inconnu: {adresse.path}"}
+
+        try:
+            if methode_http == 'GET':
+                arguments = arguments_query(parse_qsl(adresse.query))
+            elif methode_http == 'POST':
+                arguments = json.loads(corps) if corps else {}
+            else:
+                return 405, {'erreur': f"Méthode HTTP non gérée: {methode_http}"}
+            fonction, mode = preparer_appel(parties[1], parties[2], arguments, methode_http == 'POST')
+        except ValueError as e:
+            return 400, {'erreur': f"JSON invalide: {e}"}
+        except RequeteInvalide as e:
+            return e.statut, {'erreur': str(e)}
+
+        try:
+            resultat = await self.gestion.executeur.executer(fonction, mode)
+        except Exception as e:
+            return 500, {'erreur': f"{type(e).__name__}: {e}"}
+        return 200, {'resultat': en_json(resultat)}
+
+    def _envoyer(self, writer, statut, reponse, garder):
+        corps = json.dumps(reponse, ensure_ascii=False).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {statut} {STATUTS[statut]}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(corps)}\r\n"
+            f"Connection: {'keep-alive' if garder else 'close'}\r\n"
+            f"\r\n".encode('latin-1') + corps)
@@ -0,0 +1,83 @@
+# serveur/client.py - Client léger du serveur HTTP/JSON (caisses, poste de gestion, tests de charge)
+
+import http.client
+import json
+
+# Mode des méthodes de lecture dans la description de l'API (controllers.gestion_async.LECTURE)
+LECTURE = 'lecture'
+
+
+class ErreurServeur(Exception):
+    """Réponse d'erreur du serveur (statut HTTP différent de 200)"""
+    def __init__(self, statut, message):
+        super().__init__(f"{statut}: {message}")
+        self.statut = statut
+
+
+class ClientMagasin:
+    """
+    Appelle les contrôleurs exposés par le serveur sur une connexion persistante
+
+    Un client par thread : la connexion HTTP n'est pas partagée.
+
+    Exemple :
+        client = ClientMagasin('127.0.0.1', 8765)
+        succes, vente_id, message = client.appeler('GestionVente', 'creer_vente',
+                                                   client_id=1, produits_quantites=[[3, 2]])
+    """
+
+    def __init__(self, hote='127.0.0.1', port=8765, delai=30):
+        self.hote = hote
+        self.port = port
+        self.delai = delai
+        self._connexion = None
+        self._modes = None  # {contrôleur: {méthode: mode}}, lu sur le serveur à la première reprise
+
+    def appeler(self, controleur, methode, **arguments):
+        """
+        Returns:
+            Résultat de la méthode, converti en JSON (tuples -> listes, objets -> dict)
+
+        Raises:
+            ErreurServeur si le serveur renvoie une erreur
+        """
+        corps = json.dumps(arguments).encode('utf-8')
+        for tentative in (1, 2):
+            if self._connexion is None:
+                self._connexion = http.client.HTTPConnection(self.hote, self.port, timeout=self.delai)
+            envoyee = False
+            try:
+                self._connexion.request('POST', f'/api/{controleur}/{methode}', corps,
+                                        {'Content-Type': 'application/json'})
+                envoyee = True
+                reponse = self._connexion.getresponse()
+                donnees = json.loads(reponse.read())
+                break
+            except (ConnectionError, http.client.HTTPException):
+                # Connexion persistante fermée par le serveur : une nouvelle tentative, sauf si la
+                # requête a été envoyée en entier. Le serveur a alors pu l'exécuter et seule une
+                # lecture peut être relancée (une vente serait sinon enregistrée deux fois).
+                self.fermer()
+                if tentative == 2 or (envoyee and not self._est_lecture(controleur, methode)):
+                    raise
+        if reponse.status != 200:
+            raise ErreurServeur(reponse.status, donnees.get('erreur'))
+        return donnees['resultat']
+
+    def _est_lecture(self, controleur, methode):
+        """Indique si la méthode est une lecture, d'après la description de l'API (False si illisible)"""
+        if self._modes is None:
+            connexion = http.client.HTTPConnection(self.hote, self.port, timeout=self.delai)
+            try:
+                connexion.request('GET', '/api')
+                self._modes = json.loads(connexion.getresponse().read())['resultat']
+            except (OSError, http.client.HTTPException, ValueError, KeyError):
+                return False
+            finally:
+                connexion.close()
+        return self._modes.get(controleur, {}).get(methode) == LECTURE
+
+    def fermer(self):
+        if self._connexion is not None:
+            self._connexion.close()
+            self._connexion = None
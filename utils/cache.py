@@ -0,0 +1,97 @@
+# utils/cache.py - Cache LRU borné, partagé entre threads
+
+import threading
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """
+    Cache clé -> valeur borné, évincant l'entrée la moins récemment lue
+
+    Les valeurs doivent être immuables (tuples de lignes SQL par exemple) :
+    l'appelant reconstruit ses objets à partir d'elles.
+
+    Pour éviter qu'une lecture commencée avant une écriture ne remette en cache
+    une valeur périmée, l'appelant relève version() avant sa requête et la passe
+    à placer() : la valeur est ignorée si une invalidation a eu lieu entre-temps.
+    """
+
+    def __init__(self, taille_max=1024, actif=True):
+        self.taille_max = taille_max
+        self.actif = actif
+        self.succes = 0
+        self.echecs = 0
+        self._donnees = OrderedDict()
+        self._version = 0
+        self._verrou = threading.Lock()
+
+    def configurer(self, taille_max=None, actif=None):
+        """Change la taille maximale ou active/désactive le cache (le vide dans tous les cas)"""
+        with self._verrou:
+            if taille_max is not None:
+                self.taille_max = taille_max
+            if actif is not None:
+                self.actif = actif
+            self._donnees.clear()
+            self._version += 1
+
+    def version(self):
+        return self._version
+
+    def obtenir(self, cle):
+        """Retourne la valeur en cache, ou None (compté comme un échec)"""
+        if not self.actif:
+            return None
+        with self._verrou:
+            valeur = self._donnees.get(cle)
+            if valeur is None:
+                self.echecs += 1
+            else:
+                self._donnees.move_to_end(cle)
+                self.succes += 1
+            return valeur
+
+    def placer(self, cle, valeur, version):
+        """Met une valeur en cache si aucune invalidation n'a eu lieu depuis version"""
+        if not self.actif:
+            return
+        with self._verrou:
+            if version != self._version:
+                return
+            self._donnees[cle] = valeur
+            self._donnees.move_to_end(cle)
+            while len(self._donnees) > self.taille_max:
+                self._donnees.popitem(last=False)
+
+    def invalider(self, cles=None):
+        """
+        Retire des entrées du cache
+
+        Args:
+            cles: Itérable de clés à retirer (None pour tout vider)
+        """
+        with self._verrou:
+            if cles is None:
+                self._donnees.clear()
+            else:
+                for cle in cles:
+                    self._donnees.pop(cle, None)
+            self._version += 1
+
+    def statistiques(self):
+        """Retourne un dictionnaire {succes, echecs, taux_succes, taille, taille_max, actif}"""
+        with self._verrou:
+            total = self.succes + self.echecs
+            return {
+                'succes': self.succes,
+                'echecs': self.echecs,
+                'taux_succes': self.succes / total if total else 0.0,
+                'taille': len(self._donnees),
+                'taille_max': self.taille_max,
+                'actif': self.actif,
+            }
+
+    def reinitialiser_statistiques(self):
+        with self._verrou:
+            self.succes = 0
+            self.echecs = 0
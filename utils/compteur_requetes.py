@@ -0,0 +1,204 @@
+# utils/compteur_requetes.py - Comptage des requêtes par appel et détection des requêtes répétées (N+1)
+#
+# CompteurRequetes compte les requêtes lancées dans un bloc (un appel de contrôleur, une
+# action de l'interface) et repère les instructions de même forme répétées, signe d'une
+# lecture ligne par ligne qui devrait être une seule requête. Il peut aussi imposer un
+# budget, pour qu'une régression soit détectée automatiquement :
+#
+#     with CompteurRequetes('Liste des produits', max_requetes=2):
+#         GestionProduit.lister_produits_page()
+#         GestionProduit.compter_produits()
+#
+# En mode débogage (MAGASIN_SQL_N_PLUS_UN=1, voir surveiller_controleurs), chaque appel de
+# contrôleur et chaque action décorée par @surveiller est compté et les répétitions sont
+# signalées par un avertissement RequetesRepetees. Les budgets sont vérifiés par
+# python -m benchmarks.verifier_requetes.
+
+import functools
+import os
+import threading
+import warnings
+from collections import Counter
+from utils import instrumentation
+
+VARIABLE_SURVEILLANCE = 'MAGASIN_SQL_N_PLUS_UN'
+
+# Nombre d'instructions de même forme à partir duquel elles sont signalées
+SEUIL_REPETITIONS = 3
+# Instructions de contrôle (transactions, PRAGMA) : ni comptées comme requêtes, ni signalées
+MOTS_CLES_CONTROLE = ('BEGIN', 'COMMIT', 'END', 'ROLLBACK', 'SAVEPOINT', 'RELEASE', 'PRAGMA')
+
+# Compteurs ouverts, et si l'instrumentation a été activée pour eux (à désactiver après le dernier)
+_activation = {'compteurs': 0, 'temporaire': False}
+_verrou_activation = threading.Lock()
+
+
+class RequetesRepetees(UserWarning):
+    """Avertissement : des instructions de même forme ont été répétées dans un même appel"""
+
+
+class BudgetRequetesDepasse(AssertionError):
+    """Un bloc a lancé plus de requêtes (ou de répétitions) que son budget"""
+
+
+def _est_controle(forme):
+    return forme.split(' ', 1)[0].upper() in MOTS_CLES_CONTROLE
+
+
+class CompteurRequetes:
+    """
+    Compte les requêtes lancées pendant un bloc with
+
+    Active l'instrumentation pour la durée du bloc si elle ne l'est pas déjà ; elle est
+    désactivée à la sortie du dernier compteur ouvert, quel que soit son thread.
+    """
+
+    def __init__(self, nom='', max_requetes=None, max_repetitions=None, seuil_repetitions=SEUIL_REPETITIONS,
+                 tous_threads=False, lever=True):
+        """
+        Args:
+            nom: Nom de l'appel ou de l'action (repris dans les messages)
+            max_requetes: Nombre maximal de requêtes (instructions de contrôle exclues)
+            max_repetitions: Nombre maximal d'instructions d'une même forme
+            seuil_repetitions: Répétitions à partir desquelles une forme est signalée
+            tous_threads: Compter aussi les requêtes des autres threads (ex: GestionAsync)
+            lever: Lever BudgetRequetesDepasse si un budget est dépassé (sinon avertissement)
+        """
+        self.nom = nom
+        self.max_requetes = max_requetes
+        self.max_repetitions = max_repetitions
+        self.seuil_repetitions = seuil_repetitions
+        self.tous_threads = tous_threads
+        self.lever = lever
+        self.requetes = []  # (forme, site) dans l'ordre de lancement, instructions de contrôle comprises
+        self._verrou = threading.Lock()
+        self._thread = None
+
+    def _observer(self, sql, site):
+        if not self.tous_threads and threading.get_ident() != self._thread:
+            return
+        with self._verrou:
+            self.requetes.append((instrumentation.forme_requete(sql), site))
+
+    def __enter__(self):
+        self._thread = threading.get_ident()
+        with _verrou_activation:
+            if _activation['compteurs'] == 0:
+                _activation['temporaire'] = not instrumentation.est_active()
+                if _activation['temporaire']:
+                    # Le compteur lit ses propres mesures : pas de fichier de statistiques à la sortie
+                    instrumentation.activer(exporter_a_la_sortie=False)
+            _activation['compteurs'] += 1
+        instrumentation.ajouter_observateur(self._observer)
+        return self
+
+    def __exit__(self, type_exc, exc, trace):
+        instrumentation.retirer_observateur(self._observer)
+        with _verrou_activation:
+            _activation['compteurs'] -= 1
+            if _activation['compteurs'] == 0 and _activation['temporaire']:
+                instrumentation.desactiver()
+                _activation['temporaire'] = False
+        if type_exc is None:
+            self.verifier()
+        return False
+
+    @property
+    def nb_requetes(self):
+        """Nombre de requêtes lancées, instructions de contrôle (BEGIN, COMMIT...) exclues"""
+        return sum(1 for forme, _ in self.requetes if not _est_controle(forme))
+
+    def repetitions(self, seuil=None):
+        """
+        Formes d'instruction lancées au moins seuil fois
+
+        Returns:
+            Liste de tuples (forme, nombre, sites), de la plus répétée à la moins répétée
+        """
+        seuil = self.seuil_repetitions if seuil is None else seuil
+        nombres = Counter(forme for forme, _ in self.requetes if not _est_controle(forme))
+        sites = {}
+        for forme, site in self.requetes:
+            sites.setdefault(forme, set()).add(site)
+        return [(forme, nombre, sorted(sites[forme])) for forme, nombre in nombres.most_common() if nombre >= seuil]
+
+    def rapport(self):
+        """Résumé lisible : nombre de requêtes et formes répétées"""
+        lignes = [f"{self.nom or 'Bloc'} : {self.nb_requetes} requête(s)"]
+        for forme, nombre, sites in self.repetitions():
+            lignes.append(f"  {nombre} x {forme}  [{', '.join(sites)}]")
+        return '\n'.join(lignes)
+
+    def verifier(self):
+        """
+        Vérifie les budgets et signale les répétitions
+
+        Raises:
+            BudgetRequetesDepasse: si un budget est dépassé et que lever est vrai
+        """
+        erreurs = []
+        if self.max_requetes is not None and self.nb_requetes > self.max_requetes:
+            erreurs.append(f"{self.nb_requetes} requêtes pour un maximum de {self.max_requetes}")
+        if self.max_repetitions is not None:
+            for forme, nombre, _ in self.repetitions(self.max_repetitions + 1):
+                erreurs.append(f"{nombre} répétitions pour un maximum de {self.max_repetitions} : {forme}")
+        if erreurs:
+            message = f"{self.nom or 'Bloc'} : " + '; '.join(erreurs) + '\n' + self.rapport()
+            if self.lever:
+                raise BudgetRequetesDepasse(message)
+            warnings.warn(message, RequetesRepetees, stacklevel=3)
+        elif self.repetitions():
+            warnings.warn(self.rapport(), RequetesRepetees, stacklevel=3)
+
+
+def surveiller(nom=None, max_requetes=None, max_repetitions=None):
+    """
+    Décorateur : compte les requêtes de chaque appel quand l'instrumentation est active
+
+    Sans instrumentation, la fonction est appelée telle quelle. Les dépassements de budget
+    et les répétitions sont signalés par un avertissement RequetesRepetees, jamais par une
+    exception (pour ne pas interrompre l'interface en mode débogage).
+    """
+    def decorateur(fonction):
+        nom_appel = nom or fonction.__qualname__
+
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            if not instrumentation.est_active():
+                return fonction(*args, **kwargs)
+            with CompteurRequetes(nom_appel, max_requetes, max_repetitions, lever=False):
+                return fonction(*args, **kwargs)
+        enveloppe.surveille = True
+        enveloppe.max_requetes = max_requetes  # Budget repris par benchmarks.verifier_requetes
+        return enveloppe
+    return decorateur
+
+
+def surveiller_controleurs(classes=None):
+    """
+    Active l'instrumentation et compte les requêtes de chaque appel des méthodes des contrôleurs
+
+    Args:
+        classes: Classes de contrôleurs à surveiller (par défaut les six contrôleurs)
+    """
+    if classes is None:
+        from controllers.gestion_achat import GestionAchat
+        from controllers.gestion_client import GestionClient
+        from controllers.gestion_fournisseur import GestionFournisseur
+        from controllers.gestion_produit import GestionProduit
+        from controllers.gestion_stock import GestionStock
+        from controllers.gestion_vente import GestionVente
+        classes = (GestionAchat, GestionClient, GestionFournisseur, GestionProduit, GestionStock, GestionVente)
+
+    instrumentation.activer()
+    for classe in classes:
+        for nom, attribut in list(vars(classe).items()):
+            if (isinstance(attribut, staticmethod) and not nom.startswith('_')
+                    and not getattr(attribut.__func__, 'surveille', False)):
+                fonction = surveiller(f'{classe.__name__}.{nom}')(attribut.__func__)
+                setattr(classe, nom, staticmethod(fonction))
+
+
+def surveillance_demandee():
+    """Indique si le mode débogage N+1 est demandé par la variable d'environnement"""
+    return os.environ.get(VARIABLE_SURVEILLANCE, '') not in ('', '0')
@@ -0,0 +1,77 @@
+# utils/dates.py - Clés de date triables et bornes de périodes
+#
+# Les dates sont stockées au format ISO 'YYYY-MM-DD HH:MM:SS' : l'ordre lexicographique
+# est l'ordre chronologique, donc un filtre "date >= debut AND date < fin" utilise
+# directement les index idx_ventes_date / idx_achats_date.
+
+from datetime import date, datetime, timedelta
+
+FORMAT_DATE = '%Y-%m-%d %H:%M:%S'
+FORMAT_JOUR = '%Y-%m-%d'
+
+
+def cle_date(valeur=None):
+    """
+    Convertit une date en clé texte triable
+
+    Args:
+        valeur: datetime, date, chaîne déjà au format ISO, ou None pour maintenant
+
+    Returns:
+        Chaîne 'YYYY-MM-DD HH:MM:SS' (les chaînes sont conservées telles quelles)
+    """
+    if valeur is None:
+        return datetime.now().strftime(FORMAT_DATE)
+    if isinstance(valeur, datetime):
+        return valeur.strftime(FORMAT_DATE)
+    if isinstance(valeur, date):
+        return valeur.strftime(FORMAT_DATE)
+    return valeur
+
+
+def _jour(valeur):
+    if valeur is None:
+        return date.today()
+    if isinstance(valeur, datetime):
+        return valeur.date()
+    if isinstance(valeur, date):
+        return valeur
+    return datetime.strptime(valeur[:10], FORMAT_JOUR).date()
+
+
+def bornes_periode(date_debut, date_fin):
+    """
+    Bornes semi-ouvertes [debut, fin) couvrant les jours date_debut à date_fin inclus
+
+    Args:
+        date_debut: Premier jour (date, datetime ou 'YYYY-MM-DD')
+        date_fin: Dernier jour inclus (date, datetime ou 'YYYY-MM-DD')
+
+    Returns:
+        (debut, fin) au format 'YYYY-MM-DD'
+    """
+    debut = _jour(date_debut)
+    fin = _jour(date_fin) + timedelta(days=1)
+    return debut.strftime(FORMAT_JOUR), fin.strftime(FORMAT_JOUR)
+
+
+def bornes_jour(jour=None):
+    """
+    Bornes semi-ouvertes d'une journée (aujourd'hui par défaut)
+
+    Returns:
+        (debut, fin) au format 'YYYY-MM-DD'
+    """
+    return bornes_periode(jour, jour)
+
+
+def bornes_mois(jour=None):
+    """
+    Bornes semi-ouvertes du mois contenant le jour donné (mois en cours par défaut)
+
+    Returns:
+        (debut, fin) au format 'YYYY-MM-DD'
+    """
+    debut = _jour(jour).replace(day=1)
+    fin = (debut + timedelta(days=32)).replace(day=1)
+    return debut.strftime(FORMAT_JOUR), fin.strftime(FORMAT_JOUR)
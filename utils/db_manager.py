@@ -0,0 +1,257 @@
+# utils/db_manager.py - Gestionnaire central des connexions SQLite
+
+import sqlite3
+import os
+import threading
+import weakref
+from contextlib import contextmanager
+from utils import instrumentation
+
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'db', 'database.db')
+
+# Taille du cache de requêtes préparées par connexion
+TAILLE_CACHE_REQUETES = 256
+
+# Profil PRAGMA appliqué à chaque connexion : WAL pour que les lectures (tableau de bord,
+# rapports) ne soient pas bloquées par l'écriture d'une vente
+PROFIL_PERFORMANCE = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,  # octets
+    'cache_size': -32000,  # négatif = en Kio (~32 Mo)
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,  # millisecondes d'attente avant SQLITE_BUSY
+}
+
+_config = {
+    'db_path': DB_PATH,
+    'pragmas': dict(PROFIL_PERFORMANCE),
+    'generation': 0,  # Incrémentée à chaque reconfiguration pour invalider les connexions des threads
+    'tables_fts': None,  # Tables de recherche plein texte présentes (chargées à la demande)
+}
+_local = threading.local()
+_connexions = set()  # Connexions ouvertes, tous threads confondus
+_verrou = threading.Lock()
+_invalidations = []  # Fonctions appelées quand la base change (caches des modèles)
+
+
+def configurer(db_path=None, pragmas=None):
+    """
+    Configure le gestionnaire de connexions (à appeler une seule fois au démarrage)
+
+    Args:
+        db_path: Chemin du fichier de base de données (par défaut db/database.db)
+        pragmas: Dictionnaire de PRAGMA remplaçant ceux de PROFIL_PERFORMANCE
+                 (une valeur None désactive le PRAGMA correspondant)
+    """
+    fermer_connexions()
+    if db_path is not None:
+        _config['db_path'] = db_path
+    if pragmas is not None:
+        profil = dict(PROFIL_PERFORMANCE)
+        profil.update(pragmas)
+        _config['pragmas'] = {nom: valeur for nom, valeur in profil.items() if valeur is not None}
+
+
+def appliquer_pragmas(conn):
+    """
+    Applique le profil PRAGMA configuré à une connexion
+
+    Args:
+        conn: Connexion sqlite3 hors transaction
+    """
+    for nom, valeur in _config['pragmas'].items():
+        conn.execute(f'PRAGMA {nom} = {valeur}')
+
+
+def get_db_path():
+    """Retourne le chemin de la base de données configurée"""
+    return _config['db_path']
+
+
+def _ouvrir_connexion():
+    conn = sqlite3.connect(
+        _config['db_path'],
+        cached_statements=TAILLE_CACHE_REQUETES,
+        isolation_level=None,  # Les transactions sont gérées explicitement par transaction()
+        check_same_thread=False,  # Chaque thread garde sa connexion, mais la fermeture peut venir d'ailleurs
+        # Mesure des requêtes, instrumentée à la demande (voir utils.instrumentation)
+        factory=instrumentation.ConnexionInstrumentee
+    )
+    appliquer_pragmas(conn)
+    return conn
+
+
+class _Gardien:
+    """Objet rangé dans le stockage local d'un thread, dont la libération ferme la connexion du thread"""
+
+
+def _liberer(conn):
+    with _verrou:
+        _connexions.discard(conn)
+    conn.close()
+
+
+def get_connection():
+    """
+    Retourne la connexion du thread courant, ouverte une seule fois puis réutilisée
+
+    Returns:
+        Connexion sqlite3 (ne pas la fermer : elle appartient au gestionnaire)
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None or (_local.generation != _config['generation'] and _local.profondeur == 0):
+        # Connexion obsolète (configurer) : remplacée hors transaction, par son propre thread
+        if conn is not None:
+            _local.fermeture()
+        conn = _ouvrir_connexion()
+        with _verrou:
+            _connexions.add(conn)
+        _local.conn = conn
+        _local.generation = _config['generation']
+        _local.profondeur = 0
+        _local.apres = []
+        _local.version_donnees = None
+        # Le stockage local est libéré quand le thread se termine : le gardien aussi, ce qui ferme la connexion
+        _local.gardien = _Gardien()
+        _local.fermeture = weakref.finalize(_local.gardien, _liberer, conn)
+    if conn.instrumentee != instrumentation.est_active():
+        # Instrumentation activée ou désactivée depuis : appliquée par le thread propriétaire
+        conn.instrumenter(instrumentation.est_active())
+    return conn
+
+
+def nb_connexions():
+    """Nombre de connexions ouvertes par le gestionnaire, tous threads confondus"""
+    with _verrou:
+        return len(_connexions)
+
+
+@contextmanager
+def transaction():
+    """
+    Ouvre une transaction d'écriture sur la connexion du thread courant
+
+    Valide à la sortie du bloc, annule si une exception est levée.
+    Un bloc imbriqué est un SAVEPOINT de la transaction externe : s'il lève une
+    exception, seules ses propres écritures sont annulées (l'exception est propagée),
+    et tout n'est validé qu'à la sortie du bloc le plus externe.
+
+    Yields:
+        Curseur sqlite3
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    if _local.profondeur > 0:
+        point = f'niveau_{_local.profondeur}'
+        conn.execute(f'SAVEPOINT {point}')
+        _local.profondeur += 1
+        try:
+            yield cursor
+        except BaseException:
+            # Certaines erreurs (disque plein, E/S, ON CONFLICT ROLLBACK) annulent déjà toute
+            # la transaction : le SAVEPOINT n'existe plus
+            if conn.in_transaction:
+                conn.execute(f'ROLLBACK TO {point}')
+            raise
+        finally:
+            _local.profondeur -= 1
+            if conn.in_transaction:
+                conn.execute(f'RELEASE {point}')
+        return
+
+    conn.execute('BEGIN IMMEDIATE')
+    _local.profondeur = 1
+    try:
+        yield cursor
+        conn.execute('COMMIT')
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        _local.profondeur = 0
+        apres, _local.apres = _local.apres, []
+        for fonction in apres:
+            fonction()
+
+
+def en_transaction():
+    """Indique si le thread courant a une transaction ouverte (écritures pas encore validées)"""
+    get_connection()
+    return _local.profondeur > 0
+
+
+def apres_transaction(fonction):
+    """
+    Appelle fonction à la fin de la transaction en cours (validée ou annulée)
+
+    Sert à invalider les caches une fois l'écriture visible des autres connexions.
+    Hors transaction, fonction est appelée immédiatement.
+    """
+    get_connection()
+    if _local.profondeur > 0:
+        _local.apres.append(fonction)
+    else:
+        fonction()
+
+
+def donnees_modifiees_ailleurs():
+    """
+    Indique si une autre connexion a validé une écriture depuis le dernier appel dans ce thread
+
+    Repose sur PRAGMA data_version, qui change quand une autre connexion (d'un autre thread ou
+    d'un autre processus, par exemple une seconde caisse) valide une transaction. Sert à
+    vider les caches des modèles, qui ne voient que les écritures de leur propre processus.
+    Vrai au premier appel de chaque connexion.
+    """
+    conn = get_connection()
+    version = conn.execute('PRAGMA data_version').fetchone()[0]
+    modifiees = version != _local.version_donnees
+    _local.version_donnees = version
+    return modifiees
+
+
+def enregistrer_invalidation(fonction):
+    """Enregistre une fonction sans argument appelée à chaque changement de base (configurer)"""
+    _invalidations.append(fonction)
+
+
+def recherche_plein_texte_disponible(table_fts):
+    """
+    Indique si une table FTS5 existe dans la base (résultat mis en cache)
+
+    Args:
+        table_fts: Nom de la table virtuelle (ex: 'produits_fts')
+    """
+    tables = _config['tables_fts']
+    if tables is None:
+        rows = get_connection().execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND sql LIKE 'CREATE VIRTUAL TABLE%fts5%'"
+        ).fetchall()
+        tables = _config['tables_fts'] = {row[0] for row in rows}
+    return table_fts in tables
+
+
+def invalider_cache_schema():
+    """À appeler après une modification du schéma (création des tables de recherche)"""
+    _config['tables_fts'] = None
+
+
+def fermer_connexions():
+    """
+    Ferme la connexion du thread courant et rend obsolètes celles des autres threads
+
+    Les connexions des autres threads, qui peuvent être en cours d'utilisation, ne sont pas
+    fermées ici : chaque thread remplace la sienne à son prochain get_connection() hors
+    transaction, et une connexion est de toute façon fermée à la fin de son thread.
+    """
+    with _verrou:
+        _config['generation'] += 1
+        _config['tables_fts'] = None
+    fermeture = getattr(_local, 'fermeture', None)
+    if fermeture is not None and _local.profondeur == 0:
+        fermeture()
+        _local.conn = None
+    for fonction in _invalidations:
+        fonction()
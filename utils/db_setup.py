@@ -2,132 +2,316 @@
 
 import sqlite3
 import os
+from utils.db_manager import configurer, get_connection, get_db_path, appliquer_pragmas, invalider_cache_schema, transaction
+from models.cumul_vente import CumulVentes
+from models.mouvement_stock import MouvementStock, OUVERTURE
 
-def setup_database():
-    """Initialise la base de données si elle n'existe pas déjà"""
-    db_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'db')
-    
-    # Créer le répertoire de la base de données s'il n'existe pas
-    if not os.path.exists(db_dir):
-        os.makedirs(db_dir)
-    
-    db_path = os.path.join(db_dir, 'database.db')
-    
-    # Se connecter à la base de données (la crée si elle n'existe pas)
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+# Index secondaires (clés étrangères et colonnes de date), créés à chaque démarrage
+# pour migrer automatiquement les bases existantes
+INDEX_SECONDAIRES = {
+    'idx_produits_categorie': 'produits (categorie_id)',
+    'idx_ventes_date': 'ventes (date_vente)',
+    'idx_ventes_client': 'ventes (client_id, date_vente)',
+    'idx_details_vente_vente': 'details_vente (vente_id)',
+    'idx_details_vente_produit': 'details_vente (produit_id)',
+    'idx_achats_date': 'achats (date_achat)',
+    'idx_details_achat_achat': 'details_achat (achat_id)',
+    'idx_details_achat_produit': 'details_achat (produit_id)',
+    'idx_mouvements_produit': 'mouvements_stock (produit_id)',
+    'idx_instantanes_mouvement': 'stocks_instantanes (mouvement_id)',
+}
+
+def creer_index(cursor):
+    """
+    Crée les index secondaires manquants
     
-    # Créer les tables si elles n'existent pas
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS categories (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        nom TEXT NOT NULL UNIQUE,
-        description TEXT
-    )
-    ''')
+    Args:
+        cursor: Curseur sqlite3
+    """
+    for nom, definition in INDEX_SECONDAIRES.items():
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {nom} ON {definition}')
+
+# Index de recherche plein texte (FTS5, contenu externe) : table source -> colonnes indexées
+INDEX_RECHERCHE = {
+    'produits': ('nom', 'description'),
+    'clients': ('nom', 'adresse', 'telephone', 'email'),
+}
+
+def creer_index_recherche(cursor):
+    """
+    Crée les tables FTS5 et les triggers qui les synchronisent avec leur table source
     
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS produits (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        nom TEXT NOT NULL,
-        description TEXT,
-        categorie_id INTEGER,
-        prix_achat REAL,
-        prix_vente REAL,
-        quantite INTEGER DEFAULT 0,
-        seuil_reapprovisionnement INTEGER DEFAULT 5,
-        FOREIGN KEY (categorie_id) REFERENCES categories (id)
-    )
-    ''')
+    Sans effet si SQLite a été compilé sans FTS5 (la recherche retombe alors sur LIKE).
     
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS fournisseurs (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        nom TEXT NOT NULL,
-        adresse TEXT,
-        telephone TEXT,
-        email TEXT,
-        notes TEXT
-    )
-    ''')
+    Args:
+        cursor: Curseur sqlite3
+        
+    Returns:
+        True si les index de recherche sont disponibles
+    """
+    for table, colonnes in INDEX_RECHERCHE.items():
+        fts = f'{table}_fts'
+        cols = ', '.join(colonnes)
+        old_cols = ', '.join(f'old.{c}' for c in colonnes)
+        new_cols = ', '.join(f'new.{c}' for c in colonnes)
+        
+        existe = cursor.execute("SELECT 1 FROM sqlite_master WHERE name=?", (fts,)).fetchone()
+        if not existe:
+            try:
+                # remove_diacritics : "electricite" trouve "Électricité"; prefix : requêtes "cim*" indexées
+                cursor.execute(f'''
+                CREATE VIRTUAL TABLE {fts} USING fts5(
+                    {cols}, content='{table}', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+                )
+                ''')
+            except sqlite3.OperationalError:
+                # Module fts5 absent
+                return False
+            # Indexer les lignes déjà présentes
+            cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols});
+        END
+        ''')
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+        END
+        ''')
+        # Uniquement sur les colonnes indexées : les mouvements de stock ne touchent pas l'index
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+            INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_cols});
+        END
+        ''')
+    return True
+
+def setup_database(db_path=None, pragmas=None):
+    """
+    Initialise la base de données si elle n'existe pas déjà
     
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS clients (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        nom TEXT NOT NULL,
-        adresse TEXT,
-        telephone TEXT,
-        email TEXT,
-        notes TEXT
-    )
-    ''')
+    Args:
+        db_path: Chemin du fichier de base de données (par défaut celui du gestionnaire de connexions)
+        pragmas: Surcharges du profil de performance (voir utils.db_manager.PROFIL_PERFORMANCE)
+    """
+    if db_path is not None or pragmas is not None:
+        configurer(db_path, pragmas)
     
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS achats (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        fournisseur_id INTEGER,
-        date_achat TEXT,
-        montant_total REAL,
-        notes TEXT,
-        FOREIGN KEY (fournisseur_id) REFERENCES fournisseurs (id)
-    )
-    ''')
+    db_dir = os.path.dirname(get_db_path())
     
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS details_achat (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        achat_id INTEGER,
-        produit_id INTEGER,
-        quantite INTEGER,
-        prix_unitaire REAL,
-        FOREIGN KEY (achat_id) REFERENCES achats (id),
-        FOREIGN KEY (produit_id) REFERENCES produits (id)
-    )
-    ''')
+    # Créer le répertoire de la base de données s'il n'existe pas
+    if not os.path.exists(db_dir):
+        os.makedirs(db_dir)
     
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS ventes (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        client_id INTEGER,
-        date_vente TEXT,
-        montant_total REAL,
-        notes TEXT,
-        FOREIGN KEY (client_id) REFERENCES clients (id)
-    )
-    ''')
+    # Se connecter à la base de données (la crée si elle n'existe pas)
+    conn = get_connection()
     
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS details_vente (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        vente_id INTEGER,
-        produit_id INTEGER,
-        quantite INTEGER,
-        prix_unitaire REAL,
-        FOREIGN KEY (vente_id) REFERENCES ventes (id),
-        FOREIGN KEY (produit_id) REFERENCES produits (id)
-    )
-    ''')
+    # Passer en mode WAL et appliquer le profil (le mode journal est persistant dans le fichier)
+    appliquer_pragmas(conn)
     
-    # Insérer quelques catégories par défaut
-    categories_default = [
-        ('Briques', 'Tous types de briques'),
-        ('Ciment', 'Ciment et liant'),
-        ('Peinture', 'Peintures intérieures et extérieures'),
-        ('Bois', 'Matériaux en bois'),
-        ('Métal', 'Produits métalliques'),
-        ('Électricité', 'Matériel électrique'),
-        ('Plomberie', 'Matériel de plomberie')
-    ]
+    # Tout le schéma en une transaction : validé en entier ou annulé si une étape échoue
+    with transaction() as cursor:
+        
+        # Créer les tables si elles n'existent pas
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL UNIQUE,
+            description TEXT
+        )
+        ''')
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS produits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL,
+            description TEXT,
+            categorie_id INTEGER,
+            prix_achat REAL,
+            prix_vente REAL,
+            quantite INTEGER DEFAULT 0,
+            seuil_reapprovisionnement INTEGER DEFAULT 5,
+            FOREIGN KEY (categorie_id) REFERENCES categories (id)
+        )
+        ''')
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fournisseurs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL,
+            adresse TEXT,
+            telephone TEXT,
+            email TEXT,
+            notes TEXT
+        )
+        ''')
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS clients (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nom TEXT NOT NULL,
+            adresse TEXT,
+            telephone TEXT,
+            email TEXT,
+            notes TEXT
+        )
+        ''')
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS achats (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fournisseur_id INTEGER,
+            date_achat TEXT,
+            montant_total REAL,
+            notes TEXT,
+            FOREIGN KEY (fournisseur_id) REFERENCES fournisseurs (id)
+        )
+        ''')
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS details_achat (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            achat_id INTEGER,
+            produit_id INTEGER,
+            quantite INTEGER,
+            prix_unitaire REAL,
+            FOREIGN KEY (achat_id) REFERENCES achats (id),
+            FOREIGN KEY (produit_id) REFERENCES produits (id)
+        )
+        ''')
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ventes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_id INTEGER,
+            date_vente TEXT,
+            montant_total REAL,
+            notes TEXT,
+            FOREIGN KEY (client_id) REFERENCES clients (id)
+        )
+        ''')
+        
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS details_vente (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            vente_id INTEGER,
+            produit_id INTEGER,
+            quantite INTEGER,
+            prix_unitaire REAL,
+            cout_unitaire REAL,
+            FOREIGN KEY (vente_id) REFERENCES ventes (id),
+            FOREIGN KEY (produit_id) REFERENCES produits (id)
+        )
+        ''')
+        
+        # Coût d'achat unitaire de chaque ligne, fixé au moment de la vente : les cumuls
+        # (models.cumul_vente) le lisent, un changement de prix d'achat ne modifie pas le passé
+        colonnes = [row[1] for row in cursor.execute('PRAGMA table_info(details_vente)')]
+        if 'cout_unitaire' not in colonnes:
+            # Base existante : le prix d'achat actuel est le seul coût connu des lignes déjà enregistrées
+            cursor.execute('ALTER TABLE details_vente ADD COLUMN cout_unitaire REAL')
+            cursor.execute('''
+            UPDATE details_vente
+            SET cout_unitaire = COALESCE((SELECT prix_achat FROM produits WHERE id = details_vente.produit_id), 0)
+            ''')
+        # Lignes insérées en SQL sans leur coût (imports, générateur) : prix d'achat au moment de l'insertion
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS details_vente_cout AFTER INSERT ON details_vente
+        WHEN new.cout_unitaire IS NULL BEGIN
+            UPDATE details_vente
+            SET cout_unitaire = COALESCE((SELECT prix_achat FROM produits WHERE id = new.produit_id), 0)
+            WHERE id = new.id;
+        END
+        ''')
+        
+        # Cumuls quotidiens des ventes par produit, tenus à jour par Vente.save / Vente.delete.
+        # Les rapports mensuels et annuels lisent ces lignes au lieu de toutes les lignes de vente.
+        # nb_tickets : nombre de ventes du jour contenant le produit.
+        cumuls_existants = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name='ventes_jour_produit'").fetchone()
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ventes_jour_produit (
+            jour TEXT NOT NULL,
+            produit_id INTEGER NOT NULL,
+            categorie_id INTEGER,
+            quantite INTEGER NOT NULL DEFAULT 0,
+            chiffre_affaires REAL NOT NULL DEFAULT 0,
+            cout REAL NOT NULL DEFAULT 0,
+            nb_tickets INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (jour, produit_id)
+        ) WITHOUT ROWID
+        ''')
+        if not cumuls_existants:
+            # Base existante : calculer les cumuls des ventes déjà enregistrées
+            CumulVentes.recalculer(cursor)
+        
+        # Registre des mouvements de stock (ajout seul) et instantanés périodiques,
+        # voir models.mouvement_stock
+        registre_existant = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name='mouvements_stock'").fetchone()
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS mouvements_stock (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            produit_id INTEGER NOT NULL,
+            type_mouvement TEXT NOT NULL,
+            reference INTEGER,
+            delta INTEGER NOT NULL,
+            date_mouvement TEXT NOT NULL,
+            motif TEXT
+        )
+        ''')
+        for operation in ('UPDATE', 'DELETE'):
+            cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS mouvements_stock_{operation.lower()} BEFORE {operation} ON mouvements_stock BEGIN
+                SELECT RAISE(ABORT, 'Le registre des mouvements de stock est en ajout seul');
+            END
+            ''')
+        if not registre_existant:
+            # Base existante : le stock actuel de chaque produit ouvre le registre
+            MouvementStock.enregistrer_stocks_initiaux(cursor, OUVERTURE)
+        
+        # Stock de chaque produit après le mouvement mouvement_id
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stocks_instantanes (
+            produit_id INTEGER NOT NULL,
+            mouvement_id INTEGER NOT NULL,
+            date_instantane TEXT NOT NULL,
+            quantite INTEGER NOT NULL,
+            PRIMARY KEY (produit_id, mouvement_id)
+        ) WITHOUT ROWID
+        ''')
+        
+        # Index secondaires (migration automatique des bases existantes)
+        creer_index(cursor)
+        
+        # Index de recherche plein texte, si FTS5 est disponible
+        creer_index_recherche(cursor)
+        
+        # Insérer quelques catégories par défaut
+        categories_default = [
+            ('Briques', 'Tous types de briques'),
+            ('Ciment', 'Ciment et liant'),
+            ('Peinture', 'Peintures intérieures et extérieures'),
+            ('Bois', 'Matériaux en bois'),
+            ('Métal', 'Produits métalliques'),
+            ('Électricité', 'Matériel électrique'),
+            ('Plomberie', 'Matériel de plomberie')
+        ]
+        
+        for categorie in categories_default:
+            try:
+                cursor.execute('INSERT INTO categories (nom, description) VALUES (?, ?)', categorie)
+            except sqlite3.IntegrityError:
+                # La catégorie existe déjà, on ignore
+                pass
     
-    for categorie in categories_default:
-        try:
-            cursor.execute('INSERT INTO categories (nom, description) VALUES (?, ?)', categorie)
-        except sqlite3.IntegrityError:
-            # La catégorie existe déjà, on ignore
-            pass
+    invalider_cache_schema()
     
-    # Valider les modifications
-    conn.commit()
-    conn.close()
+    # Mettre à jour les statistiques du planificateur si nécessaire
+    conn.execute('PRAGMA optimize')
     
     print("Base de données initialisée avec succès!")
\ No newline at end of file
@@ -0,0 +1,146 @@
+# utils/diagnostic_sql.py - Consultation des mesures de requêtes SQL (voir utils.instrumentation)
+#
+# Usage : python -m utils.diagnostic_sql statistiques [fichier.json] [--tri total] [--limite 20]
+#         python -m utils.diagnostic_sql lentes [journal.jsonl] [--limite 20]
+#         python -m utils.diagnostic_sql executer [--seuil 50] module [arguments...]
+#
+# statistiques et lentes lisent les fichiers écrits par un programme lancé avec
+# MAGASIN_SQL_INSTRUMENTATION=1 ; executer lance un module Python avec l'instrumentation
+# active (par exemple benchmarks.executer) et affiche ses mesures à la fin.
+
+import argparse
+import json
+import runpy
+import sys
+from utils import instrumentation
+
+LIMITE = 20
+LARGEUR_REQUETE = 90
+
+
+def _abreger(texte, largeur=LARGEUR_REQUETE):
+    return texte if len(texte) <= largeur else texte[:largeur - 3] + '...'
+
+
+def _histogramme(classes, bornes):
+    """Histogramme compact : 'borne:nombre' pour chaque classe non vide"""
+    etiquettes = [f'<{borne:g}' for borne in bornes] + [f'>{bornes[-1]:g}']
+    return ' '.join(f'{etiquette}:{nombre}' for etiquette, nombre in zip(etiquettes, classes) if nombre)
+
+
+def afficher_statistiques(statistiques, bornes=instrumentation.BORNES_HISTOGRAMME_MS, limite=LIMITE):
+    """
+    Affiche les statistiques par requête et méthode appelante
+
+    Args:
+        statistiques: StatistiqueRequete (ou dictionnaires de mêmes champs), déjà triées
+        bornes: Bornes des classes de l'histogramme en millisecondes
+    """
+    print(f"{'appels':>8} {'total ms':>10} {'moy. ms':>9} {'max ms':>9} {'lignes/appel':>12}  site / requête")
+    for statistique in statistiques[:limite]:
+        if isinstance(statistique, dict):
+            statistique = instrumentation.StatistiqueRequete(**statistique)
+        print(f"{statistique.appels:>8} {statistique.duree_totale_ms:>10.1f} "
+              f"{statistique.duree_totale_ms / statistique.appels:>9.3f} {statistique.duree_max_ms:>9.3f} "
+              f"{statistique.lignes / statistique.appels:>12.1f}  {statistique.site}")
+        print(f"{'':>53}{_abreger(statistique.forme)}")
+        print(f"{'':>53}{_histogramme(statistique.histogramme, bornes)}")
+    if len(statistiques) > limite:
+        print(f"... {len(statistiques) - limite} autres")
+
+
+def afficher_lentes(entrees, limite=LIMITE):
+    """Affiche les dernières requêtes lentes du journal, avec leur plan d'exécution"""
+    for entree in entrees[-limite:]:
+        print(f"[{entree['date']}] {entree['duree_ms']:.1f} ms, {entree['lignes']} lignes, {entree['site']}")
+        print(f"    {_abreger(' '.join((entree['sql_developpe'] or entree['sql']).split()), 200)}")
+        for ligne in entree['plan']:
+            print(f"    | {ligne}")
+
+
+def lire_journal(chemin):
+    """
+    Returns:
+        Entrées du journal des requêtes lentes (lignes JSON illisibles ignorées)
+    """
+    entrees = []
+    with open(chemin, encoding='utf-8') as journal:
+        for ligne in journal:
+            try:
+                entrees.append(json.loads(ligne))
+            except ValueError:
+                continue  # Ligne tronquée par un arrêt brutal
+    return entrees
+
+
+def executer_module(module, arguments, seuil_ms=None):
+    """
+    Exécute un module comme python -m, avec l'instrumentation active
+
+    Returns:
+        Code de sortie du module
+    """
+    instrumentation.activer(seuil_ms=seuil_ms)
+    sys.argv = [module] + list(arguments)
+    try:
+        runpy.run_module(module, run_name='__main__', alter_sys=True)
+        code = 0
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    return code
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diagnostic des requêtes SQL mesurées")
+    sous_commandes = parser.add_subparsers(dest='commande', required=True)
+
+    statistiques = sous_commandes.add_parser('statistiques', help="Statistiques exportées en fin de programme")
+    statistiques.add_argument('fichier', nargs='?', help="Fichier JSON (par défaut statistiques_sql.json "
+                                                         "à côté de la base)")
+    statistiques.add_argument('--tri', choices=('total', 'moyenne', 'max', 'appels', 'lignes'), default='total')
+    statistiques.add_argument('--limite', type=int, default=LIMITE)
+
+    lentes = sous_commandes.add_parser('lentes', help="Dernières requêtes lentes du journal")
+    lentes.add_argument('journal', nargs='?', help="Journal JSON lignes (par défaut requetes_lentes.jsonl "
+                                                   "à côté de la base)")
+    lentes.add_argument('--limite', type=int, default=LIMITE)
+
+    executer = sous_commandes.add_parser('executer', help="Lance un module Python avec l'instrumentation")
+    executer.add_argument('--seuil', type=float, help="Seuil des requêtes lentes en millisecondes")
+    executer.add_argument('--tri', choices=('total', 'moyenne', 'max', 'appels', 'lignes'), default='total')
+    executer.add_argument('--limite', type=int, default=LIMITE)
+    executer.add_argument('module', help="Module à lancer (comme python -m)")
+    executer.add_argument('arguments', nargs=argparse.REMAINDER, help="Arguments du module")
+
+    args = parser.parse_args(argv)
+
+    if args.commande == 'executer':
+        code = executer_module(args.module, args.arguments, args.seuil)
+        print(f"\n=== Requêtes SQL ({args.module}) ===")
+        afficher_statistiques(instrumentation.statistiques(args.tri), limite=args.limite)
+        lentes_memoire = instrumentation.requetes_lentes()
+        if lentes_memoire:
+            print(f"\n=== Requêtes lentes (> {instrumentation.seuil_lent_ms():g} ms) ===")
+            afficher_lentes(lentes_memoire, args.limite)
+        sys.exit(code)
+
+    try:
+        if args.commande == 'statistiques':
+            with open(args.fichier or instrumentation.chemin_statistiques(), encoding='utf-8') as f:
+                donnees = json.load(f)
+            cle = {
+                'total': 'duree_totale_ms', 'max': 'duree_max_ms', 'appels': 'appels', 'lignes': 'lignes',
+            }.get(args.tri)
+            lignes = sorted(donnees['statistiques'], reverse=True,
+                            key=(lambda s: s[cle]) if cle else (lambda s: s['duree_totale_ms'] / s['appels']))
+            print(f"Statistiques du {donnees['date']}")
+            afficher_statistiques(lignes, tuple(donnees['bornes_histogramme_ms']), args.limite)
+        else:
+            afficher_lentes(lire_journal(args.journal or instrumentation.chemin_journal()), args.limite)
+    except FileNotFoundError as e:
+        sys.exit(f"{e.filename} introuvable : lancer l'application avec "
+                 f"{instrumentation.VARIABLE_ACTIVATION}=1 pour produire les mesures.")
+
+
+if __name__ == "__main__":
+    main()
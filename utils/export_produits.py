@@ -0,0 +1,69 @@
+# utils/export_produits.py - Export CSV des produits en flux
+#
+# Usage : python -m utils.export_produits sortie.csv[.gz] [--db chemin]
+
+import argparse
+import csv
+import gzip
+import sys
+from models.produit import Produit
+
+TAILLE_LOT = 1000
+
+ENTETES = ["ID", "Nom", "Catégorie", "Prix Achat", "Prix Vente", "Stock", "Seuil Alerte"]
+
+
+class ExportAnnule(Exception):
+    """Levée quand l'export est interrompu par l'appelant"""
+
+
+def exporter_produits_csv(chemin, compresser=None, progression=None, annule=None, taille_lot=TAILLE_LOT):
+    """
+    Exporte tous les produits en CSV sans les charger en mémoire
+
+    Args:
+        chemin: Fichier de sortie
+        compresser: Compression gzip (par défaut si le chemin se termine par .gz)
+        progression: Fonction appelée avec (nb_ecrits, total) après chaque lot
+        annule: Fonction sans argument retournant True pour interrompre l'export
+        taille_lot: Nombre de lignes lues et écrites à la fois
+
+    Returns:
+        Nombre de produits exportés
+    """
+    if compresser is None:
+        compresser = chemin.endswith('.gz')
+    ouvrir = gzip.open if compresser else open
+
+    total = Produit.count()
+    nb_ecrits = 0
+    with ouvrir(chemin, 'wt', newline='', encoding='utf-8') as fichier:
+        writer = csv.writer(fichier)
+        writer.writerow(ENTETES)
+        for lignes in Produit.iter_export(taille_lot):
+            if annule is not None and annule():
+                raise ExportAnnule()
+            writer.writerows(lignes)
+            nb_ecrits += len(lignes)
+            if progression is not None:
+                progression(nb_ecrits, total)
+
+    return nb_ecrits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export CSV des produits")
+    parser.add_argument('fichier', help="Fichier de sortie (.csv ou .csv.gz)")
+    parser.add_argument('--db', default=None, help="Chemin de la base de données")
+    args = parser.parse_args(argv)
+
+    from utils.db_setup import setup_database
+
+    setup_database(args.db)
+    nb = exporter_produits_csv(args.fichier)
+    print(f"{nb} produits exportés dans {args.fichier}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+# utils/import_produits.py - Import en masse de produits depuis un fichier CSV
+#
+# Usage : python -m utils.import_produits catalogue.csv [--lot 5000] [--creer-categories] [--db chemin]
+
+import argparse
+import csv
+import sqlite3
+import sys
+import time
+import unicodedata
+from models.categorie import Categorie
+from models.produit import Produit
+
+TAILLE_LOT = 5000
+
+# En-têtes acceptés (normalisés : minuscules, sans accents, espaces ni '_') -> champ du produit
+# Les en-têtes de l'export CSV de la vue Produits sont reconnus, pour permettre l'aller-retour.
+ALIAS_COLONNES = {
+    'nom': 'nom',
+    'designation': 'nom',
+    'description': 'description',
+    'categorie': 'categorie',
+    'categorieid': 'categorie',
+    'prixachat': 'prix_achat',
+    'prixvente': 'prix_vente',
+    'quantite': 'quantite',
+    'stock': 'quantite',
+    'seuil': 'seuil_reapprovisionnement',
+    'seuilalerte': 'seuil_reapprovisionnement',
+    'seuilreapprovisionnement': 'seuil_reapprovisionnement',
+}
+
+CHAMPS_OBLIGATOIRES = ('nom', 'categorie', 'prix_achat', 'prix_vente')
+
+
+def normaliser(texte):
+    """Minuscules, sans accents, espaces ni '_' (pour comparer en-têtes et catégories)"""
+    texte = unicodedata.normalize('NFKD', texte.strip().lower())
+    return ''.join(c for c in texte if not unicodedata.combining(c) and c not in ' _')
+
+
+def _nombre(valeur, type_):
+    return type_(valeur.strip().replace(' ', '').replace(',', '.'))
+
+
+class ImportProduits:
+    """Import en flux : lecture ligne à ligne, validation, insertion par lots"""
+
+    def __init__(self, taille_lot=TAILLE_LOT, creer_categories=False):
+        self.taille_lot = taille_lot
+        self.creer_categories = creer_categories
+        self.nb_importes = 0
+        self.erreurs = []  # Liste de (numéro de ligne, message)
+        self._categories = None
+
+    def _charger_categories(self):
+        # Résolution nom -> id faite une seule fois pour tout le fichier
+        categories = Categorie.get_all()
+        self._categories = {normaliser(c.nom): c.id for c in categories}
+        self._ids_categories = {c.id for c in categories}
+
+    def _resoudre_categorie(self, valeur):
+        valeur = valeur.strip()
+        if valeur.isdigit() and int(valeur) in self._ids_categories:
+            return int(valeur)
+        cle = normaliser(valeur)
+        if cle in self._categories:
+            return self._categories[cle]
+        if not self.creer_categories:
+            raise ValueError(f"Catégorie inconnue: '{valeur}'")
+        # Passer par le modèle pour que le cache des catégories soit invalidé
+        categorie_id = Categorie(nom=valeur, description='').save()
+        self._categories[cle] = categorie_id
+        self._ids_categories.add(categorie_id)
+        return categorie_id
+
+    def valider_ligne(self, ligne):
+        """
+        Convertit une ligne CSV (dictionnaire champ -> texte) en tuple prêt à insérer
+
+        Raises:
+            ValueError si la ligne est invalide
+        """
+        for champ in CHAMPS_OBLIGATOIRES:
+            if not (ligne.get(champ) or '').strip():
+                raise ValueError(f"Champ obligatoire manquant: {champ}")
+
+        try:
+            prix_achat = _nombre(ligne['prix_achat'], float)
+            prix_vente = _nombre(ligne['prix_vente'], float)
+            quantite = _nombre(ligne.get('quantite') or '0', int)
+            seuil = _nombre(ligne.get('seuil_reapprovisionnement') or '5', int)
+        except ValueError:
+            raise ValueError("Valeur numérique invalide")
+
+        if prix_achat < 0 or prix_vente < 0 or quantite < 0 or seuil < 0:
+            raise ValueError("Les prix et quantités doivent être positifs")
+
+        return (
+            ligne['nom'].strip(),
+            (ligne.get('description') or '').strip(),
+            self._resoudre_categorie(ligne['categorie']),
+            prix_achat,
+            prix_vente,
+            quantite,
+            seuil,
+        )
+
+    def _inserer(self, lot):
+        try:
+            self.nb_importes += Produit.inserer_lot([valeurs for _, valeurs in lot])
+        except sqlite3.Error as e:
+            self.erreurs.extend((numero, f"Erreur de base de données: {e}") for numero, _ in lot)
+
+    def importer(self, fichier, delimiteur=None):
+        """
+        Importe les produits d'un fichier CSV ouvert en mode texte
+
+        Args:
+            fichier: Objet fichier (lu en flux, jamais chargé entièrement)
+            delimiteur: Séparateur de colonnes (détecté automatiquement si None)
+
+        Returns:
+            self (nb_importes et erreurs renseignés)
+        """
+        if delimiteur is None:
+            echantillon = fichier.read(4096)
+            fichier.seek(0)
+            try:
+                delimiteur = csv.Sniffer().sniff(echantillon, delimiters=',;\t').delimiter
+            except csv.Error:
+                delimiteur = ','
+
+        lecteur = csv.reader(fichier, delimiter=delimiteur)
+        entetes = next(lecteur, None)
+        if entetes is None:
+            return self
+        champs = [ALIAS_COLONNES.get(normaliser(e)) for e in entetes]
+        manquants = [c for c in CHAMPS_OBLIGATOIRES if c not in champs]
+        if manquants:
+            self.erreurs.append((1, f"Colonnes manquantes: {', '.join(manquants)}"))
+            return self
+
+        self._charger_categories()
+        lot = []
+        for numero, valeurs in enumerate(lecteur, start=2):
+            if not any(v.strip() for v in valeurs):
+                continue
+            ligne = {champ: valeur for champ, valeur in zip(champs, valeurs) if champ}
+            try:
+                lot.append((numero, self.valider_ligne(ligne)))
+            except ValueError as e:
+                self.erreurs.append((numero, str(e)))
+                continue
+
+            if len(lot) >= self.taille_lot:
+                self._inserer(lot)
+                lot = []
+
+        if lot:
+            self._inserer(lot)
+        return self
+
+
+def importer_produits_csv(chemin, taille_lot=TAILLE_LOT, creer_categories=False, delimiteur=None):
+    """
+    Importe un catalogue de produits depuis un fichier CSV
+
+    Args:
+        chemin: Chemin du fichier CSV (UTF-8, avec ou sans BOM)
+        taille_lot: Nombre de lignes insérées par transaction
+        creer_categories: Créer les catégories inconnues au lieu de rejeter la ligne
+        delimiteur: Séparateur de colonnes (détecté automatiquement si None)
+
+    Returns:
+        (nb_importes, erreurs) où erreurs est une liste de (numéro de ligne, message)
+    """
+    with open(chemin, newline='', encoding='utf-8-sig') as fichier:
+        resultat = ImportProduits(taille_lot, creer_categories).importer(fichier, delimiteur)
+    return resultat.nb_importes, resultat.erreurs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import en masse de produits depuis un fichier CSV")
+    parser.add_argument('fichier', help="Fichier CSV (colonnes: nom, description, categorie, prix_achat, prix_vente, quantite, seuil)")
+    parser.add_argument('--lot', type=int, default=TAILLE_LOT, help="Lignes par transaction")
+    parser.add_argument('--creer-categories', action='store_true', help="Créer les catégories inconnues")
+    parser.add_argument('--delimiteur', default=None, help="Séparateur de colonnes (auto par défaut)")
+    parser.add_argument('--db', default=None, help="Chemin de la base de données")
+    args = parser.parse_args(argv)
+
+    from utils.db_setup import setup_database
+
+    setup_database(args.db)
+    debut = time.perf_counter()
+    nb_importes, erreurs = importer_produits_csv(args.fichier, args.lot, args.creer_categories, args.delimiteur)
+    duree = time.perf_counter() - debut
+
+    for numero, message in erreurs:
+        print(f"Ligne {numero}: {message}", file=sys.stderr)
+    print(f"{nb_importes} produits importés en {duree:.2f} s, {len(erreurs)} ligne(s) rejetée(s)")
+    return 1 if erreurs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,448 @@
+# utils/instrumentation.py - Mesure des requêtes SQL (durée, lignes, méthode appelante)
+#
+# Désactivée par défaut. Avec MAGASIN_SQL_INSTRUMENTATION=1, les connexions ouvertes par
+# utils.db_manager (des ConnexionInstrumentee) sont instrumentées : chaque requête est chronométrée
+# (exécution et lecture des lignes), rattachée à la méthode de modèle qui l'a lancée et
+# comptée dans un histogramme en mémoire. Les requêtes plus lentes que le seuil sont
+# écrites avec leur plan d'exécution (EXPLAIN QUERY PLAN) dans le journal des requêtes lentes.
+#
+# Variables d'environnement :
+#   MAGASIN_SQL_INSTRUMENTATION  1 pour activer
+#   MAGASIN_SQL_LENT_MS          Seuil des requêtes lentes en millisecondes (100 par défaut)
+#   MAGASIN_SQL_JOURNAL          Journal des requêtes lentes, une ligne JSON par requête
+#                                (par défaut requetes_lentes.jsonl à côté de la base)
+#   MAGASIN_SQL_STATISTIQUES     Fichier JSON où écrire les statistiques à la fin du programme
+#                                (par défaut statistiques_sql.json à côté de la base)
+#
+# Les statistiques et le journal se consultent avec python -m utils.diagnostic_sql.
+
+import atexit
+import bisect
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime
+
+VARIABLE_ACTIVATION = 'MAGASIN_SQL_INSTRUMENTATION'
+VARIABLE_SEUIL = 'MAGASIN_SQL_LENT_MS'
+VARIABLE_JOURNAL = 'MAGASIN_SQL_JOURNAL'
+VARIABLE_STATISTIQUES = 'MAGASIN_SQL_STATISTIQUES'
+
+SEUIL_LENT_MS = 100
+# Bornes supérieures des classes de l'histogramme des durées, en millisecondes (plus une classe au-delà)
+BORNES_HISTOGRAMME_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000)
+NB_REQUETES_LENTES = 200  # Requêtes lentes gardées en mémoire
+TAILLE_PARAMETRES = 200  # Longueur maximale des paramètres recopiés dans le journal
+FICHIER_JOURNAL = 'requetes_lentes.jsonl'
+FICHIER_STATISTIQUES = 'statistiques_sql.json'
+
+# Modules traversés entre la méthode appelante et la requête (ignorés pour trouver l'appelant)
+MODULES_INTERMEDIAIRES = ('utils.instrumentation', 'utils.db_manager', 'contextlib')
+HORS_CURSEUR = '(hors curseur)'
+
+# Statistiques d'une forme de requête lancée depuis une méthode
+StatistiqueRequete = namedtuple('StatistiqueRequete', [
+    'forme', 'site', 'appels', 'duree_totale_ms', 'duree_max_ms', 'lignes', 'histogramme'])
+
+_etat = {
+    'active': os.environ.get(VARIABLE_ACTIVATION, '') not in ('', '0'),
+    'seuil_ms': float(os.environ.get(VARIABLE_SEUIL) or SEUIL_LENT_MS),
+    'journal': os.environ.get(VARIABLE_JOURNAL) or None,
+    'observateurs': (),  # Fonctions (sql, site) appelées au lancement de chaque instruction
+    'export_enregistre': False,  # Export des statistiques à la fin du programme déjà prévu
+}
+_statistiques = {}  # (forme, site) -> [appels, durée totale, durée max, lignes, histogramme]
+_lentes = deque(maxlen=NB_REQUETES_LENTES)
+_formes = {}  # Texte SQL -> forme (les modèles réutilisent toujours les mêmes textes)
+_verrou = threading.Lock()
+_local = threading.local()
+
+_ESPACES = re.compile(r'\s+')
+_LITTERAUX = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LISTES = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+
+def est_active():
+    """Indique si les nouvelles connexions sont instrumentées"""
+    return _etat['active']
+
+
+def activer(seuil_ms=None, journal=None, exporter_a_la_sortie=True):
+    """
+    Active l'instrumentation
+
+    Chaque connexion est instrumentée par son propre thread, à son prochain get_connection() :
+    aucune connexion n'est fermée, même au milieu d'une transaction.
+
+    Args:
+        seuil_ms: Durée au-delà de laquelle une requête est journalisée avec son plan
+        journal: Chemin du journal des requêtes lentes
+        exporter_a_la_sortie: Écrire les statistiques à la fin du programme (chemin_statistiques()),
+                              comme avec MAGASIN_SQL_INSTRUMENTATION=1 ; False pour une activation
+                              temporaire dont l'appelant lit lui-même les mesures
+    """
+    if seuil_ms is not None:
+        _etat['seuil_ms'] = seuil_ms
+    if journal is not None:
+        _etat['journal'] = journal
+    if exporter_a_la_sortie:
+        _enregistrer_export()
+    _etat['active'] = True
+
+
+def desactiver():
+    """Désactive l'instrumentation (les statistiques déjà relevées sont conservées)"""
+    _etat['active'] = False
+
+
+def reinitialiser():
+    """Efface les statistiques et les requêtes lentes gardées en mémoire"""
+    with _verrou:
+        _statistiques.clear()
+        _lentes.clear()
+
+
+def ajouter_observateur(fonction):
+    """
+    Appelle fonction(sql, site) au lancement de chaque instruction d'une connexion instrumentée
+
+    La fonction est appelée dans le thread qui exécute l'instruction (voir utils.compteur_requetes).
+    """
+    with _verrou:
+        _etat['observateurs'] += (fonction,)
+
+
+def retirer_observateur(fonction):
+    with _verrou:
+        observateurs = list(_etat['observateurs'])
+        observateurs.remove(fonction)
+        _etat['observateurs'] = tuple(observateurs)
+
+
+def forme_requete(sql):
+    """
+    Forme normalisée d'une requête : espaces réduits, littéraux et listes de paramètres remplacés par ?
+
+    Deux requêtes de même forme ne diffèrent que par leurs valeurs.
+    """
+    forme = _formes.get(sql)
+    if forme is None:
+        forme = _ESPACES.sub(' ', sql).strip()
+        forme = _LITTERAUX.sub('?', forme)
+        forme = _LISTES.sub('(?, ...)', forme)
+        if len(_formes) < 10000:
+            _formes[sql] = forme
+    return forme
+
+
+def _site_appelant():
+    """Méthode de modèle à l'origine de la requête (à défaut, premier appelant hors de ce module)"""
+    frame = sys._getframe(2)
+    premier = None
+    for _ in range(50):
+        if frame is None:
+            break
+        module = frame.f_globals.get('__name__', '')
+        if module not in MODULES_INTERMEDIAIRES:
+            code = frame.f_code
+            site = f"{module}.{getattr(code, 'co_qualname', code.co_name)}"
+            if module.startswith('models.'):
+                return site
+            premier = premier or site
+        frame = frame.f_back
+    return premier or '?'
+
+
+def seuil_lent_ms():
+    return _etat['seuil_ms']
+
+
+def _chemin_defaut(nom):
+    from utils.db_manager import get_db_path
+
+    return os.path.join(os.path.dirname(get_db_path()), nom)
+
+
+def chemin_journal():
+    """Chemin du journal des requêtes lentes"""
+    return _etat['journal'] or _chemin_defaut(FICHIER_JOURNAL)
+
+
+def chemin_statistiques():
+    """Chemin du fichier des statistiques écrit par exporter()"""
+    return os.environ.get(VARIABLE_STATISTIQUES) or _chemin_defaut(FICHIER_STATISTIQUES)
+
+
+class _Mesure:
+    __slots__ = ('sql', 'parametres', 'site', 'duree', 'lignes', 'sql_developpe')
+
+    def __init__(self, sql, parametres, site):
+        self.sql = sql
+        self.parametres = parametres
+        self.site = site
+        self.duree = 0.0
+        self.lignes = 0
+        self.sql_developpe = None  # Requête avec ses valeurs, transmise par la fonction de trace
+
+
+def _enregistrer(mesure, connexion=None):
+    """Ajoute une requête terminée aux statistiques (et au journal si elle est lente)"""
+    duree_ms = mesure.duree * 1000
+    cle = (forme_requete(mesure.sql), mesure.site)
+    with _verrou:
+        statistique = _statistiques.get(cle)
+        if statistique is None:
+            statistique = _statistiques[cle] = [0, 0.0, 0.0, 0, [0] * (len(BORNES_HISTOGRAMME_MS) + 1)]
+        statistique[0] += 1
+        statistique[1] += duree_ms
+        statistique[2] = max(statistique[2], duree_ms)
+        statistique[3] += mesure.lignes
+        statistique[4][bisect.bisect_left(BORNES_HISTOGRAMME_MS, duree_ms)] += 1
+
+    if duree_ms >= _etat['seuil_ms'] and connexion is not None:
+        _journaliser(mesure, duree_ms, connexion)
+
+
+def _plan(connexion, mesure):
+    # Méthode de sqlite3.Connection : le plan lui-même n'est ni mesuré ni tracé
+    _local.courante = mesure
+    try:
+        parametres = mesure.parametres if mesure.parametres is not None else ()
+        return [row[3] for row in sqlite3.Connection.execute(connexion, f'EXPLAIN QUERY PLAN {mesure.sql}',
+                                                                  parametres)]
+    except sqlite3.Error:
+        return []
+    finally:
+        _local.courante = None
+
+
+def _journaliser(mesure, duree_ms, connexion):
+    entree = {
+        'date': datetime.now().isoformat(timespec='milliseconds'),
+        'duree_ms': round(duree_ms, 3),
+        'lignes': mesure.lignes,
+        'site': mesure.site,
+        'sql': forme_requete(mesure.sql),
+        'sql_developpe': mesure.sql_developpe,
+        'parametres': repr(mesure.parametres)[:TAILLE_PARAMETRES] if mesure.parametres is not None else None,
+        'plan': _plan(connexion, mesure) if mesure.parametres is not None else [],
+    }
+    with _verrou:
+        _lentes.append(entree)
+        try:
+            with open(chemin_journal(), 'a', encoding='utf-8') as journal:
+                journal.write(json.dumps(entree, ensure_ascii=False) + '\n')
+        except OSError:
+            pass  # Le journal ne doit jamais faire échouer une requête
+
+
+def _tracer(instruction):
+    """Fonction de trace SQLite : appelée au lancement de chaque instruction"""
+    mesure = getattr(_local, 'courante', None)
+    if mesure is not None:
+        if mesure.sql_developpe is None:
+            mesure.sql_developpe = instruction
+        return
+    # Instruction lancée sans passer par un curseur instrumenté (executescript par exemple) : comptée sans durée
+    for observateur in _etat['observateurs']:
+        observateur(instruction, HORS_CURSEUR)
+    _enregistrer(_Mesure(instruction, None, HORS_CURSEUR))
+
+
+class CurseurInstrumente(sqlite3.Cursor):
+    """
+    Curseur qui chronomètre chaque requête, de son exécution jusqu'à la dernière ligne lue
+
+    La requête est enregistrée quand toutes ses lignes ont été lues, quand le curseur
+    exécute une autre requête, ou quand il est fermé ou détruit.
+    """
+
+    _mesure = None
+
+    def _executer(self, methode, sql, parametres, mesure):
+        self._terminer()
+        for observateur in _etat['observateurs']:
+            observateur(sql, mesure.site)
+        _local.courante = mesure
+        debut = time.perf_counter()
+        try:
+            methode(self, sql, parametres)
+        finally:
+            mesure.duree += time.perf_counter() - debut
+            _local.courante = None
+        if self.description is None:
+            # Pas de lignes à lire (INSERT, UPDATE...) : la requête est terminée
+            mesure.lignes = max(self.rowcount, 0)
+            _enregistrer(mesure, self.connection)
+        else:
+            self._mesure = mesure
+        return self
+
+    def execute(self, sql, parametres=()):
+        return self._executer(sqlite3.Cursor.execute, sql, parametres, _Mesure(sql, parametres, _site_appelant()))
+
+    def executemany(self, sql, sequence):
+        # Pas de plan pour un lot : les paramètres ne sont pas conservés
+        return self._executer(sqlite3.Cursor.executemany, sql, sequence, _Mesure(sql, None, _site_appelant()))
+
+    def _terminer(self):
+        mesure = self._mesure
+        if mesure is not None:
+            self._mesure = None
+            _enregistrer(mesure, self.connection)
+
+    def _lire(self, methode, *args):
+        mesure = self._mesure
+        debut = time.perf_counter()
+        resultat = methode(self, *args)
+        if mesure is not None:
+            mesure.duree += time.perf_counter() - debut
+        return resultat
+
+    def fetchone(self):
+        row = self._lire(sqlite3.Cursor.fetchone)
+        if row is None:
+            self._terminer()
+        elif self._mesure is not None:
+            self._mesure.lignes += 1
+        return row
+
+    def fetchmany(self, size=None):
+        taille = self.arraysize if size is None else size
+        rows = self._lire(sqlite3.Cursor.fetchmany, taille)
+        if self._mesure is not None:
+            self._mesure.lignes += len(rows)
+            if len(rows) < taille:
+                self._terminer()
+        return rows
+
+    def fetchall(self):
+        rows = self._lire(sqlite3.Cursor.fetchall)
+        if self._mesure is not None:
+            self._mesure.lignes += len(rows)
+            self._terminer()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._lire(sqlite3.Cursor.__next__)
+        except StopIteration:
+            self._terminer()
+            raise
+        if self._mesure is not None:
+            self._mesure.lignes += 1
+        return row
+
+    def close(self):
+        self._terminer()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._terminer()
+        except Exception:
+            pass  # Destruction en fin de programme (modules ou connexion déjà libérés)
+
+
+class ConnexionInstrumentee(sqlite3.Connection):
+    """
+    Connexion dont les curseurs (et execute/executemany) sont des CurseurInstrumente une fois instrumentée
+
+    utils.db_manager ouvre toutes ses connexions avec cette classe et appelle instrumenter()
+    quand l'état de l'instrumentation a changé : la connexion n'est jamais rouverte.
+    """
+
+    instrumentee = False
+
+    def instrumenter(self, active):
+        """Installe (ou retire) la fonction de trace et les curseurs instrumentés"""
+        self.instrumentee = active
+        self.set_trace_callback(_tracer if active else None)
+
+    def cursor(self, *args):
+        if self.instrumentee and not args:
+            return super().cursor(CurseurInstrumente)
+        return super().cursor(*args)
+
+    def execute(self, sql, parametres=()):
+        if self.instrumentee:
+            return self.cursor().execute(sql, parametres)
+        return super().execute(sql, parametres)
+
+    def executemany(self, sql, sequence):
+        if self.instrumentee:
+            return self.cursor().executemany(sql, sequence)
+        return super().executemany(sql, sequence)
+
+
+def statistiques(tri='total'):
+    """
+    Statistiques par forme de requête et méthode appelante
+
+    Args:
+        tri: 'total' (durée cumulée), 'moyenne', 'max', 'appels' ou 'lignes'
+
+    Returns:
+        Liste de StatistiqueRequete, triée par valeur décroissante
+    """
+    with _verrou:
+        lignes = [StatistiqueRequete(forme, site, appels, total, maximum, nb_lignes, tuple(histogramme))
+                  for (forme, site), (appels, total, maximum, nb_lignes, histogramme) in _statistiques.items()]
+    cles = {
+        'total': lambda s: s.duree_totale_ms,
+        'moyenne': lambda s: s.duree_totale_ms / s.appels,
+        'max': lambda s: s.duree_max_ms,
+        'appels': lambda s: s.appels,
+        'lignes': lambda s: s.lignes,
+    }
+    return sorted(lignes, key=cles[tri], reverse=True)
+
+
+def requetes_lentes():
+    """Dernières requêtes lentes (entrées du journal), de la plus ancienne à la plus récente"""
+    with _verrou:
+        return list(_lentes)
+
+
+def exporter(chemin=None):
+    """
+    Écrit les statistiques en JSON (lues par python -m utils.diagnostic_sql statistiques)
+
+    Returns:
+        Chemin du fichier écrit
+    """
+    chemin = chemin or chemin_statistiques()
+    donnees = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'seuil_ms': _etat['seuil_ms'],
+        'bornes_histogramme_ms': list(BORNES_HISTOGRAMME_MS),
+        'statistiques': [s._asdict() for s in statistiques()],
+    }
+    with open(chemin, 'w', encoding='utf-8') as fichier:
+        json.dump(donnees, fichier, ensure_ascii=False, indent=2)
+    return chemin
+
+
+def _exporter_a_la_sortie():
+    if _statistiques:
+        try:
+            exporter()
+        except OSError:
+            pass
+
+
+def _enregistrer_export():
+    """Prévoit l'export des statistiques à la fin du programme (une seule fois)"""
+    with _verrou:
+        if not _etat['export_enregistre']:
+            _etat['export_enregistre'] = True
+            atexit.register(_exporter_a_la_sortie)
+
+
+if _etat['active']:
+    _enregistrer_export()
@@ -0,0 +1,25 @@
+# utils/pagination.py - Pagination par clé (keyset)
+#
+# Une page est lue avec "WHERE (clé) > curseur ORDER BY clé LIMIT taille + 1" : la lecture
+# part d'une position d'index, quel que soit le rang de la page (pas d'OFFSET). La ligne
+# en plus indique seulement s'il existe une page suivante.
+
+TAILLE_PAGE = 100
+
+
+def decouper_page(lignes, taille, cle):
+    """
+    Sépare une page du résultat d'une requête LIMIT taille + 1
+
+    Args:
+        lignes: Lignes lues (au plus taille + 1)
+        taille: Taille de la page
+        cle: Fonction donnant le curseur (clé de tri) d'une ligne
+
+    Returns:
+        (lignes de la page, curseur de la page suivante ou None s'il n'y en a pas)
+    """
+    if len(lignes) > taille:
+        lignes = lignes[:taille]
+        return lignes, cle(lignes[-1])
+    return lignes, None
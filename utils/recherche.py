@@ -0,0 +1,24 @@
+# utils/recherche.py - Construction des requêtes de recherche plein texte (FTS5)
+
+import re
+
+_MOT = re.compile(r'\w+', re.UNICODE)
+
+
+def expression_fts(terme):
+    """
+    Convertit une saisie libre en expression MATCH FTS5
+
+    Chaque mot devient un préfixe ("cim" trouve "Ciment Portland CPJ45") et tous
+    les mots doivent être présents.
+
+    Args:
+        terme: Texte saisi par l'utilisateur
+
+    Returns:
+        Expression MATCH, ou None si le terme ne contient aucun mot
+    """
+    mots = _MOT.findall(terme or '')
+    if not mots:
+        return None
+    return ' '.join(f'"{mot}"*' for mot in mots)
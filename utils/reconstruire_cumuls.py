@@ -0,0 +1,15 @@
+# utils/reconstruire_cumuls.py - Recalcul des cumuls quotidiens des ventes
+#
+# À lancer après un import de ventes fait directement en SQL, ou pour vérifier les cumuls
+# tenus à jour par Vente.save / Vente.delete.
+#
+# Usage : python -m utils.reconstruire_cumuls [chemin_db]
+
+import sys
+from models.cumul_vente import CumulVentes
+from utils.db_setup import setup_database
+
+
+if __name__ == "__main__":
+    setup_database(sys.argv[1] if len(sys.argv) > 1 else None)
+    print(f"{CumulVentes.reconstruire()} lignes de cumul recalculées")
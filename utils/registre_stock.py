@@ -0,0 +1,40 @@
+# utils/registre_stock.py - Instantanés et rapprochement du registre des mouvements de stock
+#
+# Usage : python -m utils.registre_stock instantane [--db chemin]
+#         python -m utils.registre_stock rapprocher [--db chemin]
+#         python -m utils.registre_stock stock-au PRODUIT_ID "YYYY-MM-DD HH:MM:SS" [--db chemin]
+
+import argparse
+import sys
+from models.mouvement_stock import MouvementStock
+from utils.db_setup import setup_database
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Registre des mouvements de stock")
+    parser.add_argument('--db', help="Chemin de la base de données")
+    commandes = parser.add_subparsers(dest='commande', required=True)
+    commandes.add_parser('instantane', help="Crée les instantanés de stock")
+    commandes.add_parser('rapprocher', help="Compare le stock des produits avec le registre")
+    stock_au = commandes.add_parser('stock-au', help="Stock d'un produit à une date")
+    stock_au.add_argument('produit_id', type=int)
+    stock_au.add_argument('date')
+    args = parser.parse_args(argv)
+
+    setup_database(args.db)
+
+    if args.commande == 'instantane':
+        print(f"{MouvementStock.creer_instantanes()} instantanés créés")
+    elif args.commande == 'stock-au':
+        print(MouvementStock.stock_au(args.produit_id, args.date))
+    else:
+        ecarts = MouvementStock.rapprocher()
+        for produit_id, quantite, registre in ecarts:
+            print(f"Produit {produit_id} : {quantite} en stock, {registre} selon le registre")
+        print(f"{len(ecarts)} écart(s)")
+        return 1 if ecarts else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
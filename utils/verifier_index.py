@@ -0,0 +1,207 @@
+# utils/verifier_index.py - Vérification des plans d'exécution des requêtes critiques
+#
+# Usage : python -m utils.verifier_index [chemin_db]
+#
+# Sans chemin, la vérification porte sur une base temporaire remplie de quelques milliers de
+# lignes (voir benchmarks.generer_donnees) : la base de l'application n'est ni migrée ni modifiée.
+
+import sys
+from controllers.gestion_vente import GestionVente
+from models.achat import Achat
+from models.client import Client
+from models.mouvement_stock import MouvementStock
+from models.produit import Produit
+from models.vente import Vente
+from utils.db_manager import get_connection, transaction
+
+# (nom, appel du modèle, extrait identifiant l'instruction à expliquer parmi celles lancées,
+# index attendus dans le plan ; 'PRIMARY KEY' pour la clé d'une table WITHOUT ROWID).
+# L'appel reçoit les identifiants d'exemple ({'vente': id, 'achat': id}) ; ce sont les
+# instructions réellement exécutées qui sont expliquées, relevées par la fonction de trace.
+# Aucune de ces requêtes ne doit trier ses résultats (USE TEMP B-TREE) : l'ordre vient de l'index.
+REQUETES_CRITIQUES = [
+    (
+        'Vente.get_by_id (détails)',
+        lambda exemples: Vente.get_by_id(exemples['vente']),
+        'FROM details_vente',
+        ['idx_details_vente_vente'],
+    ),
+    (
+        'Achat.get_by_id (détails)',
+        lambda exemples: Achat.get_by_id(exemples['achat']),
+        'FROM details_achat',
+        ['idx_details_achat_achat'],
+    ),
+    (
+        'Client.get_historique_achats',
+        lambda exemples: Client(id=1).get_historique_achats(),
+        'FROM ventes',
+        ['idx_ventes_client'],
+    ),
+    (
+        'Vente.get_ventes_periode',
+        lambda exemples: Vente.get_ventes_periode('2024-01-01', '2024-12-31'),
+        'FROM ventes',
+        ['idx_ventes_date'],
+    ),
+    (
+        'GestionVente.get_benefice_mensuel',
+        lambda exemples: GestionVente.get_benefice_mensuel(),
+        'FROM ventes_jour_produit',
+        ['PRIMARY KEY'],
+    ),
+    (
+        'GestionVente.get_ventes_jour',
+        lambda exemples: GestionVente.get_ventes_jour(),
+        'FROM ventes',
+        ['idx_ventes_date'],
+    ),
+    (
+        'Achat.get_achats_periode',
+        lambda exemples: Achat.get_achats_periode('2024-01-01', '2024-12-31'),
+        'FROM achats',
+        ['idx_achats_date'],
+    ),
+    (
+        'Vente.get_page (page suivante)',
+        lambda exemples: Vente.get_page(('2024-06-01 12:00:00', 1000), 100),
+        'FROM ventes',
+        ['idx_ventes_date'],
+    ),
+    (
+        'Achat.get_page (page suivante)',
+        lambda exemples: Achat.get_page(('2024-06-01 12:00:00', 1000), 100),
+        'FROM achats',
+        ['idx_achats_date'],
+    ),
+    (
+        'Produit.lister_page (catégorie)',
+        lambda exemples: Produit.lister_page(1000, 100, categorie_id=1),
+        'FROM produits',
+        ['idx_produits_categorie'],
+    ),
+    (
+        'Produit.get_by_category',
+        lambda exemples: Produit.get_by_category(1),
+        'FROM produits',
+        ['idx_produits_categorie'],
+    ),
+    (
+        'MouvementStock.stock_au (instantané)',
+        lambda exemples: MouvementStock.stock_au(1, '2024-01-01 00:00:00'),
+        'date_instantane <=',
+        ['PRIMARY KEY'],
+    ),
+    (
+        'MouvementStock.stock_au (mouvements suivants)',
+        lambda exemples: MouvementStock.stock_au(1, '2024-01-01 00:00:00'),
+        'FROM mouvements_stock',
+        ['idx_mouvements_produit'],
+    ),
+    (
+        'MouvementStock.get_historique',
+        lambda exemples: MouvementStock.get_historique(1),
+        'FROM mouvements_stock',
+        ['idx_mouvements_produit'],
+    ),
+]
+
+
+class _Annulation(Exception):
+    """Levée pour annuler la transaction des données d'exemple"""
+
+
+def capturer_requetes(appel, conn=None):
+    """
+    Exécute appel() et relève les instructions SQL lancées sur la connexion du thread
+
+    Returns:
+        Liste des instructions, valeurs des paramètres comprises (fonction de trace SQLite)
+    """
+    conn = conn or get_connection()
+    instructions = []
+    conn.set_trace_callback(instructions.append)
+    try:
+        appel()
+    finally:
+        # Remet la fonction de trace de l'instrumentation si la connexion est instrumentée
+        conn.instrumenter(conn.instrumentee)
+    return instructions
+
+
+def plan_requete(conn, requete, parametres=()):
+    """
+    Retourne le plan d'exécution d'une requête
+
+    Returns:
+        Liste des lignes de détail de EXPLAIN QUERY PLAN
+    """
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {requete}', parametres)]
+
+
+def verifier_plans(conn=None):
+    """
+    Vérifie que chaque requête critique, telle qu'exécutée par son modèle, utilise ses index
+
+    Les appels sont faits dans une transaction annulée à la fin : une vente et un achat
+    d'exemple y sont créés si la base n'en contient pas (les détails ne sont lus que pour
+    une opération existante).
+
+    Returns:
+        Liste de tuples (nom, ok, plan)
+    """
+    conn = conn or get_connection()
+    resultats = []
+    try:
+        with transaction() as cursor:
+            exemples = {}
+            for cle, table, colonne in (('vente', 'ventes', 'date_vente'), ('achat', 'achats', 'date_achat')):
+                exemples[cle] = cursor.execute(f'SELECT MIN(id) FROM {table}').fetchone()[0]
+                if exemples[cle] is None:
+                    cursor.execute(f"INSERT INTO {table} ({colonne}, montant_total) VALUES ('2024-01-01 00:00:00', 0)")
+                    exemples[cle] = cursor.lastrowid
+
+            for nom, appel, extrait, index_attendus in REQUETES_CRITIQUES:
+                instructions = capturer_requetes(lambda: appel(exemples), conn)
+                requete = next((i for i in instructions if extrait in ' '.join(i.split())), None)
+                if requete is None:
+                    resultats.append((nom, False, [f"aucune instruction contenant '{extrait}' parmi {len(instructions)}"]))
+                    continue
+                plan = plan_requete(conn, requete)
+                texte = '\n'.join(plan)
+                ok = all(f'USING {index}' in texte or f'INDEX {index}' in texte for index in index_attendus) and 'TEMP B-TREE' not in texte
+                resultats.append((nom, ok, plan))
+            raise _Annulation
+    except _Annulation:
+        pass
+    return resultats
+
+
+NB_LIGNES_EXEMPLE = 2000
+
+
+def _afficher(resultats):
+    """Affiche les plans et retourne le nombre de requêtes en échec"""
+    echecs = 0
+    for nom, ok, plan in resultats:
+        print(f"[{'OK' if ok else 'ÉCHEC'}] {nom}")
+        for ligne in plan:
+            print(f"    {ligne}")
+        echecs += not ok
+    return echecs
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        from utils.db_setup import setup_database
+
+        setup_database(sys.argv[1])
+        echecs = _afficher(verifier_plans())
+    else:
+        from benchmarks.commun import base_temporaire
+        from benchmarks.generer_donnees import GenerateurDonnees
+
+        with base_temporaire():
+            GenerateurDonnees(NB_LIGNES_EXEMPLE).generer()
+            echecs = _afficher(verifier_plans())
+    sys.exit(1 if echecs else 0)
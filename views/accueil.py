@@ -5,8 +5,12 @@ import sys
 from controllers.gestion_produit import GestionProduit
 from controllers.gestion_stock import GestionStock
 from controllers.gestion_vente import GestionVente
+from views.tache_fond import TacheDeFond
 
 class AccueilView(ttk.Frame):
+    # Intervalle de rafraîchissement automatique des statistiques
+    INTERVALLE_STATISTIQUES_MS = 60000
+    
     def __init__(self, parent):
         super().__init__(parent)
         self.parent = parent
@@ -17,6 +21,11 @@ class AccueilView(ttk.Frame):
         self.gestion_stock = GestionStock()
         self.gestion_vente = GestionVente()
         
+        # Calcul des statistiques en arrière-plan et minuteries en cours
+        self.tache_statistiques = None
+        self.minuterie_statistiques = None
+        self.minuterie_date = None
+        
         # Titre
         header_frame = ttk.Frame(self)
         header_frame.pack(fill=tk.X, padx=20, pady=10)
@@ -38,24 +47,22 @@ class AccueilView(ttk.Frame):
         stats_frame.grid(row=0, column=0, columnspan=3, sticky="nsew", padx=10, pady=10)
         
         # Créer les widgets pour les statistiques
-        self.stats_produits = ttk.Label(stats_frame, text="Total Produits: 0")
+        # (valeurs affichées une fois le calcul en arrière-plan terminé)
+        self.stats_produits = ttk.Label(stats_frame, text="Total Produits: ...")
         self.stats_produits.grid(row=0, column=0, padx=10, pady=5, sticky="w")
         
-        self.stats_stock = ttk.Label(stats_frame, text="Valeur du Stock: 0 DA")
+        self.stats_stock = ttk.Label(stats_frame, text="Valeur du Stock: ...")
         self.stats_stock.grid(row=0, column=1, padx=10, pady=5, sticky="w")
         
-        self.stats_ventes = ttk.Label(stats_frame, text="Ventes du jour: 0 DA")
+        self.stats_ventes = ttk.Label(stats_frame, text="Ventes du jour: ...")
         self.stats_ventes.grid(row=0, column=2, padx=10, pady=5, sticky="w")
         
-        self.stats_alerte = ttk.Label(stats_frame, text="Produits en alerte: 0")
+        self.stats_alerte = ttk.Label(stats_frame, text="Produits en alerte: ...")
         self.stats_alerte.grid(row=1, column=0, padx=10, pady=5, sticky="w")
         
-        self.stats_benefice = ttk.Label(stats_frame, text="Bénéfice mensuel: 0 DA")
+        self.stats_benefice = ttk.Label(stats_frame, text="Bénéfice mensuel: ...")
         self.stats_benefice.grid(row=1, column=1, padx=10, pady=5, sticky="w")
         
-        # Mettre à jour les statistiques
-        self.update_statistics()
-        
         # Boutons du menu principal
         menu_frame = ttk.Frame(main_frame)
         menu_frame.grid(row=1, column=0, columnspan=3, sticky="nsew", padx=10, pady=10)
@@ -114,27 +121,52 @@ class AccueilView(ttk.Frame):
         self.date_label = ttk.Label(status_frame, text="")
         self.date_label.pack(side=tk.RIGHT)
         self.update_date()
+        
+        # Les statistiques sont calculées hors du thread Tk, une fois l'écran affiché
+        self.bind("<Destroy>", self.arreter_minuteries)
+        self.after_idle(self.update_statistics)
+    
+    def calculer_statistiques(self, progression):
+        """Calcule les statistiques (exécuté dans un thread : ne touche à aucun widget)"""
+        return self.gestion_stock.obtenir_tableau_de_bord()
     
     def update_statistics(self):
+        """Lance le calcul des statistiques en arrière-plan (ignoré si un calcul est en cours)"""
+        self.minuterie_statistiques = None
+        if self.tache_statistiques is not None and self.tache_statistiques.en_cours():
+            return
+        self.tache_statistiques = TacheDeFond(self, self.calculer_statistiques,
+                                              on_termine=self.afficher_statistiques,
+                                              on_erreur=self.erreur_statistiques).demarrer()
+    
+    def afficher_statistiques(self, stats):
         """Met à jour les statistiques affichées sur l'écran d'accueil"""
-        try:
-            # Obtenir les statistiques depuis les contrôleurs
-            total_produits = self.gestion_produit.get_total_produits()
-            valeur_achat, valeur_vente = self.gestion_stock.get_valeur_totale_stock()
-            ventes_jour = self.gestion_vente.get_ventes_jour()
-            produits_alerte = self.gestion_stock.get_produits_en_alerte()
-            benefice_mensuel = self.gestion_vente.get_benefice_mensuel()
-            
-            # Mettre à jour les labels
-            self.stats_produits.config(text=f"Total Produits: {total_produits}")
-            self.stats_stock.config(text=f"Valeur du Stock: {valeur_achat:,.2f} DA (Achat), {valeur_vente:,.2f} DA (Vente)")
-            self.stats_ventes.config(text=f"Ventes du jour: {ventes_jour:,.2f} DA")
-            self.stats_alerte.config(text=f"Produits en alerte: {produits_alerte}")
-            self.stats_benefice.config(text=f"Bénéfice mensuel: {benefice_mensuel:,.2f} DA")
-            
-        except Exception as e:
-            print(f"Erreur lors de la mise à jour des statistiques: {e}")
-            self.status_label.config(text=f"Erreur: {e}")
+        self.stats_produits.config(text=f"Total Produits: {stats.total_produits}")
+        self.stats_stock.config(text=f"Valeur du Stock: {stats.valeur_achat:,.2f} DA (Achat), {stats.valeur_vente:,.2f} DA (Vente)")
+        self.stats_ventes.config(text=f"Ventes du jour: {stats.ventes_jour:,.2f} DA")
+        self.stats_alerte.config(text=f"Produits en alerte: {stats.produits_alerte}")
+        self.stats_benefice.config(text=f"Bénéfice mensuel: {stats.benefice_mensuel:,.2f} DA")
+        self.planifier_statistiques()
+    
+    def erreur_statistiques(self, e):
+        print(f"Erreur lors de la mise à jour des statistiques: {e}")
+        self.status_label.config(text=f"Erreur: {e}")
+        self.planifier_statistiques()
+    
+    def planifier_statistiques(self):
+        """Programme le prochain rafraîchissement des statistiques"""
+        self.minuterie_statistiques = self.after(self.INTERVALLE_STATISTIQUES_MS, self.update_statistics)
+    
+    def arreter_minuteries(self, event=None):
+        """Annule rafraîchissements et calcul en cours quand la vue est détruite"""
+        if event is not None and event.widget is not self:
+            return
+        for minuterie in (self.minuterie_statistiques, self.minuterie_date):
+            if minuterie is not None:
+                self.after_cancel(minuterie)
+        self.minuterie_statistiques = self.minuterie_date = None
+        if self.tache_statistiques is not None:
+            self.tache_statistiques.annuler()
     
     def update_date(self):
         """Met à jour la date et l'heure dans la barre de statut"""
@@ -143,7 +175,7 @@ class AccueilView(ttk.Frame):
         date_str = now.strftime("%d/%m/%Y %H:%M:%S")
         self.date_label.config(text=date_str)
         # Mettre à jour toutes les secondes
-        self.after(1000, self.update_date)
+        self.minuterie_date = self.after(1000, self.update_date)
     
     def open_produits_view(self):
         """Ouvre la vue de gestion des produits"""
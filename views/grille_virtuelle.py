@@ -0,0 +1,270 @@
+# views/grille_virtuelle.py - Treeview virtuel pour les grandes listes
+
+import tkinter as tk
+from tkinter import ttk
+
+
+class GrilleVirtuelle(ttk.Frame):
+    """
+    Treeview qui ne crée que les lignes visibles
+
+    Les données sont lues page par page (pagination par clé) au fil du défilement et
+    gardées sous forme de tuples dans une fenêtre bornée (TAILLE_FENETRE lignes) autour de
+    la partie visible ; le Treeview ne contient jamais plus d'items que de lignes visibles,
+    réutilisés à chaque défilement. Ouvrir une liste coûte une page, quelle que soit sa
+    taille, et un saut lointain (barre de défilement, touche Fin) se positionne directement
+    sur la ligne visée quand la source sait le faire (positionner).
+
+    Le Treeview reste accessible (attribut tree) pour configurer en-têtes, colonnes,
+    tags et menus ; selection() et item() y fonctionnent sur les lignes affichées.
+    """
+
+    TAILLE_PAGE = 200
+    TAILLE_FENETRE = 3 * TAILLE_PAGE  # Lignes gardées en mémoire au plus (hors besoin de l'affichage)
+    MARGE = 50  # Lignes lues d'avance sous la partie visible
+    LIGNES_MOLETTE = 3
+
+    def __init__(self, parent, charger_page=None, compter=None, positionner=None, **options):
+        """
+        Args:
+            parent: Widget parent
+            charger_page: Fonction (curseur, taille) -> (lignes, curseur suivant ou None),
+                          chaque ligne étant un tuple (clé, valeurs, tags)
+            compter: Fonction sans argument donnant le nombre total de lignes
+                     (facultative : sans elle, la barre de défilement est estimée)
+            positionner: Fonction rang -> curseur de charger_page désignant la ligne de ce rang
+                         (la page lue à partir de ce curseur commence à la ligne suivante),
+                         ou None si la liste est plus courte. Facultative : sans elle, un saut
+                         lit les pages intermédiaires sans les garder.
+            options: Options du ttk.Treeview (columns, show, selectmode...)
+        """
+        super().__init__(parent)
+        self.tree = ttk.Treeview(self, **options)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self._charger_page = charger_page
+        self._compter = compter
+        self._positionner = positionner
+        self._lignes = []  # Fenêtre : (clé, valeurs, tags) des lignes _debut, _debut + 1...
+        self._debut = 0  # Index de la première ligne de la fenêtre
+        self._curseur = None  # Curseur de la page qui suit la fenêtre
+        self._fin = True  # La fenêtre va jusqu'à la dernière ligne
+        self._total = 0  # None si inconnu
+        self._premier = 0  # Index de la première ligne affichée
+        self._nb_visibles = int(self.tree.cget('height'))
+        self._items = []  # Items du Treeview, du haut vers le bas
+        self._cle_selection = None
+        self._ligne_selection = None  # Gardée même quand la ligne sort de la fenêtre
+
+        self.tree.bind('<Configure>', self._redimensionner)
+        self.tree.bind('<<TreeviewSelect>>', self._memoriser_selection)
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.tree.bind(sequence, self._molette)
+        for touche in ('<Up>', '<Down>', '<Prior>', '<Next>', '<Home>', '<End>'):
+            self.tree.bind(touche, self._touche)
+
+    def charger(self, charger_page=None, compter=None, positionner=None):
+        """
+        Remplace la source de données (si donnée) et affiche le début de la liste
+
+        Returns:
+            Nombre de lignes (total si compter est fourni, lignes lues sinon)
+        """
+        if charger_page is not None:
+            self._charger_page = charger_page
+            self._compter = compter
+            self._positionner = positionner
+        self._lignes = []
+        self._debut = 0
+        self._curseur = None
+        self._fin = self._charger_page is None
+        self._premier = 0
+        self._cle_selection = None
+        self._ligne_selection = None
+        self._total = self._compter() if self._compter else None
+        self._afficher()
+        return self.nb_lignes()
+
+    def actualiser(self):
+        """Relit les données en gardant la position et la sélection"""
+        premier, cle, ligne = self._premier, self._cle_selection, self._ligne_selection
+        self.charger()
+        self._cle_selection, self._ligne_selection = cle, ligne
+        self.defiler_vers(premier)
+
+    def nb_lignes(self):
+        return self._total if self._total is not None else self._debut + len(self._lignes)
+
+    def ligne_selectionnee(self):
+        """Retourne la ligne sélectionnée (clé, valeurs, tags), ou None"""
+        return self._ligne_selection
+
+    def defiler_vers(self, index):
+        """Affiche la liste à partir de la ligne index"""
+        self._premier = max(0, index)
+        self._afficher()
+
+    def selectionner_index(self, index):
+        if self._total is not None:
+            index = min(index, self._total - 1)
+        index = max(0, index)
+        self._assurer(index, index + 1)
+        if not self._lignes:
+            return
+        # Liste plus courte que prévu : dernière ligne lue
+        index = min(index, self._debut + len(self._lignes) - 1)
+        self._ligne_selection = self._lignes[index - self._debut]
+        self._cle_selection = self._ligne_selection[0]
+        if index < self._premier:
+            self._premier = index
+        elif index >= self._premier + self._nb_visibles:
+            self._premier = index - self._nb_visibles + 1
+        self._afficher()
+
+    def _assurer(self, debut, fin):
+        """Place dans la fenêtre les lignes debut à fin - 1 (celles qui existent)"""
+        if debut < self._debut or debut > self._debut + len(self._lignes) + self.TAILLE_PAGE:
+            # Saut hors de la fenêtre : relue à partir d'une demi-page avant debut,
+            # pour pouvoir remonter un peu sans nouvelle lecture
+            self._repositionner(max(0, debut - self.TAILLE_PAGE // 2))
+        while not self._fin and self._debut + len(self._lignes) < fin:
+            manquantes = fin - (self._debut + len(self._lignes))
+            lignes, self._curseur = self._charger_page(self._curseur, max(self.TAILLE_PAGE, manquantes))
+            self._lignes.extend(lignes)
+            self._fin = self._curseur is None
+
+        # Fenêtre bornée : les lignes loin au-dessus de debut sont oubliées
+        exces = len(self._lignes) - self.TAILLE_FENETRE
+        if exces > 0:
+            retirees = min(exces, max(0, debut - self.MARGE - self._debut))
+            del self._lignes[:retirees]
+            self._debut += retirees
+
+        if self._total is not None:
+            # Des lignes ont pu être ajoutées ou supprimées depuis le comptage
+            fin_fenetre = self._debut + len(self._lignes)
+            self._total = fin_fenetre if self._fin else max(self._total, fin_fenetre)
+
+    def _repositionner(self, index):
+        """Vide la fenêtre pour la faire commencer à la ligne index (ou sur la fin de la liste si elle est plus courte)"""
+        if index > 0 and self._positionner is not None:
+            curseur = self._positionner(index - 1)
+            if curseur is not None:
+                self._lignes, self._debut, self._curseur, self._fin = [], index, curseur, False
+                return
+            # Liste raccourcie depuis le comptage : parcourue comme sans positionnement
+
+        position = self._debut + len(self._lignes)
+        if self._fin and position <= index:
+            return  # La fenêtre contient déjà la fin de la liste
+        curseur = self._curseur
+        if position > index:
+            position, curseur = 0, None
+        # Pages lues sans être gardées jusqu'à index, depuis la fin de la fenêtre si elle le précède
+        while position < index:
+            lignes, curseur = self._charger_page(curseur, min(self.TAILLE_PAGE, index - position))
+            position += len(lignes)
+            if curseur is None:
+                self._lignes, self._debut, self._curseur, self._fin = lignes, position - len(lignes), None, True
+                return
+        self._lignes, self._debut, self._curseur, self._fin = [], position, curseur, False
+
+    def _total_estime(self):
+        if self._total is not None:
+            return self._total
+        return self._debut + len(self._lignes) + (0 if self._fin else self.TAILLE_PAGE)
+
+    def _afficher(self):
+        self._assurer(self._premier, self._premier + self._nb_visibles + self.MARGE)
+        total = self._total_estime()
+        premier = max(0, min(self._premier, total - self._nb_visibles))
+        if premier != self._premier:
+            # Au-delà de la fin : ce sont les dernières lignes qui sont affichées
+            self._premier = premier
+            self._assurer(premier, premier + self._nb_visibles)
+        debut = max(0, self._premier - self._debut)
+        visibles = self._lignes[debut:debut + self._nb_visibles]
+
+        # Autant d'items que de lignes visibles, réutilisés d'un défilement à l'autre
+        while len(self._items) < len(visibles):
+            self._items.append(self.tree.insert('', tk.END))
+        while len(self._items) > len(visibles):
+            self.tree.delete(self._items.pop())
+
+        selection = ()
+        for item, (cle, valeurs, tags) in zip(self._items, visibles):
+            self.tree.item(item, values=valeurs, tags=tags)
+            if cle == self._cle_selection:
+                selection = (item,)
+                self._ligne_selection = (cle, valeurs, tags)
+        if self.tree.selection() != selection:
+            self.tree.selection_set(selection)
+        if selection:
+            self.tree.focus(selection[0])
+        self.tree.yview_moveto(0)
+
+        if total:
+            self.scrollbar.set(self._premier / total, (self._premier + len(visibles)) / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _geometrie_lignes(self):
+        """Retourne (hauteur d'une ligne, hauteur de l'en-tête) en pixels"""
+        if self._items:
+            boite = self.tree.bbox(self._items[0])
+            if boite:
+                return boite[3], boite[1]
+        hauteur_ligne = ttk.Style().lookup('Treeview', 'rowheight')
+        return int(hauteur_ligne or 20), 25 if 'headings' in str(self.tree.cget('show')) else 0
+
+    def _redimensionner(self, event):
+        hauteur_ligne, entete = self._geometrie_lignes()
+        nb_visibles = max(1, (event.height - entete) // hauteur_ligne)
+        if nb_visibles != self._nb_visibles:
+            self._nb_visibles = nb_visibles
+            self._afficher()
+
+    def _yview(self, action, valeur, unite=None):
+        if action == tk.MOVETO:
+            self.defiler_vers(int(float(valeur) * self._total_estime()))
+        elif unite == tk.PAGES:
+            self.defiler_vers(self._premier + int(valeur) * self._nb_visibles)
+        else:
+            self.defiler_vers(self._premier + int(valeur))
+
+    def _molette(self, event):
+        sens = -1 if event.num == 4 or event.delta > 0 else 1
+        self.defiler_vers(self._premier + sens * self.LIGNES_MOLETTE)
+        return 'break'
+
+    def _index_selection(self):
+        selection = self.tree.selection()
+        if selection and selection[0] in self._items:
+            return self._premier + self._items.index(selection[0])
+        return self._premier - 1
+
+    def _touche(self, event):
+        if event.keysym == 'Home':
+            cible = 0
+        elif event.keysym == 'End':
+            if self._total is None:
+                # Total inconnu : la liste est lue jusqu'au bout, la fenêtre glissant avec la lecture
+                while not self._fin:
+                    position = self._debut + len(self._lignes)
+                    self._assurer(position, position + self.TAILLE_PAGE)
+            cible = self.nb_lignes() - 1
+        else:
+            deplacement = {'Up': -1, 'Down': 1, 'Prior': -self._nb_visibles, 'Next': self._nb_visibles}
+            cible = self._index_selection() + deplacement[event.keysym]
+        self.selectionner_index(max(0, cible))
+        return 'break'
+
+    def _memoriser_selection(self, event):
+        selection = self.tree.selection()
+        if selection and selection[0] in self._items:
+            index = self._premier + self._items.index(selection[0]) - self._debut
+            if 0 <= index < len(self._lignes):
+                self._ligne_selection = self._lignes[index]
+                self._cle_selection = self._ligne_selection[0]
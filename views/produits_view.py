@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox, simpledialog, filedialog
 import os
 import sys
 from datetime import datetime
@@ -11,6 +11,10 @@ sys.path.append(parent_dir)
 
 from controllers.gestion_produit import GestionProduit
 from controllers.gestion_stock import GestionStock
+from utils.compteur_requetes import surveiller
+from utils.export_produits import exporter_produits_csv
+from views.grille_virtuelle import GrilleVirtuelle
+from views.tache_fond import TacheDeFond
 
 class ProduitsView(ttk.Frame):
     def __init__(self, parent):
@@ -25,6 +29,7 @@ class ProduitsView(ttk.Frame):
         # Variables
         self.search_var = tk.StringVar()
         self.category_var = tk.StringVar()
+        self.export_en_cours = None
         
         # Configurer les styles
         self.configure_styles()
@@ -74,8 +79,10 @@ class ProduitsView(ttk.Frame):
         product_frame = ttk.LabelFrame(self, text="Liste des Produits", padding=10)
         product_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
         
+        # Grille virtuelle : seules les lignes visibles sont lues et créées, quel que soit le catalogue
         columns = ("id", "reference", "nom", "categorie", "prix_achat", "prix_vente", "stock", "seuil_alerte")
-        self.product_tree = ttk.Treeview(product_frame, columns=columns, show="headings", selectmode="browse")
+        self.grille = GrilleVirtuelle(product_frame, columns=columns, show="headings", selectmode="browse")
+        self.product_tree = self.grille.tree
         
         # En-têtes du tableau
         self.product_tree.heading("id", text="ID")
@@ -97,11 +104,7 @@ class ProduitsView(ttk.Frame):
         self.product_tree.column("stock", width=80, anchor="center")
         self.product_tree.column("seuil_alerte", width=80, anchor="center")
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(product_frame, orient=tk.VERTICAL, command=self.product_tree.yview)
-        self.product_tree.configure(yscroll=scrollbar.set)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.product_tree.pack(fill=tk.BOTH, expand=True)
+        self.grille.pack(fill=tk.BOTH, expand=True)
         
         # Tags pour mise en forme conditionnelle
         self.product_tree.tag_configure("low_stock", background="#f1c40f", foreground="black")
@@ -136,35 +139,54 @@ class ProduitsView(ttk.Frame):
         self.count_label = ttk.Label(status_frame, text="0 produits")
         self.count_label.pack(side=tk.RIGHT, padx=5)
     
+    def ligne_produit(self, product):
+        """Ligne de la grille (clé, valeurs, tags) pour un produit"""
+        tags = []
+        if product.quantite <= product.seuil_reapprovisionnement:
+            tags.append("low_stock")
+        if product.quantite <= product.seuil_reapprovisionnement / 2:
+            tags.append("critical_stock")
+        
+        values = (
+            product.id,
+            product.nom,  # Note : votre modèle n'a pas de champ "reference", j'utilise "nom" ici
+            product.nom,
+            product.categorie_nom,
+            f"{product.prix_achat:.2f}",
+            f"{product.prix_vente:.2f}",
+            product.quantite,
+            product.seuil_reapprovisionnement
+        )
+        return product.id, values, tags
+    
+    def afficher_produits(self, terme=None, categorie_id=None, faible_stock=False):
+        """
+        Affiche les produits filtrés dans la grille, lus page par page au défilement
+        
+        Returns:
+            Nombre de produits correspondant aux filtres
+        """
+        def charger_page(curseur, taille):
+            # Une requête par page : le nom de catégorie est joint en SQL
+            products, suivant = self.gestion_produit.lister_produits_page(curseur, taille, terme, categorie_id, faible_stock)
+            return [self.ligne_produit(product) for product in products], suivant
+        
+        def compter():
+            return self.gestion_produit.compter_produits(terme, categorie_id, faible_stock)
+        
+        def positionner(rang):
+            return self.gestion_produit.curseur_produits_au_rang(rang, terme, categorie_id, faible_stock)
+        
+        return self.grille.charger(charger_page, compter, positionner)
+    
+    @surveiller(max_requetes=2)
     def load_products(self):
         """Charger tous les produits dans le tableau"""
-        for item in self.product_tree.get_children():
-            self.product_tree.delete(item)
-        
-        products = self.gestion_produit.obtenir_tous_produits()
-        for product in products:
-            categorie = next((c.nom for c in self.gestion_produit.obtenir_toutes_categories() if c.id == product.categorie_id), "Inconnue")
-            tags = []
-            if product.quantite <= product.seuil_reapprovisionnement:
-                tags.append("low_stock")
-            if product.quantite <= product.seuil_reapprovisionnement / 2:
-                tags.append("critical_stock")
-            
-            values = (
-                product.id,
-                product.nom,  # Note : votre modèle n'a pas de champ "reference", j'utilise "nom" ici
-                product.nom,
-                categorie,
-                f"{product.prix_achat:.2f}",
-                f"{product.prix_vente:.2f}",
-                product.quantite,
-                product.seuil_reapprovisionnement
-            )
-            self.product_tree.insert("", tk.END, values=values, tags=tags)
-        
-        self.count_label.config(text=f"{len(products)} produits")
+        nb = self.afficher_produits()
+        self.count_label.config(text=f"{nb} produits")
         self.status_label.config(text="Liste des produits chargée")
     
+    @surveiller(max_requetes=2)
     def search_products(self):
         """Rechercher des produits"""
         term = self.search_var.get().strip().lower()
@@ -172,27 +194,11 @@ class ProduitsView(ttk.Frame):
             self.load_products()
             return
         
-        for item in self.product_tree.get_children():
-            self.product_tree.delete(item)
-        
-        products = self.gestion_produit.rechercher_produits(term)
-        for product in products:
-            categorie = next((c.nom for c in self.gestion_produit.obtenir_toutes_categories() if c.id == product.categorie_id), "Inconnue")
-            values = (
-                product.id,
-                product.nom,
-                product.nom,
-                categorie,
-                f"{product.prix_achat:.2f}",
-                f"{product.prix_vente:.2f}",
-                product.quantite,
-                product.seuil_reapprovisionnement
-            )
-            self.product_tree.insert("", tk.END, values=values)
-        
-        self.count_label.config(text=f"{len(products)} produits trouvés")
+        nb = self.afficher_produits(terme=term)
+        self.count_label.config(text=f"{nb} produits trouvés")
         self.status_label.config(text=f"Recherche: '{term}'")
     
+    @surveiller(max_requetes=3)
     def filter_products(self):
         """Filtrer par catégorie"""
         category_name = self.category_var.get()
@@ -200,25 +206,10 @@ class ProduitsView(ttk.Frame):
             self.load_products()
             return
         
-        for item in self.product_tree.get_children():
-            self.product_tree.delete(item)
-        
-        categorie = next((c for c in self.gestion_produit.obtenir_toutes_categories() if c.nom == category_name), None)
-        if categorie:
-            products = self.gestion_produit.obtenir_produits_par_categorie(categorie.id)
-            for product in products:
-                values = (
-                    product.id,
-                    product.nom,
-                    product.nom,
-                    category_name,
-                    f"{product.prix_achat:.2f}",
-                    f"{product.prix_vente:.2f}",
-                    product.quantite,
-                    product.seuil_reapprovisionnement
-                )
-                self.product_tree.insert("", tk.END, values=values)
-            self.count_label.config(text=f"{len(products)} produits")
+        categorie_id = self.gestion_produit.obtenir_id_categorie(category_name)
+        if categorie_id is not None:
+            nb = self.afficher_produits(categorie_id=categorie_id)
+            self.count_label.config(text=f"{nb} produits")
             self.status_label.config(text=f"Filtré par catégorie: '{category_name}'")
     
     def show_context_menu(self, event):
@@ -260,7 +251,7 @@ class ProduitsView(ttk.Frame):
         def save():
             data = {label: var.get() for label, (_, var, _) in entries.items()}
             try:
-                categorie_id = next(c.id for c in self.gestion_produit.obtenir_toutes_categories() if c.nom == data["Catégorie"])
+                categorie_id = self.gestion_produit.obtenir_id_categorie(data["Catégorie"])
                 success, produit_id, msg = self.gestion_produit.ajouter_produit(
                     nom=data["Nom"],
                     description=data["Description"],
@@ -302,7 +293,7 @@ class ProduitsView(ttk.Frame):
         fields = [
             ("Nom", tk.StringVar(value=product.nom), True),
             ("Description", tk.StringVar(value=product.description), False),
-            ("Catégorie", tk.StringVar(value=next(c.nom for c in self.gestion_produit.obtenir_toutes_categories() if c.id == product.categorie_id)), True),
+            ("Catégorie", tk.StringVar(value=self.gestion_produit.obtenir_nom_categorie(product.categorie_id)), True),
             ("Prix Achat (DA)", tk.DoubleVar(value=product.prix_achat), True),
             ("Prix Vente (DA)", tk.DoubleVar(value=product.prix_vente), True),
             ("Stock Initial", tk.IntVar(value=product.quantite), True),
@@ -323,7 +314,7 @@ class ProduitsView(ttk.Frame):
         def update():
             data = {label: var.get() for label, (_, var, _) in entries.items()}
             try:
-                categorie_id = next(c.id for c in self.gestion_produit.obtenir_toutes_categories() if c.nom == data["Catégorie"])
+                categorie_id = self.gestion_produit.obtenir_id_categorie(data["Catégorie"])
                 success, _, msg = self.gestion_produit.modifier_produit(
                     id=product_id,
                     nom=data["Nom"],
@@ -391,41 +382,48 @@ class ProduitsView(ttk.Frame):
     
     def show_low_stock(self):
         """Afficher les produits en faible stock"""
-        for item in self.product_tree.get_children():
-            self.product_tree.delete(item)
-        
-        products = self.gestion_produit.obtenir_produits_faible_stock()
-        for product in products:
-            categorie = next((c.nom for c in self.gestion_produit.obtenir_toutes_categories() if c.id == product.categorie_id), "Inconnue")
-            values = (
-                product.id,
-                product.nom,
-                product.nom,
-                categorie,
-                f"{product.prix_achat:.2f}",
-                f"{product.prix_vente:.2f}",
-                product.quantite,
-                product.seuil_reapprovisionnement
-            )
-            self.product_tree.insert("", tk.END, values=values, tags=("low_stock",))
-        
-        self.count_label.config(text=f"{len(products)} produits en faible stock")
+        nb = self.afficher_produits(faible_stock=True)
+        self.count_label.config(text=f"{nb} produits en faible stock")
         self.status_label.config(text="Affichage des produits en faible stock")
     
     def export_products(self):
-        """Exporter les produits en CSV"""
-        import csv
-        products = self.gestion_produit.obtenir_tous_produits()
-        with open(f"export_produits_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(["ID", "Nom", "Catégorie", "Prix Achat", "Prix Vente", "Stock", "Seuil Alerte"])
-            for p in products:
-                categorie = next((c.nom for c in self.gestion_produit.obtenir_toutes_categories() if c.id == p.categorie_id), "Inconnue")
-                writer.writerow([p.id, p.nom, categorie, p.prix_achat, p.prix_vente, p.quantite, p.seuil_reapprovisionnement])
-        self.status_label.config(text="Produits exportés en CSV")
+        """Exporter les produits en CSV (en arrière-plan, sans bloquer l'interface)"""
+        if self.export_en_cours is not None and self.export_en_cours.en_cours():
+            messagebox.showinfo("Export", "Un export est déjà en cours.")
+            return
+        
+        chemin = filedialog.asksaveasfilename(
+            parent=self.parent,
+            title="Exporter les produits",
+            initialfile=f"export_produits_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("CSV compressé", "*.csv.gz")]
+        )
+        if not chemin:
+            return
+        
+        def executer(progression):
+            return exporter_produits_csv(chemin, progression=progression,
+                                         annule=lambda: self.export_en_cours.annulee)
+        
+        def afficher_progression(nb_ecrits, total):
+            self.status_label.config(text=f"Export en cours: {nb_ecrits}/{total} produits")
+        
+        def termine(nb):
+            self.status_label.config(text=f"{nb} produits exportés en CSV")
+        
+        def erreur(e):
+            self.status_label.config(text="Échec de l'export")
+            messagebox.showerror("Erreur", f"Erreur lors de l'export: {e}")
+        
+        self.status_label.config(text="Export en cours...")
+        self.export_en_cours = TacheDeFond(self, executer, on_termine=termine, on_erreur=erreur,
+                                           on_progression=afficher_progression).demarrer()
     
     def return_to_home(self):
         """Retourner à l'accueil"""
+        if self.export_en_cours is not None:
+            self.export_en_cours.annuler()
         for widget in self.parent.winfo_children():
             widget.destroy()
         from views.accueil import AccueilView
@@ -0,0 +1,91 @@
+# views/tache_fond.py - Exécution de traitements longs hors du thread Tk
+
+import queue
+import threading
+import tkinter as tk
+
+
+class TacheDeFond:
+    """
+    Exécute une fonction dans un thread et renvoie ses résultats au thread Tk
+
+    Le thread de travail ne touche jamais aux widgets : progression, résultat et
+    erreur passent par une file relevée périodiquement avec widget.after().
+    """
+
+    INTERVALLE_MS = 100
+
+    def __init__(self, widget, fonction, on_termine=None, on_erreur=None, on_progression=None):
+        """
+        Args:
+            widget: Widget Tk servant à planifier les relevés (after)
+            fonction: Fonction exécutée dans le thread; reçoit en argument une fonction
+                      progression(*valeurs) qu'elle peut appeler librement
+            on_termine: Appelée dans le thread Tk avec le résultat de la fonction
+            on_erreur: Appelée dans le thread Tk avec l'exception levée
+            on_progression: Appelée dans le thread Tk avec les valeurs de progression
+        """
+        self.widget = widget
+        self.fonction = fonction
+        self.on_termine = on_termine
+        self.on_erreur = on_erreur
+        self.on_progression = on_progression
+        self.annulee = False
+        self._file = queue.Queue()
+        self._thread = None
+        self._minuterie = None
+
+    def demarrer(self):
+        self._thread = threading.Thread(target=self._executer, daemon=True)
+        self._thread.start()
+        self._minuterie = self.widget.after(self.INTERVALLE_MS, self._relever)
+        return self
+
+    def annuler(self):
+        """Demande l'arrêt : la fonction doit consulter self.annulee ; plus aucun rappel n'est fait"""
+        self.annulee = True
+        if self._minuterie is not None:
+            try:
+                self.widget.after_cancel(self._minuterie)
+            except tk.TclError:
+                pass
+            self._minuterie = None
+
+    def en_cours(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _executer(self):
+        try:
+            resultat = self.fonction(self._progression)
+            self._file.put(('termine', resultat))
+        except Exception as e:
+            self._file.put(('erreur', e))
+
+    def _progression(self, *valeurs):
+        self._file.put(('progression', valeurs))
+
+    def _relever(self):
+        self._minuterie = None
+        if self.annulee:
+            return
+        try:
+            while True:
+                type_message, valeur = self._file.get_nowait()
+                if type_message == 'progression':
+                    if self.on_progression:
+                        self.on_progression(*valeur)
+                elif type_message == 'termine':
+                    if self.on_termine:
+                        self.on_termine(valeur)
+                    return
+                else:
+                    if self.on_erreur:
+                        self.on_erreur(valeur)
+                    return
+        except queue.Empty:
+            pass
+        try:
+            self._minuterie = self.widget.after(self.INTERVALLE_MS, self._relever)
+        except tk.TclError:
+            # Le widget a été détruit (changement de vue) : on arrête de relever
+            self.annulee = True
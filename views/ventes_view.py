@@ -12,6 +12,8 @@ sys.path.append(parent_dir)
 from controllers.gestion_vente import GestionVente
 from controllers.gestion_produit import GestionProduit
 from controllers.gestion_stock import GestionStock
+from utils.compteur_requetes import surveiller
+from views.grille_virtuelle import GrilleVirtuelle
 
 class VentesView(ttk.Frame):
     def __init__(self, parent):
@@ -93,23 +95,16 @@ class VentesView(ttk.Frame):
         btn_rechercher = ttk.Button(periode_frame, text="Rechercher", command=self.load_ventes)
         btn_rechercher.grid(row=0, column=4, padx=5, pady=5)
         
-        # Tableau des ventes
-        self.tableau_ventes = ttk.Treeview(self.tab_liste, columns=("date", "client", "total"), show="headings")
+        # Tableau des ventes (grille virtuelle, avec sa barre de défilement)
+        self.grille_ventes = GrilleVirtuelle(self.tab_liste, columns=("date", "client", "total"), show="headings")
+        self.tableau_ventes = self.grille_ventes.tree
         self.tableau_ventes.heading("date", text="Date")
         self.tableau_ventes.heading("client", text="Client")
         self.tableau_ventes.heading("total", text="Total")
-        self.tableau_ventes.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-        
-        # Barre de défilement pour le tableau
-        scrollbar = ttk.Scrollbar(self.tab_liste, orient="vertical", command=self.tableau_ventes.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.tableau_ventes.configure(yscrollcommand=scrollbar.set)
+        self.grille_ventes.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
     
+    @surveiller(max_requetes=2)
     def load_ventes(self):
-        # Effacer le tableau
-        for row in self.tableau_ventes.get_children():
-            self.tableau_ventes.delete(row)
-        
         # Récupérer les dates de début et de fin
         date_debut = self.date_debut_var.get()
         date_fin = self.date_fin_var.get()
@@ -126,12 +121,15 @@ class VentesView(ttk.Frame):
             messagebox.showerror("Erreur de date", "La date de début doit être avant la date de fin.")
             return
         
-        # Charger les ventes depuis le contrôleur
-        ventes = self.gestion_vente.get_ventes(date_debut, date_fin)
+        # Charger les ventes page par page, au fil du défilement
+        def charger_page(curseur, taille):
+            ventes, suivant = self.gestion_vente.obtenir_ventes_page(curseur, taille, date_debut, date_fin)
+            return [(vente_id, (date_vente, nom_client or "", f"{montant_total:.2f}"), ())
+                    for vente_id, _, date_vente, montant_total, nom_client in ventes], suivant
         
-        # Afficher les ventes dans le tableau
-        for vente in ventes:
-            self.tableau_ventes.insert("", tk.END, values=(vente['date'], vente['client'], vente['total']))
+        self.grille_ventes.charger(charger_page,
+                                   lambda: self.gestion_vente.compter_ventes(date_debut, date_fin),
+                                   lambda rang: self.gestion_vente.curseur_ventes_au_rang(rang, date_debut, date_fin))
     
     def setup_nouvelle_vente_tab(self):
         # Titre
@@ -141,19 +139,24 @@ class VentesView(ttk.Frame):
         product_frame = ttk.LabelFrame(self.tab_nouvelle, text="Produits disponibles")
         product_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
-        self.tableau_produits = ttk.Treeview(product_frame, columns=("nom", "prix", "stock"), show="headings")
+        self.grille_produits = GrilleVirtuelle(product_frame, columns=("nom", "prix", "stock"), show="headings")
+        self.tableau_produits = self.grille_produits.tree
         self.tableau_produits.heading("nom", text="Nom")
         self.tableau_produits.heading("prix", text="Prix")
         self.tableau_produits.heading("stock", text="Stock")
-        self.tableau_produits.pack(fill=tk.BOTH, expand=True)
+        self.grille_produits.pack(fill=tk.BOTH, expand=True)
         
         # Chargement des produits
         self.load_produits()
     
     def load_produits(self):
-        produits = self.gestion_produit.get_all()
-        for produit in produits:
-            self.tableau_produits.insert("", tk.END, values=(produit['nom'], produit['prix'], produit['stock']))
+        def charger_page(curseur, taille):
+            produits, suivant = self.gestion_produit.lister_produits_page(curseur, taille)
+            return [(produit.id, (produit.nom, f"{produit.prix_vente:.2f}", produit.quantite), ())
+                    for produit in produits], suivant
+        
+        self.grille_produits.charger(charger_page, self.gestion_produit.compter_produits,
+                                     self.gestion_produit.curseur_produits_au_rang)
     
     def return_to_home(self):
         self.parent.destroy()